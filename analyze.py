@@ -2,6 +2,7 @@
 import argparse
 from datetime import datetime, timedelta
 from src.agent_orchestrator import analyze_prompt
+from src.instrumentation import recorder
 
 def validate_date(date_str: str) -> str:
     """Validate date format"""
@@ -38,6 +39,24 @@ def main():
         help='Hide detailed reasoning from agents'
     )
     
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='Print per-agent, HTTP and LLM timings after the analysis'
+    )
+    
+    parser.add_argument(
+        '--trace-json',
+        type=str,
+        help='Write recorded spans and their summary to this JSON file'
+    )
+    
+    parser.add_argument(
+        '--chrome-trace',
+        type=str,
+        help='Write recorded spans as a Chrome trace / Perfetto file'
+    )
+    
     args = parser.parse_args()
     
     # Set default dates if not provided
@@ -57,6 +76,13 @@ def main():
     )
     
     print(result)
+    
+    if args.timings:
+        print(recorder.format_summary())
+    if args.trace_json:
+        recorder.export_json(args.trace_json)
+    if args.chrome_trace:
+        recorder.export_chrome_trace(args.chrome_trace)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,6 +1,6 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai.chat_models import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 import json
 
@@ -8,12 +8,15 @@ from src.agents import (
     market_data_agent,
     quant_agent,
     fundamentals_agent,
+    get_default_llm,
     AgentState
 )
+from src.schemas.analysis import AnalystSignal
+from src.instrumentation import llm_callback, recorder
 
 class AgentOrchestrator:
-    def __init__(self, show_reasoning: bool = True):
-        self.llm = ChatOpenAI(model="gpt-4")
+    def __init__(self, show_reasoning: bool = True, llm: Optional[BaseChatModel] = None):
+        self.llm = llm or get_default_llm()
         self.show_reasoning = show_reasoning
         
         # Define agent mapping
@@ -53,20 +56,76 @@ class AgentOrchestrator:
             HumanMessage(content=prompt)
         ])
         
-        response = self.llm.invoke(template)
+        response = self.llm.invoke(template.format_messages(), config={"callbacks": [llm_callback]})
         return json.loads(response.content)
     
-    def _format_agent_response(self, agent_name: str, response: Dict) -> str:
+    def _format_agent_response(self, agent_name: str, response: AnalystSignal) -> str:
         """Format agent response for human readability"""
-        if "signal" in response:
-            return f"""
+        reasoning = {name: item.model_dump() for name, item in response.reasoning.items()}
+        return f"""
 {agent_name.upper()} ANALYSIS:
-Signal: {response['signal'].upper()}
-Confidence: {response['confidence']*100:.0f}%
+Signal: {response.signal.upper()}
+Confidence: {response.confidence*100:.0f}%
 Reasoning:
-{json.dumps(response['reasoning'], indent=2)}
+{json.dumps(reasoning, indent=2)}
 """
-        return f"\n{agent_name.upper()} DATA:\n{json.dumps(response, indent=2)}"
+
+    @staticmethod
+    def _apply_update(state: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge an agent's partial update into the state, mirroring the graph reducers"""
+        merged = dict(state)
+        for key, value in update.items():
+            if key == "messages":
+                merged[key] = list(state.get(key, [])) + list(value)
+            elif isinstance(value, dict):
+                merged[key] = {**state.get(key, {}), **value}
+            else:
+                merged[key] = value
+        return merged
+    
+    def run_agents(
+        self,
+        ticker: str,
+        required_agents: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any], Optional[str]]]]:
+        """Run agents in sequence and return the final state plus (agent, analyses, error) per agent"""
+        # Initialize state
+        state = AgentState(
+            messages=[],
+            data={
+                "ticker": ticker,
+                "start_date": start_date,
+                "end_date": end_date
+            },
+            metadata={"show_reasoning": self.show_reasoning, "llm": self.llm},
+            timings={},
+            analyses={}
+        )
+        
+        # Always run market_data_agent first if we need data
+        required_agents = list(required_agents)
+        if "market_data" not in required_agents and (
+            "technical" in required_agents or "fundamental" in required_agents
+        ):
+            required_agents.insert(0, "market_data")
+        
+        outcomes = []
+        
+        # Run required agents in sequence
+        for agent_name in required_agents:
+            if agent_name in self.agents:
+                agent_func = self.agents[agent_name]
+                try:
+                    with recorder.span("agent", agent_name, ticker=ticker):
+                        result = agent_func(state)
+                    state = self._apply_update(state, result)  # Update state for next agent
+                    outcomes.append((agent_name, result.get("analyses", {}), None))
+                except Exception as e:
+                    outcomes.append((agent_name, {}, str(e)))
+        
+        return state, outcomes
     
     def process_prompt(self, prompt: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
         """Process a natural language prompt and return analysis"""
@@ -74,43 +133,16 @@ Reasoning:
             # Parse the prompt
             parsed = self._parse_prompt(prompt)
             ticker = parsed["ticker"]
-            required_agents = parsed["agents"]
-            
-            # Initialize state
-            state = AgentState(
-                messages=[],
-                data={
-                    "ticker": ticker,
-                    "start_date": start_date,
-                    "end_date": end_date
-                },
-                metadata={"show_reasoning": self.show_reasoning}
-            )
             
-            # Always run market_data_agent first if we need data
-            if "market_data" not in required_agents and (
-                "technical" in required_agents or "fundamental" in required_agents
-            ):
-                required_agents.insert(0, "market_data")
+            _, outcomes = self.run_agents(ticker, parsed["agents"], start_date, end_date)
             
+            # Format responses
             responses = []
-            
-            # Run required agents in sequence
-            for agent_name in required_agents:
-                if agent_name in self.agents:
-                    agent_func = self.agents[agent_name]
-                    try:
-                        result = agent_func(state)
-                        state = result  # Update state for next agent
-                        
-                        # Format response
-                        if agent_name != "market_data" or self.show_reasoning:
-                            if len(result["messages"]) > 0:
-                                last_message = result["messages"][-1]
-                                response_content = json.loads(last_message.content.replace("'", '"'))
-                                responses.append(self._format_agent_response(agent_name, response_content))
-                    except Exception as e:
-                        responses.append(f"\n{agent_name.upper()} ERROR: {str(e)}")
+            for agent_name, analyses, error in outcomes:
+                if error is not None:
+                    responses.append(f"\n{agent_name.upper()} ERROR: {error}")
+                for analysis in analyses.values():
+                    responses.append(self._format_agent_response(agent_name, analysis))
             
             # Generate summary using GPT-4
             summary_template = ChatPromptTemplate.from_messages([
@@ -120,7 +152,7 @@ Reasoning:
                 HumanMessage(content=f"Here are the analyses for {ticker}:\n{''.join(responses)}")
             ])
             
-            summary = self.llm.invoke(summary_template)
+            summary = self.llm.invoke(summary_template.format_messages(), config={"callbacks": [llm_callback]})
             
             # Combine all responses with summary
             return f"""
@@ -134,9 +166,9 @@ SUMMARY:
         except Exception as e:
             return f"Error processing prompt: {str(e)}"
 
-def analyze_prompt(prompt: str, start_date: Optional[str] = None, end_date: Optional[str] = None, show_reasoning: bool = True) -> str:
+def analyze_prompt(prompt: str, start_date: Optional[str] = None, end_date: Optional[str] = None, show_reasoning: bool = True, llm: Optional[BaseChatModel] = None) -> str:
     """Convenience function to analyze a prompt"""
-    orchestrator = AgentOrchestrator(show_reasoning=show_reasoning)
+    orchestrator = AgentOrchestrator(show_reasoning=show_reasoning, llm=llm)
     return orchestrator.process_prompt(prompt, start_date, end_date)
 
 if __name__ == "__main__":
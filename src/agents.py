@@ -1,13 +1,20 @@
 from typing import Annotated, Any, Dict, Sequence, TypedDict, List
+import json
 import operator
-from langchain_core.messages import BaseMessage, HumanMessage
+import re
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai.chat_models import ChatOpenAI
 from langgraph.graph import END, StateGraph
 import pandas as pd
 import numpy as np
+from pydantic import ValidationError
 from datetime import datetime, timedelta
 
+from src.tools import get_news
+from src.instrumentation import llm_callback
+from src.data_providers.market_data_provider import MarketDataProvider
 from src.tools.new_tools import (
     get_quotes,
     get_financial_ratios,
@@ -26,8 +33,22 @@ from src.schemas.market_data_schema import (
     IncomeStatement,
     CompanyInfo
 )
+from src.schemas.analysis import AnalystSignal, RiskAssessment, SignalReasoning
+from src.schemas.portfolio import TradeDecision
+from src.features import TechnicalFeatures
+from src.risk import RiskLimits, max_position_weights
 
-llm = ChatOpenAI(model="gpt-4")
+_default_llm = None
+
+def get_default_llm() -> BaseChatModel:
+    """Return the shared GPT-4 client, created on first use so imports work offline"""
+    global _default_llm
+    if _default_llm is None:
+        _default_llm = ChatOpenAI(model="gpt-4")
+    return _default_llm
+
+# Shared provider so quotes, statements and the symbol master stay cached across calls
+provider = MarketDataProvider()
 
 def merge_dicts(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
     return {**a, **b}
@@ -36,6 +57,8 @@ class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     data: Annotated[Dict[str, Any], merge_dicts]
     metadata: Annotated[Dict[str, Any], merge_dicts]
+    timings: Annotated[Dict[str, float], merge_dicts]
+    analyses: Annotated[Dict[str, Any], merge_dicts]
 
 def calculate_rsi(prices_df: pd.DataFrame, periods: int = 14) -> pd.Series:
     """Calculate Relative Strength Index"""
@@ -63,46 +86,37 @@ def calculate_bollinger_bands(prices_df: pd.DataFrame, window: int = 20) -> tupl
 
 def calculate_obv(prices_df: pd.DataFrame) -> pd.Series:
     """Calculate On-Balance Volume"""
-    obv = pd.Series(0, index=prices_df.index)
-    for i in range(1, len(prices_df)):
-        if prices_df['close'].iloc[i] > prices_df['close'].iloc[i-1]:
-            obv.iloc[i] = obv.iloc[i-1] + prices_df['volume'].iloc[i]
-        elif prices_df['close'].iloc[i] < prices_df['close'].iloc[i-1]:
-            obv.iloc[i] = obv.iloc[i-1] - prices_df['volume'].iloc[i]
-        else:
-            obv.iloc[i] = obv.iloc[i-1]
-    return obv
+    direction = np.sign(prices_df['close'].diff()).fillna(0)
+    return (direction * prices_df['volume']).cumsum()
 
 ##### Market Data Agent #####
 def market_data_agent(state: AgentState):
     """Responsible for gathering and preprocessing market data"""
-    messages = state["messages"]
     data = state["data"]
     ticker = data["ticker"]
 
     try:
         # Get company info
-        company_data = match_company_data()
+        company_data = provider.company_data
         company = company_data[company_data['ticker'] == ticker].iloc[0]
         cvm_code = company['cvm_code']
         
-        # Get market data
-        quotes_df = get_quotes(
-            ticker=ticker,
-            period_init=data.get("start_date"),
-            period_end=data.get("end_date")
-        )
+        # Get market data, unless the caller already handed us the window
+        quotes_df = data.get("quotes")
+        if quotes_df is None:
+            quotes_df = provider.get_quotes_df(
+                ticker,
+                start_date=data.get("start_date"),
+                end_date=data.get("end_date")
+            )
         
-        # Get financial data
-        financials = {
-            "ratios": get_financial_ratios(cvm_code),
-            "market_ratios": get_market_ratios(cvm_code),
-            "income": get_income_statements(cvm_code),
-            "balance": get_balance_sheet(cvm_code)
-        }
+        # Get financial data, unless the caller already handed us the point-in-time statements
+        financials = data.get("financials")
+        if financials is None:
+            financials = provider.get_statements(cvm_code)
         
         return {
-            "messages": messages,
+            "messages": [],
             "data": {
                 **data,
                 "quotes": quotes_df,
@@ -114,48 +128,67 @@ def market_data_agent(state: AgentState):
         raise Exception(f"Failed to fetch market data: {str(e)}")
 
 ##### Quantitative Agent #####
-def quant_agent(state: AgentState):
-    """Analyzes technical indicators and generates trading signals."""
-    show_reasoning = state["metadata"]["show_reasoning"]
-    data = state["data"]
-    prices_df = data["quotes"]
-    
-    # Calculate indicators
+def technical_features(prices_df: pd.DataFrame) -> TechnicalFeatures:
+    """Latest indicator values computed from scratch on a price window"""
     macd_line, signal_line = calculate_macd(prices_df)
     rsi = calculate_rsi(prices_df)
     upper_band, lower_band = calculate_bollinger_bands(prices_df)
     obv = calculate_obv(prices_df)
+    return TechnicalFeatures(
+        close=prices_df['close'].iloc[-1],
+        macd=macd_line.iloc[-1],
+        macd_signal=signal_line.iloc[-1],
+        prev_macd=macd_line.iloc[-2] if len(prices_df) > 1 else np.nan,
+        prev_macd_signal=signal_line.iloc[-2] if len(prices_df) > 1 else np.nan,
+        rsi=rsi.iloc[-1],
+        bollinger_upper=upper_band.iloc[-1],
+        bollinger_lower=lower_band.iloc[-1],
+        obv=obv.iloc[-1],
+        obv_slope=obv.diff().iloc[-5:].mean(),
+        bars=len(prices_df),
+    )
+
+def quant_agent(state: AgentState):
+    """Analyzes technical indicators and generates trading signals."""
+    show_reasoning = state["metadata"]["show_reasoning"]
+    data = state["data"]
+
+    # Precomputed by the backtest feature pipeline when available
+    features = data.get("features")
+    if features is None:
+        features = technical_features(data["quotes"])
     
     # Generate signals
     signals = []
     
     # MACD signal
-    if macd_line.iloc[-2] < signal_line.iloc[-2] and macd_line.iloc[-1] > signal_line.iloc[-1]:
+    if features.prev_macd < features.prev_macd_signal and features.macd > features.macd_signal:
         signals.append('bullish')
-    elif macd_line.iloc[-2] > signal_line.iloc[-2] and macd_line.iloc[-1] < signal_line.iloc[-1]:
+    elif features.prev_macd > features.prev_macd_signal and features.macd < features.macd_signal:
         signals.append('bearish')
     else:
         signals.append('neutral')
     
     # RSI signal
-    if rsi.iloc[-1] < 30:
+    rsi = features.rsi
+    if rsi < 30:
         signals.append('bullish')
-    elif rsi.iloc[-1] > 70:
+    elif rsi > 70:
         signals.append('bearish')
     else:
         signals.append('neutral')
     
     # Bollinger Bands signal
-    current_price = prices_df['close'].iloc[-1]
-    if current_price < lower_band.iloc[-1]:
+    current_price = features.close
+    if current_price < features.bollinger_lower:
         signals.append('bullish')
-    elif current_price > upper_band.iloc[-1]:
+    elif current_price > features.bollinger_upper:
         signals.append('bearish')
     else:
         signals.append('neutral')
     
     # OBV signal
-    obv_slope = obv.diff().iloc[-5:].mean()
+    obv_slope = features.obv_slope
     if obv_slope > 0:
         signals.append('bullish')
     elif obv_slope < 0:
@@ -165,22 +198,22 @@ def quant_agent(state: AgentState):
     
     # Add reasoning
     reasoning = {
-        "MACD": {
-            "signal": signals[0],
-            "details": f"MACD Line crossed {'above' if signals[0] == 'bullish' else 'below' if signals[0] == 'bearish' else 'neither above nor below'} Signal Line"
-        },
-        "RSI": {
-            "signal": signals[1],
-            "details": f"RSI is {rsi.iloc[-1]:.2f} ({'oversold' if signals[1] == 'bullish' else 'overbought' if signals[1] == 'bearish' else 'neutral'})"
-        },
-        "Bollinger": {
-            "signal": signals[2],
-            "details": f"Price is {'below lower band' if signals[2] == 'bullish' else 'above upper band' if signals[2] == 'bearish' else 'within bands'}"
-        },
-        "OBV": {
-            "signal": signals[3],
-            "details": f"OBV slope is {obv_slope:.2f} ({signals[3]})"
-        }
+        "MACD": SignalReasoning(
+            signal=signals[0],
+            details=f"MACD Line crossed {'above' if signals[0] == 'bullish' else 'below' if signals[0] == 'bearish' else 'neither above nor below'} Signal Line"
+        ),
+        "RSI": SignalReasoning(
+            signal=signals[1],
+            details=f"RSI is {rsi:.2f} ({'oversold' if signals[1] == 'bullish' else 'overbought' if signals[1] == 'bearish' else 'neutral'})"
+        ),
+        "Bollinger": SignalReasoning(
+            signal=signals[2],
+            details=f"Price is {'below lower band' if signals[2] == 'bullish' else 'above upper band' if signals[2] == 'bearish' else 'within bands'}"
+        ),
+        "OBV": SignalReasoning(
+            signal=signals[3],
+            details=f"OBV slope is {obv_slope:.2f} ({signals[3]})"
+        )
     }
     
     # Overall signal
@@ -197,19 +230,14 @@ def quant_agent(state: AgentState):
     # Confidence level
     confidence = max(bullish_count, bearish_count) / len(signals)
     
-    message_content = {
-        "signal": overall_signal,
-        "confidence": round(confidence, 2),
-        "reasoning": reasoning
-    }
-
-    message = HumanMessage(
-        content=str(message_content),
-        name="quant_agent",
+    analysis = AnalystSignal(
+        signal=overall_signal,
+        confidence=round(confidence, 2),
+        reasoning=reasoning
     )
     
     return {
-        "messages": [message],
+        "analyses": {"quant_agent": analysis},
         "data": data,
     }
 
@@ -240,10 +268,10 @@ def fundamentals_agent(state: AgentState):
         profitability_score += 1
         
     signals.append('bullish' if profitability_score >= 2 else 'bearish' if profitability_score == 0 else 'neutral')
-    reasoning["Profitability"] = {
-        "signal": signals[0],
-        "details": f"ROE: {ratios.roe*100:.1f}%, Net Margin: {income.net_margin*100:.1f}%, Op Margin: {income.operating_margin*100:.1f}%"
-    }
+    reasoning["Profitability"] = SignalReasoning(
+        signal=signals[0],
+        details=f"ROE: {ratios.roe*100:.1f}%, Net Margin: {income.net_margin*100:.1f}%, Op Margin: {income.operating_margin*100:.1f}%"
+    )
     
     # 2. Valuation Analysis
     valuation_score = 0
@@ -255,10 +283,10 @@ def fundamentals_agent(state: AgentState):
         valuation_score += 1
         
     signals.append('bullish' if valuation_score >= 2 else 'bearish' if valuation_score == 0 else 'neutral')
-    reasoning["Valuation"] = {
-        "signal": signals[1],
-        "details": f"P/E: {market.p_e:.1f}, P/B: {market.p_b:.1f}, Div Yield: {market.dividend_yield*100:.1f}%"
-    }
+    reasoning["Valuation"] = SignalReasoning(
+        signal=signals[1],
+        details=f"P/E: {market.p_e:.1f}, P/B: {market.p_b:.1f}, Div Yield: {market.dividend_yield*100:.1f}%"
+    )
     
     # 3. Financial Health
     health_score = 0
@@ -269,10 +297,10 @@ def fundamentals_agent(state: AgentState):
         health_score += 1
         
     signals.append('bullish' if health_score >= 1 else 'bearish' if health_score == 0 else 'neutral')
-    reasoning["Financial_Health"] = {
-        "signal": signals[2],
-        "details": f"Current Ratio: {current_ratio:.2f}, D/E: {balance.total_liabilities/balance.total_equity:.2f}"
-    }
+    reasoning["Financial_Health"] = SignalReasoning(
+        signal=signals[2],
+        details=f"Current Ratio: {current_ratio:.2f}, D/E: {balance.total_liabilities/balance.total_equity:.2f}"
+    )
     
     # Overall signal
     bullish_count = signals.count('bullish')
@@ -288,18 +316,146 @@ def fundamentals_agent(state: AgentState):
     # Confidence level
     confidence = max(bullish_count, bearish_count) / len(signals)
     
-    message_content = {
-        "signal": overall_signal,
-        "confidence": round(confidence, 2),
-        "reasoning": reasoning
+    analysis = AnalystSignal(
+        signal=overall_signal,
+        confidence=round(confidence, 2),
+        reasoning=reasoning
+    )
+    
+    return {
+        "analyses": {"fundamentals_agent": analysis},
+        "data": data,
     }
 
-    message = HumanMessage(
-        content=str(message_content),
-        name="fundamentals_agent",
+
+##### Sentiment Agent #####
+CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+def parse_sentiment(content: str) -> AnalystSignal:
+    """Sentiment signal from the LLM's JSON reply; neutral, with the error as reasoning, if unreadable"""
+    fenced = CODE_FENCE.match(content)
+    try:
+        parsed = json.loads(fenced.group(1) if fenced else content)
+        return AnalystSignal(
+            signal=parsed["signal"],
+            confidence=parsed["confidence"],
+            reasoning={"News": SignalReasoning(signal=parsed["signal"], details=parsed["reasoning"])}
+        )
+    except (json.JSONDecodeError, ValidationError, KeyError, TypeError) as e:
+        return AnalystSignal(
+            signal="neutral",
+            confidence=0.0,
+            reasoning={"News": SignalReasoning(signal="neutral", details=f"Unreadable sentiment response: {e!r}")}
+        )
+
+def sentiment_agent(state: AgentState):
+    """Analyzes recent news headlines and generates a sentiment signal."""
+    data = state["data"]
+    ticker = data["ticker"]
+    end_date = data.get("end_date") or datetime.now().strftime('%Y-%m-%d')
+    llm = state["metadata"].get("llm") or get_default_llm()
+
+    news = get_news(f"{ticker} ações", end_date=end_date)
+    headlines = [result["title"] for result in news.get("results", []) if result.get("title")]
+
+    if headlines:
+        template = ChatPromptTemplate.from_messages([
+            ("system", """You are a financial news analyst.
+            Classify the overall sentiment of the headlines for the given ticker.
+            Respond in JSON format with these fields:
+            {{
+                "signal": "bullish" | "bearish" | "neutral",
+                "confidence": number between 0 and 1,
+                "reasoning": "one sentence"
+            }}"""),
+            ("human", "Ticker: {ticker}\nHeadlines:\n{headlines}")
+        ])
+        response = llm.invoke(
+            template.format_messages(
+                ticker=ticker,
+                headlines="\n".join(f"- {headline}" for headline in headlines)
+            ),
+            config={"callbacks": [llm_callback]}
+        )
+        analysis = parse_sentiment(response.content)
+    else:
+        analysis = AnalystSignal(
+            signal="neutral",
+            confidence=0.0,
+            reasoning={"News": SignalReasoning(signal="neutral", details=f"No news found for {ticker} up to {end_date}")}
+        )
+
+    return {
+        "analyses": {"sentiment_agent": analysis},
+        "data": data,
+    }
+
+ANALYST_AGENTS = ("quant_agent", "fundamentals_agent", "sentiment_agent")
+
+##### Risk Management Agent #####
+def risk_management_agent(state: AgentState):
+    """Sizes the maximum position allowed for the ticker."""
+    data = state["data"]
+    portfolio = data["portfolio"]
+    closes = data["quotes"]["close"]
+    current_price = float(closes.iloc[-1])
+    signals = [state["analyses"][name] for name in ANALYST_AGENTS if name in state["analyses"]]
+
+    portfolio_value = portfolio["cash"] + portfolio["stock"] * current_price
+    # Cap the weight at 20%, or lower where the position's own one-day VaR would pass 1%,
+    # and halve it when the analysts disagree
+    returns = closes.pct_change().dropna().to_numpy(dtype=float)
+    volatility = returns.std(ddof=1) if len(returns) > 1 else float("nan")
+    max_weight = float(max_position_weights(np.array([volatility]), RiskLimits())[0])
+    directions = {signal.signal for signal in signals} - {"neutral"}
+    if len(directions) > 1:
+        max_weight /= 2
+    max_position_size = portfolio_value * max_weight
+
+    assessment = RiskAssessment(
+        max_position_size=round(max_position_size, 2),
+        reasoning=(
+            f"Portfolio value: {portfolio_value:.2f}, daily volatility: {volatility:.2%}, max weight: {max_weight:.2%}, "
+            f"analyst directions: {sorted(directions) or ['neutral']}"
+        )
     )
-    
+
+    return {
+        "analyses": {"risk_management_agent": assessment},
+        "data": data,
+    }
+
+##### Portfolio Management Agent #####
+def portfolio_management_agent(state: AgentState):
+    """Turns analyst signals and risk limits into a trading decision."""
+    data = state["data"]
+    portfolio = data["portfolio"]
+    current_price = float(data["quotes"]["close"].iloc[-1])
+    signals = [state["analyses"][name] for name in ANALYST_AGENTS if name in state["analyses"]]
+    risk = state["analyses"]["risk_management_agent"]
+
+    # Confidence-weighted vote across analysts
+    direction = {"bullish": 1, "bearish": -1, "neutral": 0}
+    score = sum(direction[s.signal] * s.confidence for s in signals) / max(len(signals), 1)
+
+    action, quantity = "hold", 0
+    if score > 0:
+        room = risk.max_position_size - portfolio["stock"] * current_price
+        quantity = max(int(min(room, portfolio["cash"]) // current_price), 0)
+        action = "buy" if quantity > 0 else "hold"
+    elif score < 0 and portfolio["stock"] > 0:
+        action, quantity = "sell", int(portfolio["stock"])
+
+    decision = TradeDecision(
+        action=action,
+        ticker=data["ticker"],
+        quantity=quantity,
+        confidence=min(abs(score), 1.0),
+        reasoning=f"Weighted analyst score {score:.2f}; {risk.reasoning}",
+        timestamp=datetime.now()
+    )
+
     return {
-        "messages": [message],
+        "analyses": {"portfolio_management_agent": decision},
         "data": data,
     }
@@ -1,20 +1,128 @@
 from datetime import datetime, timedelta
+import inspect
 
-import matplotlib.pyplot as plt
 import pandas as pd
 
-from src.tools import get_price_data
-from src.agents import run_hedge_fund
+from src.tools import get_price_data, set_news_store
+from src.orchestrator import run_hedge_fund
+from src.decision_store import DecisionStore, decision_fingerprint
+from src.performance import performance_metrics
+from src.trading_calendar import b3_calendar
+from src.features import FeaturePipeline
+from src.data_providers.fundamentals_store import FundamentalsStore
+from src.data_providers.news_store import NewsStore
+
+PRELOADED_INPUTS = ("prices", "features", "financials")
+
+def accepted_inputs(agent):
+    """Preloaded inputs the agent takes as keywords; agents with the original (ticker, start_date, end_date, portfolio) signature take none"""
+    try:
+        parameters = inspect.signature(agent).parameters.values()
+    except (TypeError, ValueError):
+        return frozenset(PRELOADED_INPUTS)
+    if any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters):
+        return frozenset(PRELOADED_INPUTS)
+    return frozenset(parameter.name for parameter in parameters if parameter.name in PRELOADED_INPUTS)
 
 class Backtester:
-    def __init__(self, agent, ticker, start_date, end_date, initial_capital):
+    def __init__(self, agent, ticker, start_date, end_date, initial_capital, lookback_days=30,
+                 decision_store=None, recompute_changed=False, calendar=None,
+                 use_features=False, warmup_days=180, fundamentals_store=None, cvm_code=None):
         self.agent = agent
+        self.agent_inputs = accepted_inputs(agent)
         self.ticker = ticker
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
+        self.lookback_days = lookback_days
         self.portfolio = {"cash": initial_capital, "stock": 0}
         self.portfolio_values = []
+        # Executed trades, each with the portfolio value just before it
+        self.trades = []
+        self.price_data = None
+        self.decision_store = decision_store
+        self.recompute_changed = recompute_changed
+        self.agent_calls = 0
+        self.replayed = 0
+        self.performance_report = None
+        self.calendar = calendar or b3_calendar
+        self.use_features = use_features
+        self.warmup_days = warmup_days
+        self.feature_pipeline = None
+        self.fundamentals_store = fundamentals_store
+        self.cvm_code = cvm_code
+
+    def load_prices(self):
+        """Fetch the whole [start_date - lookback, end_date] history in a single request"""
+        history_days = max(self.lookback_days, self.warmup_days) if self.use_features else self.lookback_days
+        lookback_start = (pd.Timestamp(self.start_date) - timedelta(days=history_days)).strftime("%Y-%m-%d")
+        price_data = get_price_data(self.ticker, lookback_start, pd.Timestamp(self.end_date).strftime("%Y-%m-%d"))
+        if price_data.index.tz is not None:
+            price_data.index = price_data.index.tz_localize(None)
+        self.price_data = price_data
+        return self.price_data
+
+    def price_window(self, start, end):
+        """Positional slice of the preloaded prices for [start, end], without copying"""
+        index = self.price_data.index
+        lo = index.searchsorted(pd.Timestamp(start), side="left")
+        hi = index.searchsorted(pd.Timestamp(end), side="right")
+        return self.price_data.iloc[lo:hi]
+
+    def advance_features(self, current_date):
+        """Feed the pipeline every preloaded bar up to current_date; O(1) per bar"""
+        if self.feature_pipeline is None:
+            self.feature_pipeline = FeaturePipeline()
+            self._feature_bars = (
+                self.price_data['close'].to_numpy(dtype=float),
+                self.price_data['volume'].to_numpy(dtype=float)
+            )
+        closes, volumes = self._feature_bars
+        hi = self.price_data.index.searchsorted(current_date, side="right")
+        for i in range(self.feature_pipeline.bars, hi):
+            self.feature_pipeline.update(closes[i], volumes[i])
+        return self.feature_pipeline.snapshot()
+
+    def financials_as_of(self, current_date):
+        """Statements already published on current_date, from the point-in-time store"""
+        if self.cvm_code is None:
+            from src.agents import provider
+            self.cvm_code = provider.get_company_by_ticker(self.ticker).cvm_code
+        return self.fundamentals_store.financials_as_of(self.cvm_code, current_date)
+
+    def decide(self, start_date, end_date, window, features=None, financials=None):
+        """Agent output for one day, replayed from the decision store when possible.
+
+        By default any stored decision for the day is replayed, so only execution is recomputed.
+        With recompute_changed, days whose inputs (prices, portfolio) changed are re-run.
+        """
+        fingerprint = None
+        if self.decision_store is not None:
+            known_filings = self.fundamentals_store.fingerprint(self.cvm_code, end_date) if financials is not None else None
+            fingerprint = decision_fingerprint(
+                self.ticker, start_date, end_date, self.portfolio, window, known_filings, features
+            )
+            stored = self.decision_store.get(self.ticker, end_date)
+            if stored is not None and (not self.recompute_changed or stored[0] == fingerprint):
+                self.replayed += 1
+                return stored[1]
+
+        extra = {
+            name: value
+            for name, value in (("prices", window), ("features", features), ("financials", financials))
+            if value is not None and name in self.agent_inputs
+        }
+        agent_output = self.agent(
+            ticker=self.ticker,
+            start_date=start_date,
+            end_date=end_date,
+            portfolio=self.portfolio,
+            **extra
+        )
+        self.agent_calls += 1
+        if self.decision_store is not None:
+            self.decision_store.put(self.ticker, end_date, fingerprint, agent_output)
+        return agent_output
 
     def parse_action(self, agent_output):
         try:
@@ -52,29 +160,47 @@ class Backtester:
         return 0
 
     def run_backtest(self):
-        dates = pd.date_range(self.start_date, self.end_date, freq="B")
+        # B3 sessions only, so holidays cost neither an agent call nor a stale price
+        dates = self.calendar.sessions(self.start_date, self.end_date)
+        if self.price_data is None:
+            self.load_prices()
 
         print("\nStarting backtest...")
+        if self.decision_store is not None and self.decision_store.last_date(self.ticker):
+            print(f"Replaying cached decisions through {self.decision_store.last_date(self.ticker)}")
         print(f"{'Date':<12} {'Ticker':<6} {'Action':<6} {'Quantity':>8} {'Price':>8} {'Cash':>12} {'Stock':>8} {'Total Value':>12}")
         print("-" * 70)
 
         for current_date in dates:
-            lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
-            current_date_str = current_date.strftime("%Y-%m-%d")
-
-            agent_output = self.agent(
-                ticker=self.ticker,
-                start_date=lookback_start,
-                end_date=current_date_str,
-                portfolio=self.portfolio
+            lookback_start = current_date - timedelta(days=self.lookback_days)
+            window = self.price_window(lookback_start, current_date)
+            if window.empty:
+                continue
+
+            features = self.advance_features(current_date) if self.use_features else None
+            financials = self.financials_as_of(current_date) if self.fundamentals_store is not None else None
+            agent_output = self.decide(
+                lookback_start.strftime("%Y-%m-%d"),
+                current_date.strftime("%Y-%m-%d"),
+                window,
+                features,
+                financials
             )
 
             action, quantity = self.parse_action(agent_output)
-            df = get_price_data(self.ticker, lookback_start, current_date_str)
-            current_price = df.iloc[-1]['close']
+            current_price = window.iloc[-1]['close']
 
             # Execute the trade with validation
+            value_before = self.portfolio["cash"] + self.portfolio["stock"] * current_price
             executed_quantity = self.execute_trade(action, quantity, current_price)
+            if executed_quantity:
+                self.trades.append({
+                    "Date": current_date,
+                    "action": action,
+                    "quantity": executed_quantity,
+                    "price": current_price,
+                    "Portfolio Value": value_before,
+                })
 
             # Update total portfolio value
             total_value = self.portfolio["cash"] + self.portfolio["stock"] * current_price
@@ -91,39 +217,29 @@ class Backtester:
                 {"Date": current_date, "Portfolio Value": total_value}
             )
 
-    def analyze_performance(self):
-        # Convert portfolio values to DataFrame
-        performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
+    def analyze_performance(self, benchmark=None, plot=False, plot_path=None):
+        """Print headline metrics and return the per-day performance frame.
 
-        # Calculate total return
-        total_return = (
-                           self.portfolio["portfolio_value"] - self.initial_capital
-                       ) / self.initial_capital
-        print(f"Total Return: {total_return * 100:.2f}%")
-
-        # Plot the portfolio value over time
-        performance_df["Portfolio Value"].plot(
-            title="Portfolio Value Over Time", figsize=(12, 6)
+        Metrics come from src.performance; matplotlib is only loaded when plot or plot_path is set.
+        """
+        performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
+        report = performance_metrics(
+            performance_df["Portfolio Value"].to_numpy(),
+            benchmark=benchmark,
+            index=performance_df.index,
         )
-        plt.ylabel("Portfolio Value ($)")
-        plt.xlabel("Date")
-        plt.show()
+        self.performance_report = report
 
-        # Compute daily returns
-        performance_df["Daily Return"] = performance_df["Portfolio Value"].pct_change()
+        print(f"Total Return: {(self.portfolio['portfolio_value'] - self.initial_capital) / self.initial_capital * 100:.2f}%")
+        print(f"Sharpe Ratio: {report.metrics['sharpe']:.2f}")
+        print(f"Sortino Ratio: {report.metrics['sortino']:.2f}")
+        print(f"Maximum Drawdown: {report.metrics['max_drawdown'] * 100:.2f}%")
 
-        # Calculate Sharpe Ratio (assuming 252 trading days in a year)
-        mean_daily_return = performance_df["Daily Return"].mean()
-        std_daily_return = performance_df["Daily Return"].std()
-        sharpe_ratio = (mean_daily_return / std_daily_return) * (252 ** 0.5)
-        print(f"Sharpe Ratio: {sharpe_ratio:.2f}")
-
-        # Calculate Maximum Drawdown
-        rolling_max = performance_df["Portfolio Value"].cummax()
-        drawdown = performance_df["Portfolio Value"] / rolling_max - 1
-        max_drawdown = drawdown.min()
-        print(f"Maximum Drawdown: {max_drawdown * 100:.2f}%")
+        if plot or plot_path:
+            report.plot(plot_path, show=plot)
 
+        performance_df["Daily Return"] = report.series["returns"].to_numpy()
+        performance_df["Drawdown"] = report.series["drawdown"].to_numpy()
         return performance_df
     
 ### 4. Run the Backtest #####
@@ -136,9 +252,22 @@ if __name__ == "__main__":
     parser.add_argument('--end_date', type=str, default=datetime.now().strftime('%Y-%m-%d'), help='End date in YYYY-MM-DD format')
     parser.add_argument('--start_date', type=str, default=(datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d'), help='Start date in YYYY-MM-DD format')
     parser.add_argument('--initial_capital', type=float, default=100000, help='Initial capital amount (default: 100000)')
+    parser.add_argument('--decision_cache', type=str, help='SQLite file that records each day\'s decision; re-runs replay it and resume after the last completed day')
+    parser.add_argument('--recompute_changed', action='store_true', help='Only replay cached decisions whose inputs are unchanged')
+    parser.add_argument('--plot', action='store_true', help='Show the equity, drawdown and volatility charts')
+    parser.add_argument('--plot_path', type=str, help='Save the charts to this image file instead of showing them')
+    parser.add_argument('--report_json', type=str, help='Write the performance metrics and series to this JSON file')
+    parser.add_argument('--features', action='store_true', help='Hand the agents indicators kept up to date bar by bar over a warmed-up history')
+    parser.add_argument('--fundamentals_cache', type=str, help='Directory of point-in-time statements; agents only see filings published by each day')
+    parser.add_argument('--news_cache', type=str, help='Directory of stored news searches; each query is searched once and filtered by date locally')
+    parser.add_argument('--bootstrap_paths', type=int, default=0, help='Block-bootstrap this many equity paths and print 95%% confidence intervals')
 
     args = parser.parse_args()
 
+    decision_store = DecisionStore(args.decision_cache, run_id="run_hedge_fund") if args.decision_cache else None
+    if args.news_cache:
+        set_news_store(NewsStore(args.news_cache))
+
     # Create an instance of Backtester
     backtester = Backtester(
         agent=run_hedge_fund,
@@ -146,8 +275,21 @@ if __name__ == "__main__":
         start_date=args.start_date,
         end_date=args.end_date,
         initial_capital=args.initial_capital,
+        decision_store=decision_store,
+        recompute_changed=args.recompute_changed,
+        use_features=args.features,
+        fundamentals_store=FundamentalsStore(args.fundamentals_cache) if args.fundamentals_cache else None,
     )
 
     # Run the backtesting process
     backtester.run_backtest()
-    performance_df = backtester.analyze_performance()
+    performance_df = backtester.analyze_performance(plot=args.plot, plot_path=args.plot_path)
+    if args.report_json:
+        backtester.performance_report.to_json(args.report_json)
+    if args.bootstrap_paths:
+        from src.robustness import analyze_backtest
+        robustness = analyze_backtest(backtester.portfolio_values, n_paths=args.bootstrap_paths)
+        print(f"\nBootstrap ({robustness.n_paths} paths), 95% confidence intervals:")
+        for name, (low, high) in robustness.confidence_intervals().items():
+            print(f"{name:<14} observed {robustness.observed[name]:>8.4f}   [{low:.4f}, {high:.4f}]")
+        print(f"Probability of loss: {robustness.probability_of_loss() * 100:.1f}%")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Offline benchmark of AgentOrchestrator overhead, concurrency scaling and cache effectiveness.
+
+Runs entirely against FakeMarketDataAPI and FakeChatModel, so no network or API keys are needed:
+
+    python -m src.benchmarks.bench_orchestrator --requests 32 --llm-latency-ms 50
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from src import agents
+from src.agent_orchestrator import AgentOrchestrator
+from src.data_providers.market_data_provider import MarketDataProvider
+from src.fake_llm import FakeChatModel, constant_latency, lognormal_latency
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.instrumentation import recorder
+from src.tools import new_tools
+
+TICKERS = ["PETR4", "VALE3", "ITUB4", "BBDC4", "ABEV3", "WEGE3", "BBAS3", "RENT3"]
+START_DATE, END_DATE = "2024-01-01", "2024-06-28"
+
+def prompt_for(ticker: str) -> str:
+    return f"Give me a technical analysis of {ticker}"
+
+def bench_cache(orchestrator: AgentOrchestrator, api: FakeMarketDataAPI) -> Dict[str, Any]:
+    """Cold versus warm latency for the same ticker, and upstream calls saved"""
+    before = sum(api.requests.values())
+    start = time.perf_counter()
+    orchestrator.process_prompt(prompt_for("PETR4"), START_DATE, END_DATE)
+    cold = time.perf_counter() - start
+    cold_requests = sum(api.requests.values()) - before
+
+    start = time.perf_counter()
+    orchestrator.process_prompt(prompt_for("PETR4"), START_DATE, END_DATE)
+    warm = time.perf_counter() - start
+    warm_requests = sum(api.requests.values()) - before - cold_requests
+
+    return {"cold_ms": 1000 * cold, "warm_ms": 1000 * warm, "cold_requests": cold_requests, "warm_requests": warm_requests}
+
+def bench_overhead(orchestrator: AgentOrchestrator, iterations: int) -> Dict[str, Any]:
+    """Per-call time spent outside the LLM with warm caches"""
+    orchestrator.process_prompt(prompt_for("VALE3"), START_DATE, END_DATE)
+    recorder.clear()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        orchestrator.process_prompt(prompt_for("VALE3"), START_DATE, END_DATE)
+    total = time.perf_counter() - start
+    llm = sum(span["duration"] for span in recorder.spans if span["category"] == "llm")
+    return {"per_call_ms": 1000 * total / iterations, "overhead_ms": 1000 * (total - llm) / iterations}
+
+def bench_concurrency(orchestrator: AgentOrchestrator, requests: int, workers: List[int]) -> List[Dict[str, Any]]:
+    """Throughput of warm requests across thread pool sizes"""
+    prompts = [prompt_for(TICKERS[i % len(TICKERS)]) for i in range(requests)]
+    for ticker in TICKERS:
+        orchestrator.process_prompt(prompt_for(ticker), START_DATE, END_DATE)
+
+    rows = []
+    for n in workers:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            list(pool.map(lambda p: orchestrator.process_prompt(p, START_DATE, END_DATE), prompts))
+        elapsed = time.perf_counter() - start
+        rows.append({"workers": n, "seconds": elapsed, "throughput": requests / elapsed})
+    for row in rows:
+        row["speedup"] = row["throughput"] / rows[0]["throughput"]
+    return rows
+
+def run(requests: int, llm_latency_ms: float, api_latency_ms: float, workers: List[int], iterations: int) -> Dict[str, Any]:
+    original_url, original_provider = new_tools.base_url, agents.provider
+    with FakeMarketDataAPI(tickers=TICKERS, latency=api_latency_ms / 1000) as api:
+        new_tools.base_url = api.url
+        agents.provider = MarketDataProvider()
+        try:
+            fast = AgentOrchestrator(show_reasoning=False, llm=FakeChatModel(latency=constant_latency(0.0)))
+            slow = AgentOrchestrator(
+                show_reasoning=False,
+                llm=FakeChatModel(latency=lognormal_latency(llm_latency_ms / 1000), seed=42)
+            )
+            return {
+                "cache": bench_cache(fast, api),
+                "overhead": bench_overhead(fast, iterations),
+                "concurrency": bench_concurrency(slow, requests, workers),
+            }
+        finally:
+            new_tools.base_url, agents.provider = original_url, original_provider
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline orchestrator benchmark')
+    parser.add_argument('--requests', type=int, default=32, help='Requests per concurrency level (default: 32)')
+    parser.add_argument('--llm-latency-ms', type=float, default=50, help='Median fake LLM latency (default: 50)')
+    parser.add_argument('--api-latency-ms', type=float, default=20, help='Fake market data API latency (default: 20)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Thread pool sizes')
+    parser.add_argument('--iterations', type=int, default=20, help='Warm calls for the overhead measurement')
+    args = parser.parse_args()
+
+    results = run(args.requests, args.llm_latency_ms, args.api_latency_ms, args.workers, args.iterations)
+
+    cache = results["cache"]
+    print("\nCache effectiveness")
+    print(f"Cold call: {cache['cold_ms']:.1f} ms ({cache['cold_requests']} upstream requests)")
+    print(f"Warm call: {cache['warm_ms']:.1f} ms ({cache['warm_requests']} upstream requests)")
+
+    overhead = results["overhead"]
+    print("\nOrchestrator overhead (warm, zero-latency LLM)")
+    print(f"Per call: {overhead['per_call_ms']:.2f} ms, outside LLM: {overhead['overhead_ms']:.2f} ms")
+
+    print("\nConcurrency scaling")
+    print(f"{'Workers':>8} {'Seconds':>10} {'Req/s':>10} {'Speedup':>8}")
+    for row in results["concurrency"]:
+        print(f"{row['workers']:>8} {row['seconds']:>10.2f} {row['throughput']:>10.1f} {row['speedup']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for data decoding, indicators, agents, caches and backtests.
+
+Every case runs on synthetic data (or recorded API payloads with --recorded) and is timed at
+several sizes, giving scaling curves over bar and ticker counts. Results can be stored as a
+baseline and later checked against it:
+
+    python -m src.benchmarks.bench_suite --save-baseline
+    python -m src.benchmarks.bench_suite --check --threshold 0.3
+"""
+import argparse
+import contextlib
+import fnmatch
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src import agents, tools
+from src.backtester import Backtester
+from src.data_providers.market_data_provider import MarketDataProvider
+from src.correlation import CorrelationService, RollingCorrelation
+from src.data_providers.bar_store import resample_many
+from src.data_providers.quote_store import QuoteStore
+from src.features import FeaturePipeline
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.portfolio_backtester import PortfolioBacktester
+from src.portfolio_construction import PortfolioConstructor
+from src.risk import RollingRisk, assess
+from src.schemas.market_data_schema import BalanceSheet, FinancialRatios, IncomeStatement, MarketRatios
+from src.tools import new_tools
+from src.vectorized_backtester import orders_from_signals, quant_signals, run_vectorized_backtest
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+@dataclass
+class Case:
+    name: str
+    sizes: Sequence[int]
+    quick_sizes: Sequence[int]
+    # size -> zero-argument callable to time; setup work happens outside the timed call
+    setup: Callable[[int], Callable[[], Any]]
+
+CASES: List[Case] = []
+
+def case(name: str, sizes: Sequence[int], quick_sizes: Optional[Sequence[int]] = None):
+    def register(setup):
+        CASES.append(Case(name, sizes, quick_sizes or sizes[:1], setup))
+        return setup
+    return register
+
+def time_call(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.05) -> Dict[str, float]:
+    """Seconds per call: best and median of `repeat` rounds, each at least `min_time` long"""
+    fn()
+    number, elapsed = 1, 0.0
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return {"best": min(rounds), "median": statistics.median(rounds), "number": number}
+
+##### Synthetic data #####
+
+def synthetic_prices(bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, bars)))
+    return pd.DataFrame(
+        {"open": close, "close": close, "high": close * 1.01, "low": close * 0.99,
+         "volume": rng.integers(100_000, 5_000_000, bars)},
+        index=pd.bdate_range("2000-01-03", periods=bars, name="Date"),
+    )
+
+def synthetic_quote_payload(bars: int) -> List[Dict[str, Any]]:
+    """Quotes in the DadosDeMercado response shape"""
+    api = FakeMarketDataAPI()
+    end = pd.bdate_range("2015-01-01", periods=bars)[-1].strftime("%Y-%m-%d")
+    return api.quotes("PETR4", "2015-01-01", end)
+
+def synthetic_price_payload(bars: int) -> List[Dict[str, Any]]:
+    """Prices in the financialdatasets response shape consumed by prices_to_df"""
+    prices = synthetic_prices(bars)
+    return [
+        {"time": date.strftime("%Y-%m-%dT00:00:00Z"), "open": row.open, "close": row.close,
+         "high": row.high, "low": row.low, "volume": int(row.volume)}
+        for date, row in prices.iterrows()
+    ]
+
+def synthetic_financials() -> Dict[str, Any]:
+    metric = lambda value: {"value": value, "currency": "BRL"}
+    return {
+        "ratios": FinancialRatios(period="2023-12-31", statement_type="con", period_type="year", roe=0.18, net_margin=0.12),
+        "market_ratios": MarketRatios(date="2024-06-28", p_e=8.5, p_b=1.4, dividend_yield=0.07),
+        "income": IncomeStatement(
+            period="2023-12-31", statement_type="con", period_type="year",
+            revenue=metric(500.0), gross_profit=metric(250.0), operating_income=metric(120.0),
+            net_income=metric(90.0), ebit=metric(130.0), ebitda=metric(170.0),
+        ),
+        "balance": BalanceSheet(
+            period="2023-12-31", statement_type="con",
+            assets={"current": metric(400.0), "non_current": metric(600.0)},
+            liabilities={"current": metric(200.0), "non_current": metric(250.0)},
+            equity={"total": metric(550.0)},
+        ),
+    }
+
+RECORDED_QUOTES: Dict[int, List[Dict[str, Any]]] = {}
+
+def load_recorded(directory: str) -> None:
+    """Use recorded /tickers/{ticker}/quotes JSON responses for the decode cases"""
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path) as f:
+            payload = json.load(f)
+        RECORDED_QUOTES[len(payload)] = payload
+
+def quote_payload(bars: int) -> List[Dict[str, Any]]:
+    return RECORDED_QUOTES.get(bars) or synthetic_quote_payload(bars)
+
+##### Cases #####
+
+BARS = (250, 1000, 4000)
+TICKERS = (10, 50, 200)
+
+@case("decode.quotes_to_df", BARS)
+def bench_quotes_to_df(bars):
+    payload = quote_payload(bars)
+    return lambda: new_tools.quotes_to_df(payload)
+
+@case("decode.prices_to_df", BARS)
+def bench_prices_to_df(bars):
+    payload = synthetic_price_payload(bars)
+    return lambda: tools.prices_to_df(payload)
+
+for module_name, module in (("agents", agents), ("tools", tools)):
+    for indicator in ("calculate_macd", "calculate_rsi", "calculate_bollinger_bands", "calculate_obv"):
+        def bench_indicator(bars, func=getattr(module, indicator)):
+            prices = synthetic_prices(bars)
+            # tools.calculate_obv writes an OBV column into its input, so time it on a copy
+            return lambda: func(prices.copy())
+        sizes = (250, 1000) if (module_name, indicator) == ("tools", "calculate_obv") else BARS
+        case(f"indicators.{module_name}.{indicator}", sizes)(bench_indicator)
+
+@case("indicators.feature_pipeline_warm_up", BARS)
+def bench_feature_pipeline(bars):
+    prices = synthetic_prices(bars)
+    return lambda: FeaturePipeline().warm_up(prices).snapshot()
+
+@case("agents.quant_agent", BARS)
+def bench_quant_agent(bars):
+    state = {"messages": [], "data": {"quotes": synthetic_prices(bars)}, "metadata": {"show_reasoning": False}}
+    return lambda: agents.quant_agent(state)
+
+@case("agents.fundamentals_agent", (1,))
+def bench_fundamentals_agent(_):
+    state = {"messages": [], "data": {"financials": synthetic_financials()}, "metadata": {"show_reasoning": False}}
+    return lambda: agents.fundamentals_agent(state)
+
+# The provider cases talk to a local FakeMarketDataAPI that run() starts for the whole suite
+
+@case("provider.get_quotes_df_warm", (1,))
+def bench_provider_warm(_):
+    provider = MarketDataProvider()
+    provider.get_quotes_df("PETR4", "2023-01-01", "2024-06-28")
+    return lambda: provider.get_quotes_df("PETR4", "2023-07-01", "2024-03-28")
+
+@case("provider.get_quotes_df_cold", (1,))
+def bench_provider_cold(_):
+    # A fresh store per call, so every call fetches and decodes a full HTTP response
+    return lambda: MarketDataProvider(quote_store=QuoteStore()).get_quotes_df("PETR4", "2023-01-01", "2024-06-28")
+
+@case("provider.get_statements_warm", (1,))
+def bench_provider_statements(_):
+    provider = MarketDataProvider()
+    provider.get_statements("12345")
+    return lambda: provider.get_statements("12345")
+
+@case("backtest.run_backtest", (60, 250), (60,))
+def bench_run_backtest(days):
+    prices = synthetic_prices(days + 60)
+    def agent(ticker, start_date, end_date, portfolio, prices):
+        return '{"action": "buy", "quantity": 1}'
+    dates = prices.index[60:]
+
+    def run():
+        bt = Backtester(agent, "PETR4", dates[0], dates[-1], 1e6)
+        bt.price_data = prices
+        with contextlib.redirect_stdout(io.StringIO()):
+            bt.run_backtest()
+    return run
+
+@case("backtest.vectorized_quant", BARS)
+def bench_vectorized(bars):
+    prices = synthetic_prices(bars)
+    return lambda: run_vectorized_backtest(prices["close"], orders_from_signals(quant_signals(prices), 100), 1e6)
+
+@case("backtest.vectorized_all_in", BARS)
+def bench_vectorized_all_in(bars):
+    prices = synthetic_prices(bars)
+    orders = orders_from_signals(quant_signals(prices))
+    return lambda: run_vectorized_backtest(prices["close"], orders, 1e6)
+
+@case("backtest.portfolio_tickers", TICKERS)
+def bench_portfolio(tickers):
+    rng = np.random.default_rng(0)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, (1000, tickers)), axis=0))
+    prices = pd.DataFrame(close, index=pd.bdate_range("2020-01-01", periods=1000), columns=[f"T{i:03d}3" for i in range(tickers)])
+    weights = np.full(close.shape, 0.9 / tickers)
+    backtester = PortfolioBacktester(prices, 1e8)
+    return lambda: backtester.run(target_weights=weights)
+
+@case("bars.resample_weekly", TICKERS)
+def bench_resample_weekly(tickers):
+    prices = synthetic_prices(1000)
+    frames = {f"T{i:03d}3": prices for i in range(tickers)}
+    return lambda: resample_many(frames, "W")
+
+ASSETS = (50, 300)
+
+@case("risk.rolling_update", ASSETS)
+def bench_risk_update(assets):
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.02, (300, assets))
+    rolling = RollingRisk(assets).warm_up(returns[:252])
+    rows = iter(np.tile(returns[252:], (1000, 1)))
+    return lambda: rolling.update(next(rows))
+
+@case("risk.assess", ASSETS)
+def bench_risk_assess(assets):
+    rng = np.random.default_rng(0)
+    rolling = RollingRisk(assets + 1).warm_up(rng.normal(0, 0.02, (252, assets + 1)))
+    weights = np.full(assets, 1 / assets)
+    tickers = [f"T{i:03d}3" for i in range(assets)]
+    def run():
+        cov, _ = rolling.covariance(np.arange(assets))
+        return assess(weights, cov, tickers, rolling.returns()[:, :-1])
+    return run
+
+def construction_case(scheme, assets):
+    rng = np.random.default_rng(0)
+    cov, _ = RollingRisk(assets).warm_up(rng.normal(0, 0.02, (252, assets))).covariance()
+    # Daily rebalances: scores drift a little between calls, so the solver warm-starts
+    path = np.clip(rng.uniform(-1, 1, assets) + rng.normal(0, 0.05, (250, assets)).cumsum(axis=0), -1, 1)
+    scores = iter(np.concatenate([path, path[::-1]] * 100))
+    constructor = PortfolioConstructor(scheme)
+    return lambda: constructor.target_weights(next(scores), cov)
+
+@case("construction.risk_parity", ASSETS)
+def bench_risk_parity(assets):
+    return construction_case("risk_parity", assets)
+
+@case("construction.mean_variance", ASSETS)
+def bench_mean_variance(assets):
+    return construction_case("mean_variance", assets)
+
+@case("correlation.rolling_update", ASSETS)
+def bench_correlation_update(assets):
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.02, (300, assets))
+    rolling = RollingCorrelation(assets).warm_up(returns[:252])
+    rows = iter(np.tile(returns[252:], (1000, 1)))
+    return lambda: rolling.update(next(rows))
+
+@case("correlation.most_correlated", ASSETS)
+def bench_most_correlated(assets):
+    rng = np.random.default_rng(0)
+    tickers = [f"T{i:03d}3" for i in range(assets)]
+    service = CorrelationService(tickers)
+    service.rolling.warm_up(rng.normal(0, 0.02, (252, assets)))
+    return lambda: service.most_correlated(tickers[0], k=10)
+
+##### Runner #####
+
+def run(pattern: str = "*", quick: bool = False, repeat: int = 5, min_time: float = 0.05) -> Dict[str, Dict[str, float]]:
+    """Time every matching case at each size; keys are '<case>[<size>]'"""
+    results = {}
+    original_url = new_tools.base_url
+    with FakeMarketDataAPI() as api:
+        new_tools.base_url = api.url
+        try:
+            for bench in CASES:
+                if not fnmatch.fnmatch(bench.name, pattern):
+                    continue
+                for size in (bench.quick_sizes if quick else bench.sizes):
+                    results[f"{bench.name}[{size}]"] = time_call(bench.setup(size), repeat, min_time)
+        finally:
+            new_tools.base_url = original_url
+    return results
+
+def check_regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float
+) -> List[str]:
+    """Cases whose best time exceeds the baseline by more than `threshold` (0.3 = 30% slower)"""
+    return [
+        key for key, timing in results.items()
+        if key in baseline and timing["best"] > baseline[key]["best"] * (1 + threshold)
+    ]
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["results"]
+
+def save_baseline(results: Dict[str, Dict[str, float]], path: str = BASELINE_PATH) -> None:
+    stored = load_baseline(path)
+    stored.update(results)
+    with open(path, "w") as f:
+        json.dump({"python": sys.version.split()[0], "numpy": np.__version__, "pandas": pd.__version__,
+                   "results": dict(sorted(stored.items()))}, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark suite with baselines')
+    parser.add_argument('--filter', type=str, default='*', help='Glob over case names, e.g. "indicators.*"')
+    parser.add_argument('--quick', action='store_true', help='Only the smallest size of each case')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing rounds per case (default: 5)')
+    parser.add_argument('--recorded', type=str, help='Directory of recorded quote responses (*.json) for the decode cases')
+    parser.add_argument('--baseline', type=str, default=BASELINE_PATH, help='Baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 if any case regressed past the threshold')
+    parser.add_argument('--threshold', type=float, default=0.3, help='Allowed slowdown versus baseline (default: 0.3)')
+    parser.add_argument('--json', type=str, help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.recorded:
+        load_recorded(args.recorded)
+    results = run(args.filter, args.quick, args.repeat)
+    baseline = load_baseline(args.baseline)
+
+    print(f"{'Case':<52} {'Best':>12} {'Median':>12} {'vs baseline':>12}")
+    for key, timing in results.items():
+        ratio = f"{timing['best'] / baseline[key]['best']:.2f}x" if key in baseline else "-"
+        print(f"{key:<52} {timing['best'] * 1000:>10.3f}ms {timing['median'] * 1000:>10.3f}ms {ratio:>12}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+    if args.check:
+        regressions = check_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for key in regressions:
+                print(f"  {key}: {results[key]['best'] / baseline[key]['best']:.2f}x baseline")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
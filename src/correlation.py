@@ -0,0 +1,215 @@
+"""Pairwise return correlations across the universe, maintained incrementally from the quote store.
+
+RollingCorrelation keeps, per pair of assets, the (optionally exponentially weighted) sums
+over the days both traded: the weight, each asset's sum and sum of squares, and the
+cross-product. A new bar then costs O(N^2) instead of the O(T * N^2) of recomputing
+np.corrcoef, missing days are handled pairwise like DataFrame.corr, and one ticker's
+correlations with everything else are read off in O(N).
+"""
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_providers.quote_store import QuoteStore
+from src.windowed_sums import WindowedSums
+
+class RollingCorrelation(WindowedSums):
+    """Pairwise-complete correlation of the last `window` return rows, or EWMA with `halflife`.
+
+    With a halflife the sums decay by 0.5 ** (1 / halflife) per row, weighting each row like
+    pandas' ewm(adjust=True), and no rows are buffered; otherwise the window is kept as in
+    src.windowed_sums, which also compares this NaN policy with RollingRisk's.
+    """
+
+    def __init__(self, n_assets: int, window: int = 252, halflife: Optional[float] = None):
+        self.halflife = halflife
+        self.decay = 0.5 ** (1 / halflife) if halflife else None
+        super().__init__(n_assets, window, buffered=not halflife)
+
+    def _reset_sums(self, n: int) -> None:
+        # [i, j] entries cover only the rows where both i and j have a return; the weights
+        # are the decayed pair counts and only kept with a halflife
+        self._weight = np.zeros((n, n))
+        self._pairs = np.zeros((n, n))
+        self._sum = np.zeros((n, n))
+        self._squares = np.zeros((n, n))
+        self._cross = np.zeros((n, n))
+
+    def _add(self, row: np.ndarray, sign: float) -> None:
+        present = ~np.isnan(row)
+        x = np.where(present, row, 0.0)
+        mask = present.astype(float)
+        self._pairs += sign * np.outer(mask, mask)
+        self._sum += sign * np.outer(x, mask)
+        self._squares += sign * np.outer(x * x, mask)
+        self._cross += sign * np.outer(x, x)
+
+    def _add_rows(self, rows: np.ndarray) -> None:
+        present = ~np.isnan(rows)
+        x = np.where(present, rows, 0.0)
+        mask = present.astype(float)
+        self._pairs += mask.T @ mask
+        self._sum += x.T @ mask
+        self._squares += (x * x).T @ mask
+        self._cross += x.T @ x
+
+    def update(self, returns: np.ndarray) -> None:
+        """Add one row of returns; NaN marks an asset without a return that day"""
+        if self.decay is None:
+            super().update(returns)
+            return
+        self._count += 1
+        for sums in (self._weight, self._sum, self._squares, self._cross):
+            sums *= self.decay
+        pairs_before = self._pairs.copy()
+        self._add(np.asarray(returns, dtype=float), 1.0)
+        # Pair weights follow the pair counts' increments, decayed like the other sums
+        self._weight += self._pairs - pairs_before
+
+    def warm_up(self, returns: np.ndarray) -> "RollingCorrelation":
+        if self.decay is None:
+            return super().warm_up(returns)
+        for row in np.asarray(returns, dtype=float):
+            self.update(row)
+        return self
+
+    def _weights(self) -> np.ndarray:
+        return self._pairs if self.decay is None else self._weight
+
+    def pair_counts(self) -> np.ndarray:
+        """Rows in the window where both assets have a return (every row seen, for EWMA)"""
+        return self._pairs
+
+    def covariance(self) -> np.ndarray:
+        """Pairwise (weighted, 1/n) covariance"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = self._weights()
+            mean = self._sum / weight
+            return self._cross / weight - mean * mean.T
+
+    def correlation(self, rows: Optional[np.ndarray] = None, min_periods: int = 2) -> np.ndarray:
+        """Correlation of the `rows` assets (default: all) with every asset, NaN below min_periods"""
+        index = np.arange(len(self._sum)) if rows is None else np.atleast_1d(rows)
+        weight, total, squares, cross = (m[index] for m in (self._weights(), self._sum, self._squares, self._cross))
+        total_t, squares_t = self._sum[:, index].T, self._squares[:, index].T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            numerator = weight * cross - total * total_t
+            variance = (weight * squares - total * total) * (weight * squares_t - total_t * total_t)
+            corr = numerator / np.sqrt(variance)
+        valid = (self._pairs[index] >= min_periods) & (variance > 0)
+        return np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+
+class CorrelationService:
+    """Rolling or EWMA correlations of a ticker universe, fed from the quote store and persisted.
+
+    `refresh` only feeds the days after the last one seen, so a daily refresh costs one
+    O(N^2) update, and `save`/`load` keep that state across runs.
+    """
+
+    def __init__(
+        self,
+        tickers: Iterable[str],
+        window: int = 252,
+        halflife: Optional[float] = None,
+        min_periods: int = 60,
+    ):
+        self.tickers = list(tickers)
+        self.min_periods = min_periods
+        self.rolling = RollingCorrelation(len(self.tickers), window, halflife)
+        self.last_date: Optional[pd.Timestamp] = None
+        self._last_close = np.full(len(self.tickers), np.nan)
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def update(self, date, closes: np.ndarray) -> None:
+        """Advance one bar given every ticker's close (NaN where it did not trade)"""
+        closes = np.asarray(closes, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = closes / self._last_close - 1
+        if self.last_date is not None:
+            self.rolling.update(returns)
+        self._last_close = np.where(np.isnan(closes), self._last_close, closes)
+        self.last_date = pd.Timestamp(date)
+
+    def warm_up(self, prices: pd.DataFrame) -> "CorrelationService":
+        """Feed a (dates, tickers) close panel, skipping dates already seen"""
+        prices = prices.reindex(columns=self.tickers)
+        if self.last_date is not None:
+            prices = prices[prices.index > self.last_date]
+        for date, row in zip(prices.index, prices.to_numpy(dtype=float)):
+            self.update(date, row)
+        return self
+
+    def refresh(self, quote_store: QuoteStore, end_date: str, start_date: Optional[str] = None) -> "CorrelationService":
+        """Feed the store's closes from the day after the last one seen (or start_date) to end_date"""
+        if self.last_date is not None:
+            start_date = (self.last_date + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        if start_date is not None and pd.Timestamp(start_date) > pd.Timestamp(end_date):
+            return self
+        return self.warm_up(quote_store.panel(self.tickers, start_date, end_date))
+
+    def correlation(self) -> pd.DataFrame:
+        return pd.DataFrame(self.rolling.correlation(min_periods=self.min_periods), index=self.tickers, columns=self.tickers)
+
+    def covariance(self) -> pd.DataFrame:
+        return pd.DataFrame(self.rolling.covariance(), index=self.tickers, columns=self.tickers)
+
+    def _ranked(self, ticker: str, k: int, largest: bool) -> pd.Series:
+        i = self._index[ticker]
+        row = self.rolling.correlation(i, self.min_periods)[0]
+        row[i] = np.nan
+        candidates = np.flatnonzero(~np.isnan(row))
+        values = row[candidates] if largest else -row[candidates]
+        if len(candidates) > k:
+            keep = np.argpartition(-values, k - 1)[:k]
+            candidates, values = candidates[keep], values[keep]
+        order = candidates[np.argsort(-values, kind="stable")]
+        return pd.Series(row[order], index=[self.tickers[j] for j in order], name=ticker)
+
+    def most_correlated(self, ticker: str, k: int = 10) -> pd.Series:
+        """The k tickers most correlated with `ticker`, highest first"""
+        return self._ranked(ticker, k, largest=True)
+
+    def least_correlated(self, ticker: str, k: int = 10) -> pd.Series:
+        """The k tickers least correlated with `ticker`, lowest first"""
+        return self._ranked(ticker, k, largest=False)
+
+    def top_pairs(self, k: int = 20, largest: bool = True) -> pd.DataFrame:
+        """The k most (or least) correlated distinct pairs across the universe"""
+        corr = self.rolling.correlation(min_periods=self.min_periods)
+        first, second = np.triu_indices(len(corr), k=1)
+        values = corr[first, second]
+        valid = np.flatnonzero(~np.isnan(values))
+        ranked = values[valid] if largest else -values[valid]
+        if len(valid) > k:
+            keep = np.argpartition(-ranked, k - 1)[:k]
+            valid, ranked = valid[keep], ranked[keep]
+        valid = valid[np.argsort(-ranked, kind="stable")]
+        return pd.DataFrame({
+            "ticker": [self.tickers[i] for i in first[valid]],
+            "other": [self.tickers[j] for j in second[valid]],
+            "correlation": values[valid],
+            "observations": self.rolling.pair_counts()[first[valid], second[valid]].astype(int),
+        })
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        pd.to_pickle(self, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CorrelationService":
+        return pd.read_pickle(path)
+
+    @classmethod
+    def load_or_create(cls, path: str, tickers: Iterable[str], **kwargs) -> "CorrelationService":
+        """The service saved at `path` if it has the same tickers and window, else a fresh one"""
+        fresh = cls(tickers, **kwargs)
+        if os.path.exists(path):
+            service = cls.load(path)
+            settings = lambda s: (s.tickers, s.rolling.window, s.rolling.halflife, s.min_periods)
+            if settings(service) == settings(fresh):
+                return service
+        return fresh
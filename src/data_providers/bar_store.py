@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_providers.quote_store import QuoteStore
+from src.utils import get_default_period_end, get_default_period_init
+
+# How each quote column combines into a bar; `min`/`max` are the API's low/high
+AGGREGATIONS = {
+    'open': 'first',
+    'close': 'last',
+    'adj_close': 'last',
+    'min': 'min',
+    'max': 'max',
+    'volume': 'sum',
+}
+FREQUENCY_ALIASES = {'W': 'weekly', 'M': 'monthly'}
+
+def parse_frequency(frequency: str) -> Tuple[str, int]:
+    """('weekly', 0), ('monthly', 0) or ('sessions', n) for 'W'/'weekly', 'M'/'monthly' and 'nD'"""
+    name = FREQUENCY_ALIASES.get(frequency, frequency)
+    if name in ('weekly', 'monthly'):
+        return name, 0
+    if name.upper().endswith('D') and name[:-1].isdigit() and int(name[:-1]) > 0:
+        return 'sessions', int(name[:-1])
+    raise ValueError(f"Unknown bar frequency: {frequency}")
+
+def calendar_days(frequency: str, bars: int) -> int:
+    """Calendar days that comfortably hold `bars` bars of `frequency`, holidays included"""
+    kind, sessions = parse_frequency(frequency)
+    days_per_bar = {'weekly': 7, 'monthly': 31}.get(kind, sessions * 1.5)
+    # One more bar for a partial first bar at the start of the window
+    return int(np.ceil(days_per_bar * (bars + 1)))
+
+def _bar_keys(dates: pd.DatetimeIndex, tickers: np.ndarray, kind: str, sessions: int) -> np.ndarray:
+    """Bar number of every (ticker, date) row of a ticker-major stacked frame"""
+    if kind == 'weekly':
+        # Days since the Monday of 1970-01-05, in whole weeks
+        return (dates.to_numpy(dtype='datetime64[D]').astype(np.int64) - 4) // 7
+    if kind == 'monthly':
+        return dates.year.to_numpy() * 12 + dates.month.to_numpy()
+    # Each ticker's own sessions, counted from the first one in the frame
+    starts = np.r_[0, np.flatnonzero(tickers[1:] != tickers[:-1]) + 1]
+    lengths = np.diff(np.r_[starts, len(tickers)])
+    return (np.arange(len(tickers)) - np.repeat(starts, lengths)) // sessions
+
+def resample_many(frames: Mapping[str, pd.DataFrame], frequency: str) -> Dict[str, pd.DataFrame]:
+    """Resample daily quote frames of many tickers in one grouped pass.
+
+    Weekly bars run Monday to Friday and monthly bars over the calendar month; 'nD' bars hold
+    n of the ticker's sessions counted from its first date in the frame. Each bar is labelled
+    with its last session, so a bar dated D only uses quotes up to D and the latest bar may
+    still be forming. Columns without an aggregation rule are dropped.
+    """
+    kind, sessions = parse_frequency(frequency)
+    frames = {ticker: frame for ticker, frame in frames.items() if len(frame)}
+    if not frames:
+        return {}
+    stacked = pd.concat(frames, names=['ticker', 'date']).sort_index()
+    columns = [column for column in stacked.columns if column in AGGREGATIONS]
+    tickers = stacked.index.get_level_values('ticker').to_numpy()
+    dates = pd.DatetimeIndex(stacked.index.get_level_values('date'))
+    keys = _bar_keys(dates, tickers, kind, sessions)
+
+    values = stacked[columns].assign(date=dates)
+    bars = values.groupby([tickers, keys], sort=True).agg({**{c: AGGREGATIONS[c] for c in columns}, 'date': 'last'})
+    # Rows come out grouped by ticker, so each ticker's bars are one positional slice
+    owners = bars.index.get_level_values(0).to_numpy()
+    bars.index = pd.DatetimeIndex(bars.pop('date'), name='date')
+    bounds = np.r_[0, np.flatnonzero(owners[1:] != owners[:-1]) + 1, len(owners)]
+    return {owners[lo]: bars.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])}
+
+def resample_quotes(frame: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """Weekly, monthly or n-session bars from one ticker's daily quotes"""
+    return resample_many({'_': frame}, frequency).get('_', frame.iloc[:0])
+
+class BarStore:
+    """Higher-timeframe bars built from a QuoteStore's daily quotes, without further API calls.
+
+    Resampled bars are kept in memory per (ticker, frequency, range). Ranges ending today are
+    rebuilt on each request, since today's quotes (and so the last bar) may still change.
+    """
+
+    def __init__(self, quote_store: Optional[QuoteStore] = None):
+        self.quote_store = quote_store or QuoteStore()
+        self._bars: Dict[tuple, pd.DataFrame] = {}
+        self.resamples = 0
+
+    def get_many(
+        self,
+        tickers: Iterable[str],
+        frequency: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Bars per ticker for [start_date, end_date]; uncached tickers are resampled together"""
+        parse_frequency(frequency)
+        end = pd.Timestamp(end_date or get_default_period_end()).normalize()
+        start = pd.Timestamp(start_date or get_default_period_init(end)).normalize()
+        final = end < pd.Timestamp(datetime.now().date())
+        tickers = list(tickers)
+        key = lambda ticker: (ticker, frequency, start, end)
+
+        fresh = {}
+        missing = [ticker for ticker in tickers if key(ticker) not in self._bars]
+        if missing:
+            daily = {
+                ticker: self.quote_store.get(ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+                for ticker in missing
+            }
+            self.resamples += 1
+            bars = resample_many(daily, frequency)
+            fresh = {ticker: bars.get(ticker, daily[ticker].iloc[:0]) for ticker in missing}
+            if final:
+                self._bars.update({key(ticker): frame for ticker, frame in fresh.items()})
+        return {ticker: fresh[ticker] if ticker in fresh else self._bars[key(ticker)] for ticker in tickers}
+
+    def get(
+        self,
+        ticker: str,
+        frequency: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        return self.get_many([ticker], frequency, start_date, end_date)[ticker]
+
+    def panel(
+        self,
+        tickers: Iterable[str],
+        frequency: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        column: str = 'close'
+    ) -> pd.DataFrame:
+        """One column of `column` per ticker, aligned on the union of the bar dates"""
+        bars = self.get_many(tickers, frequency, start_date, end_date)
+        return pd.concat({ticker: frame[column] for ticker, frame in bars.items()}, axis=1).sort_index()
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ValidationError
+
+from src.schemas.market_data_schema import (
+    BalanceSheet,
+    FinancialMetric,
+    FinancialRatios,
+    IncomeStatement,
+    MarketRatios,
+    Statement,
+)
+from src.tools.new_tools import get_balance_sheet, get_financial_ratios, get_income_statements, get_market_ratios
+
+# Statement name (as in MarketDataProvider.get_statements) -> schema model
+STATEMENT_MODELS = {
+    "ratios": FinancialRatios,
+    "market_ratios": MarketRatios,
+    "income": IncomeStatement,
+    "balance": BalanceSheet,
+}
+STATEMENT_FETCHERS = {
+    "ratios": get_financial_ratios,
+    "market_ratios": get_market_ratios,
+    "income": get_income_statements,
+    "balance": get_balance_sheet,
+}
+# Keys the API may use for the filing date; without one the CVM deadline is assumed
+PUBLICATION_KEYS = ("publication_date", "published_at", "release_date", "filing_date")
+RECORD_COLUMNS = ["statement", "period", "published", "record"]
+
+def publication_date(statement: str, record: Dict[str, Any]) -> pd.Timestamp:
+    """Date a statement record became public.
+
+    Market ratios are known on their own date. Statements without a filing date are assumed
+    published on the CVM deadline: three months after the fiscal year (DFP), 45 days after
+    any other quarter (ITR).
+    """
+    for key in PUBLICATION_KEYS:
+        if record.get(key):
+            return pd.Timestamp(record[key]).tz_localize(None).normalize()
+    if statement == "market_ratios":
+        return pd.Timestamp(record["date"]).tz_localize(None).normalize()
+    period = pd.Timestamp(record["period"]).normalize()
+    return period + timedelta(days=90 if period.month == 12 else 45)
+
+def record_period(statement: str, record: Dict[str, Any]) -> pd.Timestamp:
+    return pd.Timestamp(record["date" if statement == "market_ratios" else "period"]).tz_localize(None).normalize()
+
+def parse_statement(statement: str, record: Any) -> Optional[BaseModel]:
+    """A raw record as its schema model, or None if it is missing or malformed"""
+    model = STATEMENT_MODELS[statement]
+    if record is None or isinstance(record, model):
+        return record
+    try:
+        return model(**record)
+    except (TypeError, ValidationError):
+        return None
+
+# Flat numeric columns each statement contributes; names are unique across statements
+STATEMENT_FIELDS = {
+    "ratios": ("roe", "roa", "ratio_net_margin"),
+    "market_ratios": ("p_e", "p_b", "dividend_yield", "ev_ebitda", "market_cap", "enterprise_value"),
+    "income": ("revenue", "net_income", "ebit", "ebitda", "net_margin", "operating_margin", "gross_margin"),
+    "balance": ("total_assets", "total_liabilities", "total_equity"),
+}
+
+def statement_fields(statement: str, parsed: Optional[BaseModel]) -> Dict[str, float]:
+    """STATEMENT_FIELDS of one parsed statement, NaN where missing"""
+    value = lambda metric: metric.value if metric is not None else None
+    if parsed is None:
+        fields = {}
+    elif statement == "ratios":
+        fields = {"roe": parsed.roe, "roa": parsed.roa, "ratio_net_margin": parsed.net_margin}
+    elif statement == "market_ratios":
+        fields = {
+            "p_e": parsed.p_e, "p_b": parsed.p_b, "dividend_yield": parsed.dividend_yield,
+            "ev_ebitda": parsed.ev_ebitda, "market_cap": value(parsed.market_cap),
+            "enterprise_value": value(parsed.enterprise_value),
+        }
+    elif statement == "income":
+        fields = {
+            "revenue": parsed.revenue.value, "net_income": parsed.net_income.value,
+            "ebit": parsed.ebit.value, "ebitda": parsed.ebitda.value,
+            "net_margin": parsed.net_margin, "operating_margin": parsed.operating_margin,
+            "gross_margin": parsed.gross_margin,
+        }
+    else:
+        fields = {
+            "total_assets": parsed.total_assets, "total_liabilities": parsed.total_liabilities,
+            "total_equity": parsed.total_equity,
+        }
+    return {name: np.nan if fields.get(name) is None else float(fields[name]) for name in STATEMENT_FIELDS[statement]}
+
+# Income records whose values already cover twelve months
+ANNUAL_PERIOD_TYPES = ("year", "ttm")
+
+def trailing_twelve_months(known: Mapping[tuple, Dict[str, float]], fields: Sequence[str]) -> Dict[str, float]:
+    """TTM `fields` at the latest period of `known`, a (period, period_type) -> statement_fields map.
+
+    An annual record counts as it is. A quarter's TTM is the previous fiscal (calendar) year
+    plus this year's quarters to date minus the same quarters a year earlier; when one of
+    those is missing the latest annual figure is used instead, never a single quarter.
+    """
+    latest = max(period for period, _ in known)
+    annual = {period: values for (period, kind), values in known.items() if kind in ANNUAL_PERIOD_TYPES}
+    if latest in annual:
+        return {name: annual[latest][name] for name in fields}
+    quarters = {period: values for (period, kind), values in known.items() if kind == "quarter"}
+    year_end = pd.Timestamp(latest.year - 1, 12, 31)
+    this_year = [period for period in quarters if period.year == latest.year and period <= latest]
+    last_year = [period for period in quarters if period.year == latest.year - 1 and period.month <= latest.month]
+    if year_end in annual and len(this_year) == len(last_year) == latest.month // 3:
+        return {
+            name: annual[year_end][name] + sum(quarters[p][name] for p in this_year) - sum(quarters[p][name] for p in last_year)
+            for name in fields
+        }
+    earlier = [period for period in annual if period <= latest]
+    return {name: annual[max(earlier)][name] if earlier else np.nan for name in fields}
+
+def statement_history(statements: Sequence[Statement]) -> pd.DataFrame:
+    """Columnar multi-period form: one row per period, oldest first.
+
+    Columns are the single-value metrics, every line item of each section as
+    `section.item`, and the aggregates computed when each statement was built.
+    """
+    rows = []
+    for statement in statements:
+        row = {}
+        for name in type(statement).model_fields:
+            value = getattr(statement, name)
+            if isinstance(value, FinancialMetric):
+                row[name] = value.value
+            elif isinstance(value, dict):
+                row.update({f"{name}.{item}": metric.value for item, metric in value.items()})
+        row.update(statement.aggregates())
+        rows.append(row)
+    index = pd.DatetimeIndex([pd.Timestamp(statement.period) for statement in statements], name="period")
+    return pd.DataFrame(rows, index=index, dtype=float).sort_index()
+
+class FundamentalsStore:
+    """Point-in-time statement history per company, keyed by (cvm_code, statement, period, published).
+
+    Each company's full history is fetched once and persisted to `cache_dir`. A query as of a
+    date the last fetch already covers is answered locally, so backtests never refetch; only
+    queries for days after the last fetch (live use) trigger a new one.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        statement_type: str = "con",
+        fetchers: Optional[Dict[str, Callable[..., List[Dict]]]] = None
+    ):
+        self._cache_dir = cache_dir
+        self.statement_type = statement_type
+        self._fetchers = fetchers or STATEMENT_FETCHERS
+        self._records: Dict[str, pd.DataFrame] = {}
+        self._fetched: Dict[str, pd.Timestamp] = {}
+        self._parsed: Dict[tuple, Optional[BaseModel]] = {}
+        self._fingerprints: Dict[tuple, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.fetches = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _lock(self, cvm_code: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(cvm_code, threading.Lock())
+
+    def _path(self, cvm_code: str) -> str:
+        return os.path.join(self._cache_dir, f"{cvm_code}-{self.statement_type}.pkl")
+
+    def _load(self, cvm_code: str) -> None:
+        if cvm_code in self._records or not self._cache_dir or not os.path.exists(self._path(cvm_code)):
+            return
+        stored = pd.read_pickle(self._path(cvm_code))
+        self._records[cvm_code] = stored["records"]
+        self._fetched[cvm_code] = stored["fetched"]
+
+    def _fetch(self, cvm_code: str) -> None:
+        """Fetch every statement's full history and merge it into the stored records"""
+        self.fetches += 1
+        rows = []
+        for statement, fetch in self._fetchers.items():
+            payload = fetch(cvm_code, self.statement_type) or []
+            for record in payload if isinstance(payload, list) else [payload]:
+                try:
+                    rows.append((statement, record_period(statement, record), publication_date(statement, record), record))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        records = pd.DataFrame(rows, columns=RECORD_COLUMNS)
+        if cvm_code in self._records:
+            records = pd.concat([self._records[cvm_code], records])
+        # A re-fetched record replaces the stored one with the same key
+        records = records.drop_duplicates(["statement", "period", "published"], keep="last")
+        self._parsed = {key: parsed for key, parsed in self._parsed.items() if key[0] != cvm_code}
+        self._fingerprints = {key: value for key, value in self._fingerprints.items() if key[0] != cvm_code}
+        self._records[cvm_code] = records.sort_values(["statement", "published", "period"]).reset_index(drop=True)
+        self._fetched[cvm_code] = pd.Timestamp(datetime.now().date())
+        if self._cache_dir:
+            pd.to_pickle({"records": self._records[cvm_code], "fetched": self._fetched[cvm_code]}, self._path(cvm_code))
+
+    def records(self, cvm_code: str, as_of=None) -> pd.DataFrame:
+        """Every stored record published on or before `as_of` (default: today)"""
+        as_of = pd.Timestamp(as_of or datetime.now().date()).normalize()
+        with self._lock(cvm_code):
+            self._load(cvm_code)
+            if cvm_code not in self._fetched or self._fetched[cvm_code] < as_of:
+                self._fetch(cvm_code)
+            records = self._records[cvm_code]
+        return records[records["published"] <= as_of]
+
+    def fingerprint(self, cvm_code: str, as_of) -> str:
+        """Digest of the records known on `as_of`, so a restatement or late filing changes it"""
+        records = self.records(cvm_code, as_of)
+        # The records known on a day are those published by then, so their count identifies them
+        key = (cvm_code, len(records))
+        if key not in self._fingerprints:
+            digest = hashlib.sha256()
+            for statement, period, published, record in sorted(records[RECORD_COLUMNS].itertuples(index=False), key=lambda r: r[:3]):
+                digest.update(json.dumps([statement, str(period), str(published), record], sort_keys=True, default=str).encode())
+            self._fingerprints[key] = digest.hexdigest()
+        return self._fingerprints[key]
+
+    def _parse(self, cvm_code: str, index: int, statement: str, record: Dict[str, Any]) -> Optional[BaseModel]:
+        key = (cvm_code, statement, index)
+        if key not in self._parsed:
+            self._parsed[key] = parse_statement(statement, record)
+        return self._parsed[key]
+
+    def financials_as_of(self, cvm_code: str, as_of) -> Dict[str, List[BaseModel]]:
+        """Statements known on `as_of`, latest period first, in the shape fundamentals_agent reads"""
+        records = self.records(cvm_code, as_of).sort_values(["period", "published"], ascending=False)
+        financials = {statement: [] for statement in self._fetchers}
+        for index, row in records.iterrows():
+            parsed = self._parse(cvm_code, index, row["statement"], row["record"])
+            if parsed is not None:
+                financials[row["statement"]].append(parsed)
+        return financials
+
+    def history(self, cvm_code: str, statement: str, as_of=None) -> pd.DataFrame:
+        """statement_history of the latest version of each period published by `as_of`"""
+        financials = self.financials_as_of(cvm_code, as_of)
+        latest = {}
+        for parsed in financials[statement]:
+            latest.setdefault(parsed.period, parsed)
+        return statement_history(list(latest.values()))
+
+    def trailing_join(self, cvm_code: str, dates: Iterable, fields: Sequence[str] = ("net_income", "ebitda")) -> pd.DataFrame:
+        """Trailing-twelve-month income `fields` in force on each of `dates`, NaN before the first filing"""
+        dates = pd.DatetimeIndex(dates).normalize()
+        records = self.records(cvm_code, dates.max() if len(dates) else None)
+        known, published, values = {}, [], []
+        # Records arrive sorted by publication, so each filing updates the TTM in force
+        for index, row in records[records["statement"] == "income"].iterrows():
+            parsed = self._parse(cvm_code, index, "income", row["record"])
+            if parsed is None:
+                continue
+            known[(row["period"], parsed.period_type)] = statement_fields("income", parsed)
+            published.append(row["published"])
+            values.append(trailing_twelve_months(known, fields))
+        trailing = pd.DataFrame(values, index=pd.DatetimeIndex(published), columns=list(fields), dtype=float)
+        trailing = trailing[~trailing.index.duplicated(keep="last")]
+        position = trailing.index.searchsorted(dates, side="right") - 1
+        result = np.full((len(dates), len(fields)), np.nan)
+        result[position >= 0] = trailing.to_numpy()[position[position >= 0]]
+        return pd.DataFrame(result, index=dates, columns=list(fields))
+
+    def as_of_join(self, cvm_code: str, dates: Iterable, statements: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Statement fields in force on each of `dates`: one row per date, NaN before the first filing.
+
+        A record only counts from its publication date, and a late filing of an older period
+        never replaces a newer period already known.
+        """
+        dates = pd.DatetimeIndex(dates).normalize()
+        records = self.records(cvm_code, dates.max() if len(dates) else None)
+        left = pd.DataFrame({"date": dates}).reset_index().sort_values("date")
+        joined = left
+        for statement in statements or self._fetchers:
+            group = records[records["statement"] == statement]
+            # Records arrive sorted by publication; drop those older than a period already public
+            group = group[group["period"] >= group["period"].cummax()]
+            fields = pd.DataFrame(
+                [statement_fields(statement, self._parse(cvm_code, i, statement, r)) for i, r in group["record"].items()],
+                index=group.index, columns=list(STATEMENT_FIELDS[statement]),
+            )
+            right = pd.concat([group[["published", "period"]], fields], axis=1)
+            right = right.rename(columns={"period": f"{statement}_period"}).sort_values("published")
+            joined = pd.merge_asof(
+                joined, right.astype({"published": joined["date"].dtype}),
+                left_on="date", right_on="published", direction="backward",
+            ).drop(columns="published")
+        return joined.sort_values("index").drop(columns="index").set_index("date")
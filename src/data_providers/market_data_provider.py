@@ -1,5 +1,6 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import threading
 import pandas as pd
 from functools import lru_cache
 from src.tools.new_tools import (
@@ -22,16 +23,20 @@ from src.schemas.market_data_schema import (
     InvalidTickerError,
     InvalidCVMCodeError
 )
+from src.data_providers.quote_store import QuoteStore
 from src.utils import get_default_period_init, get_default_period_end
 
 class MarketDataProvider:
     """Provider for Brazilian market data using DadosDeMercado API"""
     
-    def __init__(self, cache_timeout: int = 3600):
+    def __init__(self, cache_timeout: int = 3600, quote_store: Optional[QuoteStore] = None):
         self._companies = None
         self._company_data = None
         self._cache_timeout = cache_timeout
         self._last_cache_update = None
+        self.quote_store = quote_store or QuoteStore()
+        self._statements: Dict[Tuple[str, str], Tuple[datetime, Dict[str, Any]]] = {}
+        self._statements_lock = threading.Lock()
     
     def _should_refresh_cache(self) -> bool:
         """Check if cache should be refreshed"""
@@ -61,7 +66,18 @@ class MarketDataProvider:
                 raise MarketDataError(f"Failed to match company data: {str(e)}")
         return self._company_data
     
-    @lru_cache(maxsize=100)
+    def get_quotes_df(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Get historical quotes as a DataFrame from the local quote store"""
+        try:
+            return self.quote_store.get(ticker, start_date, end_date)
+        except Exception as e:
+            raise InvalidTickerError(f"Failed to get quotes for {ticker}: {str(e)}")
+
     def get_historical_quotes(
         self, 
         ticker: str, 
@@ -74,15 +90,34 @@ class MarketDataProvider:
         if not end_date:
             end_date = get_default_period_end()
         
+        quotes_df = self.get_quotes_df(
+            ticker,
+            start_date.strftime('%Y-%m-%d'),
+            end_date.strftime('%Y-%m-%d')
+        )
+        return [Quote(date=date, **row.to_dict()) for date, row in quotes_df.iterrows()]
+
+    def get_statements(self, cvm_code: str, statement_type: str = "con") -> Dict[str, Any]:
+        """Get raw statement payloads for a company, cached for `cache_timeout` seconds"""
+        key = (cvm_code, statement_type)
+        with self._statements_lock:
+            cached = self._statements.get(key)
+        if cached and (datetime.now() - cached[0]).total_seconds() <= self._cache_timeout:
+            return cached[1]
+
         try:
-            quotes_df = get_quotes(
-                ticker,
-                period_init=start_date.strftime('%Y-%m-%d'),
-                period_end=end_date.strftime('%Y-%m-%d')
-            )
-            return [Quote(**row.to_dict()) for _, row in quotes_df.iterrows()]
+            statements = {
+                "ratios": get_financial_ratios(cvm_code, statement_type),
+                "market_ratios": get_market_ratios(cvm_code, statement_type),
+                "income": get_income_statements(cvm_code, statement_type),
+                "balance": get_balance_sheet(cvm_code, statement_type)
+            }
         except Exception as e:
-            raise InvalidTickerError(f"Failed to get quotes for {ticker}: {str(e)}")
+            raise InvalidCVMCodeError(f"Failed to get statements for CVM code {cvm_code}: {str(e)}")
+
+        with self._statements_lock:
+            self._statements[key] = (datetime.now(), statements)
+        return statements
     
     @lru_cache(maxsize=50)
     def get_company_financials(
@@ -0,0 +1,135 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Tavily's published_date, e.g. "Mon, 01 Jul 2024 12:30:00 GMT"
+PUBLISHED_FORMAT = '%a, %d %b %Y %H:%M:%S %Z'
+
+SearchFunction = Callable[[str, int], Dict[str, Any]]
+
+def tavily_search(api_key: Optional[str] = None) -> SearchFunction:
+    """News search through one TavilyClient shared by every call"""
+    from tavily import TavilyClient
+
+    client = TavilyClient(api_key=api_key or os.environ.get("TAVILY_API_KEY"))
+    return lambda query, max_results: client.search(query, topic="news", max_results=max_results)
+
+def static_search(results: Mapping[str, List[Dict[str, Any]]]) -> SearchFunction:
+    """Offline stand-in answering each query with fixed Tavily-style results"""
+    return lambda query, max_results: {"query": query, "results": list(results.get(query, []))[:max_results]}
+
+def parse_published(values: Iterable[Any]) -> pd.DatetimeIndex:
+    """Naive UTC publication times, parsed in one pass; NaT where missing or unreadable"""
+    values = pd.Series(list(values), dtype=object)
+    parsed = pd.to_datetime(values, format=PUBLISHED_FORMAT, errors='coerce', utc=True)
+    unparsed = parsed.isna() & values.notna()
+    if unparsed.any():
+        # ISO timestamps and other formats some sources use
+        parsed[unparsed] = pd.to_datetime(values[unparsed], format='mixed', errors='coerce', utc=True)
+    return pd.DatetimeIndex(parsed).tz_convert(None)
+
+class NewsStore:
+    """Local store of news search results, deduplicated by URL and indexed by publication date.
+
+    Each query is searched once and persisted to `cache_dir`; "news up to D" is then answered
+    from the store with a binary search, so a backtest never repeats a search. Only a request
+    for a day after the query's last search (live use) searches again. Articles without a
+    publication date cannot be placed in time and are left out of lookups.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        search: Optional[SearchFunction] = None,
+        search_results: int = 20,
+        max_threads: int = 8
+    ):
+        self._cache_dir = cache_dir
+        self._search = search
+        self.search_results = search_results
+        self.max_threads = max_threads
+        self._articles: Dict[str, Tuple[pd.Timestamp, Dict[str, Any]]] = {}
+        # query -> URLs found for it, kept in insertion order
+        self._hits: Dict[str, Dict[str, None]] = {}
+        self._searched: Dict[str, pd.Timestamp] = {}
+        self._index: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.searches = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            if os.path.exists(self._path()):
+                stored = pd.read_pickle(self._path())
+                self._articles, self._hits, self._searched = stored["articles"], stored["hits"], stored["searched"]
+
+    def _path(self) -> str:
+        return os.path.join(self._cache_dir, "news.pkl")
+
+    def _save(self) -> None:
+        if self._cache_dir:
+            pd.to_pickle({"articles": self._articles, "hits": self._hits, "searched": self._searched}, self._path())
+
+    def _search_function(self) -> SearchFunction:
+        # Created on first use so offline runs never need an API key
+        with self._lock:
+            if self._search is None:
+                self._search = tavily_search()
+            return self._search
+
+    def _merge(self, query: str, results: List[Dict[str, Any]], searched: pd.Timestamp) -> None:
+        results = [result for result in results if result.get("url")]
+        published = parse_published(result.get("published_date") for result in results)
+        hits = self._hits.setdefault(query, {})
+        for result, date in zip(results, published):
+            hits[result["url"]] = None
+            # Articles found by several queries are stored once; a newer copy replaces the old one
+            self._articles[result["url"]] = (date, result)
+        self._searched[query] = searched
+
+    def fetch(self, queries: Iterable[str], as_of=None) -> int:
+        """Search, concurrently, every query not yet searched on or after `as_of` (default: today)"""
+        as_of = pd.Timestamp(as_of or datetime.now().date()).normalize()
+        today = pd.Timestamp(datetime.now().date())
+        with self._lock:
+            stale = [query for query in dict.fromkeys(queries) if self._searched.get(query, pd.Timestamp.min) < as_of]
+        if not stale:
+            return 0
+
+        search = self._search_function()
+        with ThreadPoolExecutor(min(self.max_threads, len(stale))) as pool:
+            responses = list(pool.map(lambda query: search(query, self.search_results), stale))
+        with self._lock:
+            for query, response in zip(stale, responses):
+                self.searches += 1
+                self._merge(query, (response or {}).get("results", []), today)
+            # Shared articles may have moved, so every query's date index is rebuilt lazily
+            self._index.clear()
+            self._save()
+        return len(stale)
+
+    def _dated(self, query: str) -> Tuple[np.ndarray, List[str]]:
+        """Publication dates (sorted) and URLs of a query's dated articles"""
+        if query not in self._index:
+            urls = [url for url in self._hits.get(query, {}) if not pd.isna(self._articles[url][0])]
+            dates = np.array([self._articles[url][0] for url in urls], dtype='datetime64[ns]')
+            order = np.argsort(dates, kind='stable')
+            self._index[query] = (dates[order], [urls[i] for i in order])
+        return self._index[query]
+
+    def articles(self, query: str, end_date=None, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Articles for `query` published on or before `end_date`, newest first"""
+        end = pd.Timestamp(end_date or datetime.now().date()).normalize()
+        self.fetch([query], as_of=end)
+        with self._lock:
+            dates, urls = self._dated(query)
+            stop = int(np.searchsorted(dates, np.datetime64(end + pd.Timedelta(days=1), 'ns'), side='left'))
+            start = 0 if max_results is None else max(0, stop - max_results)
+            return [dict(self._articles[url][1]) for url in reversed(urls[start:stop])]
+
+    def news(self, query: str, end_date=None, max_results: int = 5) -> Dict[str, Any]:
+        """Tavily-shaped response holding the latest `max_results` articles up to `end_date`"""
+        return {"query": query, "results": self.articles(query, end_date, max_results)}
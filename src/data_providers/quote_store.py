@@ -0,0 +1,131 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+import pandas as pd
+from src.tools.new_tools import get_quotes
+from src.trading_calendar import TradingCalendar
+from src.utils import get_default_period_init, get_default_period_end
+
+QUOTE_COLUMNS = ['open', 'close', 'adj_close', 'min', 'max', 'volume']
+
+class QuoteStore:
+    """Local store of daily quotes that only fetches date ranges it has not seen yet"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        fetch_quotes: Callable[..., pd.DataFrame] = get_quotes,
+        calendar: Optional[TradingCalendar] = None
+    ):
+        self._cache_dir = cache_dir
+        self._fetch_quotes = fetch_quotes
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._coverage: Dict[str, Tuple[pd.Timestamp, pd.Timestamp]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.fetches = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        # Learns sessions from reference-ticker quotes and is persisted next to them
+        self.calendar = calendar or TradingCalendar(os.path.join(cache_dir, "calendar.pkl") if cache_dir else None)
+
+    @property
+    def cache_dir(self) -> Optional[str]:
+        return self._cache_dir
+
+    def _last_final_day(self) -> pd.Timestamp:
+        """Latest day whose bar can no longer change: today only once it is not a session"""
+        today = pd.Timestamp(datetime.now().date())
+        return today if not self.calendar.is_session(today) else today - timedelta(days=1)
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self._cache_dir, f"{ticker}.pkl")
+
+    def _load(self, ticker: str) -> None:
+        """Load a persisted frame the first time a ticker is touched"""
+        if ticker in self._frames or not self._cache_dir or not os.path.exists(self._path(ticker)):
+            return
+        stored = pd.read_pickle(self._path(ticker))
+        self._frames[ticker] = stored["frame"]
+        self._coverage[ticker] = stored["coverage"]
+
+    def _save(self, ticker: str) -> None:
+        if self._cache_dir:
+            pd.to_pickle(
+                {"frame": self._frames[ticker], "coverage": self._coverage[ticker]},
+                self._path(ticker)
+            )
+
+    def _fetch(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """Fetch [start, end] unless the calendar says no session falls inside it"""
+        if not self.calendar.has_sessions(start, end):
+            return None
+        self.fetches += 1
+        frame = self._fetch_quotes(
+            ticker,
+            period_init=start.strftime('%Y-%m-%d'),
+            period_end=end.strftime('%Y-%m-%d')
+        )
+        final = min(end, self._last_final_day())
+        if start <= final:
+            self.calendar.observe_quotes(ticker, start, final, frame)
+        return frame
+
+    def get(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Return quotes for [start_date, end_date], fetching only the uncovered edges"""
+        end = pd.Timestamp(end_date or get_default_period_end()).normalize()
+        start = pd.Timestamp(start_date or get_default_period_init(end)).normalize()
+
+        with self._lock(ticker):
+            self._load(ticker)
+            covered = self._coverage.get(ticker)
+            parts = []
+            if covered is None:
+                parts.append(self._fetch(ticker, start, end))
+                covered = (start, end)
+            else:
+                if start < covered[0]:
+                    parts.append(self._fetch(ticker, start, covered[0] - timedelta(days=1)))
+                if end > covered[1]:
+                    parts.append(self._fetch(ticker, covered[1] + timedelta(days=1), end))
+                covered = (min(start, covered[0]), max(end, covered[1]))
+
+            if parts:
+                frames = [self._frames.get(ticker), *parts]
+                frames = [part for part in frames if part is not None and not part.empty]
+                if frames:
+                    frame = pd.concat(frames)
+                    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+                else:
+                    frame = pd.DataFrame(columns=QUOTE_COLUMNS, index=pd.DatetimeIndex([], name='date'))
+                self._frames[ticker] = frame
+                # Today's bar may still change during a session, so never mark it as covered
+                self._coverage[ticker] = (covered[0], min(covered[1], self._last_final_day()))
+                self._save(ticker)
+
+            return self._frames[ticker].loc[start:end]
+
+    def warm(self, ticker: str) -> bool:
+        """Whether the ticker already has cached quotes"""
+        return ticker in self._frames
+
+    def panel(
+        self,
+        tickers: Iterable[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        column: str = 'close'
+    ) -> pd.DataFrame:
+        """One column of `column` per ticker, aligned on the union of their trading dates"""
+        columns = {ticker: self.get(ticker, start_date, end_date)[column] for ticker in tickers}
+        return pd.concat(columns, axis=1).sort_index()
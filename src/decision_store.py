@@ -0,0 +1,100 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.features import TechnicalFeatures
+
+def decision_fingerprint(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    portfolio: Dict[str, Any],
+    prices: Optional[pd.DataFrame],
+    financials: Optional[str] = None,
+    features: Optional[TechnicalFeatures] = None
+) -> str:
+    """Hash of everything the agent sees for one backtest day.
+
+    `financials` is the digest of the statements known that day (FundamentalsStore.fingerprint);
+    `features` is the indicator snapshot, which depends on the warm-up history.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([ticker, start_date, end_date], sort_keys=True).encode())
+    digest.update(json.dumps({"cash": float(portfolio["cash"]), "stock": float(portfolio["stock"])}, sort_keys=True).encode())
+    if prices is not None:
+        digest.update(pd.util.hash_pandas_object(prices, index=True).to_numpy().tobytes())
+    if financials is not None:
+        digest.update(financials.encode())
+    if features is not None:
+        digest.update(json.dumps(asdict(features), sort_keys=True).encode())
+    return digest.hexdigest()
+
+class DecisionStore:
+    """SQLite store of each backtest day's input fingerprint and raw agent output.
+
+    Every decision is committed as soon as it is recorded, so an interrupted run loses at most
+    the day in flight.
+    """
+
+    def __init__(self, path: str, run_id: str = "default"):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS decisions (
+                run_id TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                output TEXT NOT NULL,
+                recorded_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, ticker, date)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, ticker: str, date: str) -> Optional[Tuple[str, str]]:
+        """(fingerprint, output) recorded for a day, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, output FROM decisions WHERE run_id = ? AND ticker = ? AND date = ?",
+                (self.run_id, ticker, date)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, ticker: str, date: str, fingerprint: str, output: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?, ?, ?)",
+                (self.run_id, ticker, date, fingerprint, output, datetime.now().isoformat())
+            )
+            self._conn.commit()
+
+    def last_date(self, ticker: str) -> Optional[str]:
+        """Last completed day of this run, where an interrupted run resumes"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(date) FROM decisions WHERE run_id = ? AND ticker = ?",
+                (self.run_id, ticker)
+            ).fetchone()
+        return row[0]
+
+    def clear(self, ticker: Optional[str] = None) -> None:
+        with self._lock:
+            if ticker is None:
+                self._conn.execute("DELETE FROM decisions WHERE run_id = ?", (self.run_id,))
+            else:
+                self._conn.execute("DELETE FROM decisions WHERE run_id = ? AND ticker = ?", (self.run_id, ticker))
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict, Field, PrivateAttr
+
+TICKER_PATTERN = re.compile(r"\b[A-Z]{4}\d{1,2}\b")
+POSITIVE_WORDS = ("alta", "lucro", "recorde", "sobe", "compra", "growth", "beats", "upgrade", "record")
+NEGATIVE_WORDS = ("queda", "prejuízo", "cai", "venda", "investigação", "loss", "downgrade", "misses", "lawsuit")
+
+def constant_latency(seconds: float) -> Callable[[random.Random], float]:
+    """Every call takes the same time"""
+    return lambda rng: seconds
+
+def uniform_latency(low: float, high: float) -> Callable[[random.Random], float]:
+    """Latency drawn uniformly from [low, high] seconds"""
+    return lambda rng: rng.uniform(low, high)
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    """Right-skewed latency around `median` seconds, like a hosted LLM API"""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+class FakeChatModel(BaseChatModel):
+    """Offline, deterministic stand-in for ChatOpenAI with the same prompt contracts.
+
+    Answers the prompt-parsing, news-sentiment and summary prompts used by the agents
+    with schema-valid content, sleeping for a latency drawn from a seeded distribution.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model_name: str = "fake-gpt"
+    latency: Callable[[random.Random], float] = Field(default_factory=lambda: constant_latency(0.0))
+    seed: int = 0
+    _rng: random.Random = PrivateAttr()
+    calls: int = 0
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "seed": self.seed}
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        system = " ".join(m.content for m in messages if isinstance(m, SystemMessage))
+        human = " ".join(m.content for m in messages if not isinstance(m, SystemMessage))
+
+        if "determine which financial analysis agents" in system:
+            lowered = human.lower()
+            agents = []
+            if any(word in lowered for word in ("technical", "momentum", "indicator", "trend", "pattern", "bullish")):
+                agents.append("technical")
+            if any(word in lowered for word in ("fundamental", "valuation", "ratio", "health", "profitab", "efficien")):
+                agents.append("fundamental")
+            match = TICKER_PATTERN.search(human)
+            return json.dumps({
+                "agents": ["market_data"] + (agents or ["technical", "fundamental"]),
+                "ticker": match.group(0) if match else "PETR4",
+                "focus_areas": agents or ["overall"],
+            })
+
+        if "financial news analyst" in system:
+            lowered = human.lower()
+            score = sum(lowered.count(w) for w in POSITIVE_WORDS) - sum(lowered.count(w) for w in NEGATIVE_WORDS)
+            signal = "bullish" if score > 0 else "bearish" if score < 0 else "neutral"
+            return json.dumps({
+                "signal": signal,
+                "confidence": round(min(abs(score) / 5, 1.0), 2),
+                "reasoning": f"Keyword score {score} across the headlines",
+            })
+
+        bullish, bearish = human.count("Signal: BULLISH"), human.count("Signal: BEARISH")
+        action = "buy" if bullish > bearish else "sell" if bearish > bullish else "hold"
+        return f"{bullish} bullish and {bearish} bearish analyses. Recommended action: {action}."
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        content = self._respond(messages)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={
+                "model_name": self.model_name,
+                "token_usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+            },
+        )
+
+    def _next_latency(self) -> float:
+        self.calls += 1
+        return max(self.latency(self._rng), 0.0)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._next_latency())
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._next_latency())
+        return self._result(messages)
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Sequence
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+ORIGIN = "2015-01-01"
+
+class FakeMarketDataAPI:
+    """Local stand-in for the DadosDeMercado API serving deterministic synthetic data"""
+
+    def __init__(self, tickers: Sequence[str] = ("PETR4", "VALE3", "ITUB4"), latency: float = 0.0):
+        self.tickers = list(tickers)
+        self.latency = latency
+        self.requests = Counter()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def company(self, ticker: str) -> Dict:
+        cvm_code = str(zlib.crc32(ticker.encode()) % 90000 + 10000)
+        return {
+            "name": f"{ticker} S.A.",
+            "trade_name": ticker[:4],
+            "cvm_code": cvm_code,
+            "is_b3_listed": True,
+            "sector": "Energia" if ticker.startswith("P") else "Financeiro",
+            "subsector": None,
+            "segment": None,
+        }
+
+    def quotes(self, ticker: str, period_init: str, period_end: str) -> list:
+        # Generate from a fixed origin so overlapping windows always agree
+        dates = pd.bdate_range(ORIGIN, period_end)
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        close = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+        open_ = close * (1 + rng.normal(0, 0.005, len(dates)))
+        volume = rng.integers(100_000, 5_000_000, len(dates))
+        mask = dates >= pd.Timestamp(period_init)
+        return [
+            {
+                "date": date.strftime('%Y-%m-%d'),
+                "open": round(float(o), 2),
+                "close": round(float(c), 2),
+                "adj_close": round(float(c), 2),
+                "min": round(float(min(o, c) * 0.99), 2),
+                "max": round(float(max(o, c) * 1.01), 2),
+                "volume": int(v),
+            }
+            for date, o, c, v in zip(dates[mask], open_[mask], close[mask], volume[mask])
+        ]
+
+    def route(self, path: str, query: Dict[str, str]):
+        parts = path.strip("/").split("/")
+        if parts == ["companies"]:
+            return [self.company(ticker) for ticker in self.tickers]
+        if parts == ["tickers"]:
+            return [
+                {"ticker": ticker, "name": ticker[:4], "isin": f"BR{ticker}ACNOR0", "issuer_code": ticker[:4]}
+                for ticker in self.tickers
+            ]
+        if len(parts) == 3 and parts[0] == "tickers" and parts[2] == "quotes":
+            return self.quotes(parts[1], query.get("period_init", ORIGIN), query.get("period_end", "2024-12-31"))
+        if len(parts) == 3 and parts[0] == "companies":
+            return [{"period": "2023-12-31", "statement_type": "con"}]
+        return None
+
+    def start(self) -> "FakeMarketDataAPI":
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                api.requests[url.path] += 1
+                if api.latency:
+                    time.sleep(api.latency)
+                payload = api.route(url.path, {k: v[0] for k, v in parse_qs(url.query).items()})
+                body = json.dumps(payload if payload is not None else {"error": "not found"}).encode()
+                self.send_response(200 if payload is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeMarketDataAPI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,132 @@
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+NAN = float("nan")
+
+@dataclass(frozen=True)
+class TechnicalFeatures:
+    """Latest values of the indicators quant_agent votes on"""
+    close: float
+    macd: float
+    macd_signal: float
+    prev_macd: float
+    prev_macd_signal: float
+    rsi: float
+    bollinger_upper: float
+    bollinger_lower: float
+    obv: float
+    obv_slope: float
+    bars: int
+
+class _Ema:
+    """Exponential moving average matching pandas ewm(span=span, adjust=False)"""
+
+    def __init__(self, span: int):
+        self.alpha = 2 / (span + 1)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+class _RollingSum:
+    """Sum (and sum of squares) of the last `window` values"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.squares = 0.0
+
+    def update(self, x: float) -> None:
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.total -= old
+            self.squares -= old * old
+        self.values.append(x)
+        self.total += x
+        self.squares += x * x
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else NAN
+
+    def std(self) -> float:
+        n = len(self.values)
+        if n < 2:
+            return NAN
+        return math.sqrt(max((self.squares - self.total * self.total / n) / (n - 1), 0.0))
+
+class FeaturePipeline:
+    """Technical indicators kept as running state and advanced one bar at a time.
+
+    Each update is O(1), and the values equal the pandas indicators in src.agents computed over
+    every bar seen so far, so warming up on earlier history removes any dependence on the
+    backtest's lookback window.
+    """
+
+    def __init__(self, rsi_periods: int = 14, bollinger_window: int = 20, obv_slope_periods: int = 5):
+        self._fast, self._slow, self._signal = _Ema(12), _Ema(26), _Ema(9)
+        self._gains, self._losses = _RollingSum(rsi_periods), _RollingSum(rsi_periods)
+        self._closes = _RollingSum(bollinger_window)
+        self._obv_diffs = _RollingSum(obv_slope_periods)
+        self._prev_close: Optional[float] = None
+        self._macd = self._macd_signal = NAN
+        self._prev_macd = self._prev_macd_signal = NAN
+        self._obv = 0.0
+        self.bars = 0
+
+    def update(self, close: float, volume: float) -> None:
+        """Advance every indicator by one bar"""
+        delta = 0.0 if self._prev_close is None else close - self._prev_close
+
+        self._prev_macd, self._prev_macd_signal = self._macd, self._macd_signal
+        self._macd = self._fast.update(close) - self._slow.update(close)
+        self._macd_signal = self._signal.update(self._macd)
+
+        self._gains.update(max(delta, 0.0))
+        self._losses.update(max(-delta, 0.0))
+        self._closes.update(close)
+
+        if self._prev_close is not None:
+            step = volume if delta > 0 else -volume if delta < 0 else 0.0
+            self._obv += step
+            self._obv_diffs.update(step)
+
+        self._prev_close = close
+        self.bars += 1
+
+    def warm_up(self, prices_df: pd.DataFrame) -> "FeaturePipeline":
+        """Feed every bar of an earlier history"""
+        for close, volume in zip(prices_df['close'].to_numpy(dtype=float), prices_df['volume'].to_numpy(dtype=float)):
+            self.update(close, volume)
+        return self
+
+    def snapshot(self) -> TechnicalFeatures:
+        rsi = NAN
+        if self._gains.full:
+            gain, loss = self._gains.mean(), self._losses.mean()
+            rsi = 100 - 100 / (1 + gain / loss) if loss > 0 else (100.0 if gain > 0 else NAN)
+        mean, std = NAN, NAN
+        if self._closes.full:
+            mean, std = self._closes.mean(), self._closes.std()
+        return TechnicalFeatures(
+            close=NAN if self._prev_close is None else self._prev_close,
+            macd=self._macd,
+            macd_signal=self._macd_signal,
+            prev_macd=self._prev_macd,
+            prev_macd_signal=self._prev_macd_signal,
+            rsi=rsi,
+            bollinger_upper=mean + 2 * std,
+            bollinger_lower=mean - 2 * std,
+            obv=self._obv,
+            obv_slope=self._obv_diffs.mean(),
+            bars=self.bars,
+        )
@@ -0,0 +1,230 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+from uuid import UUID
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# USD per 1K (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+current_agent: ContextVar[Optional[str]] = ContextVar("current_agent", default=None)
+
+class Recorder:
+    """Collects timed spans for agents, HTTP calls and LLM calls"""
+
+    def __init__(self, max_spans: int = 100_000):
+        self.enabled = True
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: deque = deque(maxlen=max_spans)
+
+    def record(self, category: str, name: str, start: float, duration: float, **attrs) -> None:
+        """Record a finished span; `start` is a time.perf_counter() value"""
+        if not self.enabled:
+            return
+        span = {
+            "category": category,
+            "name": name,
+            "start": start - self._origin,
+            "duration": duration,
+            "thread": threading.get_ident(),
+            "agent": current_agent.get(),
+            **attrs,
+        }
+        with self._lock:
+            self._spans.append(span)
+
+    @contextmanager
+    def span(self, category: str, name: str, **attrs) -> Iterator[Dict[str, Any]]:
+        """Time a block; attributes added to the yielded dict are stored with the span"""
+        token = current_agent.set(name) if category == "agent" else None
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            if token is not None:
+                current_agent.reset(token)
+            self.record(category, name, start, time.perf_counter() - start, **attrs)
+
+    @property
+    def spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+        self._origin = time.perf_counter()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Aggregate spans per (category, name), slowest total first"""
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for span in self.spans:
+            groups.setdefault((span["category"], span["name"]), []).append(span)
+
+        rows = []
+        for (category, name), spans in groups.items():
+            durations = sorted(span["duration"] for span in spans)
+            rows.append({
+                "category": category,
+                "name": name,
+                "count": len(spans),
+                "total_ms": 1000 * sum(durations),
+                "mean_ms": 1000 * sum(durations) / len(durations),
+                "p95_ms": 1000 * durations[min(int(0.95 * len(durations)), len(durations) - 1)],
+                "max_ms": 1000 * durations[-1],
+                "bytes": sum(span.get("bytes", 0) for span in spans),
+                "tokens": sum(span.get("prompt_tokens", 0) + span.get("completion_tokens", 0) for span in spans),
+                "cache_hits": sum(1 for span in spans if span.get("cache_hit")),
+                "cost_usd": sum(span.get("cost_usd", 0.0) for span in spans),
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format_summary(self) -> str:
+        """Render the summary as a fixed-width table"""
+        header = (
+            f"{'Category':<8} {'Name':<36} {'Count':>6} {'Total ms':>10} {'Mean ms':>9} "
+            f"{'p95 ms':>9} {'Max ms':>9} {'Bytes':>10} {'Tokens':>8} {'Cached':>6} {'Cost $':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for row in self.summary():
+            lines.append(
+                f"{row['category']:<8} {row['name'][:36]:<36} {row['count']:>6} {row['total_ms']:>10.1f} "
+                f"{row['mean_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['max_ms']:>9.1f} {row['bytes']:>10} "
+                f"{row['tokens']:>8} {row['cache_hits']:>6} {row['cost_usd']:>8.4f}"
+            )
+        return "\n".join(lines)
+
+    def export_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"spans": self.spans, "summary": self.summary()}, f, indent=2, default=str)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome trace "complete" events, loadable in chrome://tracing and Perfetto"""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            args = {k: v for k, v in span.items() if k not in ("category", "name", "start", "duration", "thread")}
+            events.append({
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": span["start"] * 1e6,
+                "dur": span["duration"] * 1e6,
+                "pid": pid,
+                "tid": span["thread"],
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+recorder = Recorder()
+
+_ENDPOINT_PATTERNS = [
+    (re.compile(r"/tickers/[^/]+/"), "/tickers/{ticker}/"),
+    (re.compile(r"/companies/[^/]+/"), "/companies/{cvm_code}/"),
+]
+
+def record_response(response, *args, **kwargs):
+    """requests response hook recording endpoint, bytes, status and latency"""
+    endpoint = urlparse(response.url).path
+    for pattern, template in _ENDPOINT_PATTERNS:
+        endpoint = pattern.sub(template, endpoint)
+    read_start = time.perf_counter()
+    size = len(response.content)
+    duration = response.elapsed.total_seconds() + (time.perf_counter() - read_start)
+    recorder.record(
+        "http",
+        endpoint,
+        time.perf_counter() - duration,
+        duration,
+        url=response.url,
+        status=response.status_code,
+        bytes=size,
+    )
+    return response
+
+class RecordingCache(BaseCache):
+    """LLM cache wrapper flagging the generations it returns with `cache_hit` so the callback can count hits"""
+
+    def __init__(self, cache: BaseCache):
+        self.cache = cache
+
+    def lookup(self, prompt: str, llm_string: str):
+        cached = self.cache.lookup(prompt, llm_string)
+        if cached is None:
+            return None
+        return [
+            generation.model_copy(update={"generation_info": {**(generation.generation_info or {}), "cache_hit": True}})
+            for generation in cached
+        ]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        self.cache.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs) -> None:
+        self.cache.clear(**kwargs)
+
+class LLMCallbackHandler(BaseCallbackHandler):
+    """LangChain callback recording latency, token usage, cost and cache hits per LLM call"""
+
+    def __init__(self):
+        self._starts: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("name", "llm")
+        self._starts[run_id] = (time.perf_counter(), model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs) -> None:
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, **kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        start, model = self._starts.pop(run_id, (time.perf_counter(), "llm"))
+        prompt_tokens = completion_tokens = 0
+        cache_hit = False
+        for generations in response.generations:
+            for generation in generations:
+                cache_hit = cache_hit or bool((generation.generation_info or {}).get("cache_hit"))
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = prompt_tokens or token_usage.get("prompt_tokens", 0)
+        completion_tokens = completion_tokens or token_usage.get("completion_tokens", 0)
+
+        prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        cost = 0.0 if cache_hit else (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+        recorder.record(
+            "llm",
+            model,
+            start,
+            time.perf_counter() - start,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cache_hit=cache_hit,
+            cost_usd=cost,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._starts.pop(run_id, None)
+
+llm_callback = LLMCallbackHandler()
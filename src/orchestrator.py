@@ -1,64 +1,204 @@
-from typing import Dict, Any
-from langchain.graphs import StateGraph
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import pandas as pd
+from langgraph.graph import END, StateGraph
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage
 
+from .instrumentation import recorder
+from .features import TechnicalFeatures
 from .agents import (
+    AgentState,
     market_data_agent,
-    quant_agent, 
+    quant_agent,
     fundamentals_agent,
     sentiment_agent,
     risk_management_agent,
     portfolio_management_agent
 )
 
-def create_workflow() -> StateGraph:
-    """Create the agent workflow graph"""
-    workflow = StateGraph()
-    
+ANALYST_NODES = ("quant", "fundamentals", "sentiment")
+
+def _timed(name: str, agent: Callable[[AgentState], Dict[str, Any]]) -> Callable[[AgentState], Dict[str, Any]]:
+    """Wrap an agent so its wall time is reported in the `timings` channel and the recorder"""
+    def node(state: AgentState) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with recorder.span("agent", name, ticker=state["data"]["ticker"]):
+            update = agent(state)
+        return {**update, "timings": {name: time.perf_counter() - start}}
+    return node
+
+def create_workflow():
+    """Create and compile the agent workflow graph"""
+    workflow = StateGraph(AgentState)
+
     # Add nodes
-    workflow.add_node("market_data", market_data_agent)
-    workflow.add_node("quant", quant_agent)
-    workflow.add_node("fundamentals", fundamentals_agent) 
-    workflow.add_node("sentiment", sentiment_agent)
-    workflow.add_node("risk", risk_management_agent)
-    workflow.add_node("portfolio", portfolio_management_agent)
-
-    # Define edges
+    workflow.add_node("market_data", _timed("market_data", market_data_agent))
+    workflow.add_node("quant", _timed("quant", quant_agent))
+    workflow.add_node("fundamentals", _timed("fundamentals", fundamentals_agent))
+    workflow.add_node("sentiment", _timed("sentiment", sentiment_agent))
+    workflow.add_node("risk", _timed("risk", risk_management_agent))
+    workflow.add_node("portfolio", _timed("portfolio", portfolio_management_agent))
+
+    # Define edges: the analysts fan out in parallel and join at risk
     workflow.set_entry_point("market_data")
-    workflow.add_edge("market_data", "quant")
-    workflow.add_edge("market_data", "fundamentals")
-    workflow.add_edge("market_data", "sentiment")
-    workflow.add_edge("quant", "risk")
-    workflow.add_edge("fundamentals", "risk") 
-    workflow.add_edge("sentiment", "risk")
+    for analyst in ANALYST_NODES:
+        workflow.add_edge("market_data", analyst)
+    workflow.add_edge(list(ANALYST_NODES), "risk")
     workflow.add_edge("risk", "portfolio")
-    workflow.add_edge("portfolio", "END")
+    workflow.add_edge("portfolio", END)
 
     return workflow.compile()
 
+class HedgeFundRunner:
+    """Long-lived runner that compiles the workflow once and reuses it"""
+
+    def __init__(
+        self,
+        show_reasoning: bool = False,
+        max_concurrency: Optional[int] = None,
+        llm: Optional[BaseChatModel] = None
+    ):
+        self.show_reasoning = show_reasoning
+        self.max_concurrency = max_concurrency
+        self.llm = llm
+        self.workflow = create_workflow()
+        self.timings: List[Dict[str, float]] = []
+
+    def _initial_state(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        portfolio: Dict[str, Any],
+        prices: Optional[pd.DataFrame] = None,
+        features: Optional[TechnicalFeatures] = None,
+        financials: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        data = {
+            "ticker": ticker,
+            "portfolio": portfolio,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        if prices is not None:
+            data["quotes"] = prices
+        if features is not None:
+            data["features"] = features
+        if financials is not None:
+            data["financials"] = financials
+        return {
+            "messages": [
+                HumanMessage(content="Make a trading decision based on the provided data.")
+            ],
+            "data": data,
+            "metadata": {
+                "show_reasoning": self.show_reasoning,
+                "llm": self.llm
+            },
+            "timings": {},
+            "analyses": {}
+        }
+
+    def _config(self) -> Dict[str, Any]:
+        return {"max_concurrency": self.max_concurrency} if self.max_concurrency else {}
+
+    def _finalize(self, final_state: Dict[str, Any]) -> str:
+        self.timings.append(dict(final_state.get("timings", {})))
+        # Render the typed decision as the JSON order Backtester.parse_action expects
+        decision = final_state["analyses"]["portfolio_management_agent"]
+        return decision.model_dump_json(include={"action", "quantity"})
+
+    def run(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        portfolio: Dict[str, Any],
+        prices: Optional[pd.DataFrame] = None,
+        features: Optional[TechnicalFeatures] = None,
+        financials: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Run the workflow for a single ticker and return the final state with every typed analysis"""
+        return self.workflow.invoke(
+            self._initial_state(ticker, start_date, end_date, portfolio, prices, features, financials)
+        )
+
+    def invoke(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        portfolio: Dict[str, Any],
+        prices: Optional[pd.DataFrame] = None,
+        features: Optional[TechnicalFeatures] = None,
+        financials: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Run the workflow for a single ticker and date window, optionally on preloaded prices, features and statements"""
+        return self._finalize(self.run(ticker, start_date, end_date, portfolio, prices, features, financials))
+
+    async def ainvoke(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        portfolio: Dict[str, Any],
+        prices: Optional[pd.DataFrame] = None,
+        features: Optional[TechnicalFeatures] = None,
+        financials: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Async variant of `invoke`"""
+        final_state = await self.workflow.ainvoke(
+            self._initial_state(ticker, start_date, end_date, portfolio, prices, features, financials)
+        )
+        return self._finalize(final_state)
+
+    def batch(self, inputs: Sequence[Dict[str, Any]]) -> List[str]:
+        """Run the workflow for many inputs with `ticker`, `start_date`, `end_date`, `portfolio` and optional `prices`, `features` and `financials` keys"""
+        final_states = self.workflow.batch(
+            [self._initial_state(**run) for run in inputs],
+            config=self._config()
+        )
+        return [self._finalize(final_state) for final_state in final_states]
+
+    async def abatch(self, inputs: Sequence[Dict[str, Any]]) -> List[str]:
+        """Async variant of `batch`"""
+        final_states = await self.workflow.abatch(
+            [self._initial_state(**run) for run in inputs],
+            config=self._config()
+        )
+        return [self._finalize(final_state) for final_state in final_states]
+
+    def node_timings(self) -> Dict[str, Dict[str, float]]:
+        """Summarize recorded wall time per node across all runs"""
+        summary = {}
+        for run in self.timings:
+            for node, elapsed in run.items():
+                stats = summary.setdefault(node, {"count": 0, "total": 0.0, "max": 0.0})
+                stats["count"] += 1
+                stats["total"] += elapsed
+                stats["max"] = max(stats["max"], elapsed)
+        for stats in summary.values():
+            stats["mean"] = stats["total"] / stats["count"]
+        return summary
+
+_runners: Dict[bool, HedgeFundRunner] = {}
+
+def get_runner(show_reasoning: bool = False) -> HedgeFundRunner:
+    """Return the shared runner, compiling the workflow on first use"""
+    if show_reasoning not in _runners:
+        _runners[show_reasoning] = HedgeFundRunner(show_reasoning=show_reasoning)
+    return _runners[show_reasoning]
+
 def run_hedge_fund(
     ticker: str,
     start_date: str,
     end_date: str,
     portfolio: Dict[str, Any],
-    show_reasoning: bool = False
+    show_reasoning: bool = False,
+    prices: Optional[pd.DataFrame] = None,
+    features: Optional[TechnicalFeatures] = None,
+    financials: Optional[Dict[str, Any]] = None
 ) -> str:
     """Run the hedge fund workflow"""
-    workflow = create_workflow()
-    
-    final_state = workflow.invoke({
-        "messages": [
-            HumanMessage(content="Make a trading decision based on the provided data.")
-        ],
-        "data": {
-            "ticker": ticker,
-            "portfolio": portfolio,
-            "start_date": start_date,
-            "end_date": end_date,
-        },
-        "metadata": {
-            "show_reasoning": show_reasoning
-        }
-    })
-    
-    return final_state["messages"][-1].content
\ No newline at end of file
+    return get_runner(show_reasoning).invoke(ticker, start_date, end_date, portfolio, prices, features, financials)
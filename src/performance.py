@@ -0,0 +1,183 @@
+"""Headless performance analytics over backtest equity arrays.
+
+Nothing here imports matplotlib unless PerformanceReport.plot is called, so thousands of
+backtests can be scored on a server without a display.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+@dataclass
+class PerformanceReport:
+    metrics: Dict[str, float]
+    series: pd.DataFrame = field(repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"metrics": self.metrics, "series": json.loads(self.series.to_json(orient="split", date_format="iso"))}
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        payload = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, "w") as f:
+                f.write(payload)
+        return payload
+
+    def to_parquet(self, path: str) -> None:
+        """Rolling series to Parquet, with the scalar metrics in the file metadata (needs pyarrow)"""
+        series = self.series.copy()
+        series.attrs["metrics"] = json.dumps(self.metrics)
+        series.to_parquet(path)
+
+    def plot(self, path: Optional[str] = None, show: bool = False, title: str = "Portfolio Value Over Time"):
+        """Equity, drawdown and rolling volatility panels; matplotlib is imported only here"""
+        if show:
+            import matplotlib.pyplot as plt
+            figure = plt.figure(figsize=(12, 9))
+        else:
+            # A bare Figure needs no GUI backend, so saving works on headless servers
+            from matplotlib.figure import Figure
+            figure = Figure(figsize=(12, 9))
+        axes = figure.subplots(3, 1, sharex=True)
+        self.series["equity"].plot(ax=axes[0], title=title)
+        if "benchmark_equity" in self.series:
+            self.series["benchmark_equity"].plot(ax=axes[0], label="Benchmark")
+            axes[0].legend()
+        self.series["drawdown"].plot(ax=axes[1], title="Drawdown")
+        self.series["rolling_volatility"].plot(ax=axes[2], title="Rolling Volatility (annualized)")
+        if path:
+            figure.savefig(path)
+        if show:
+            plt.show()
+        return figure
+
+def _rolling_std(returns: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation over trailing windows, NaN until a window is full"""
+    out = np.full(len(returns), np.nan)
+    if len(returns) < window or window < 2:
+        return out
+    csum = np.concatenate([[0.0], np.cumsum(returns)])
+    csq = np.concatenate([[0.0], np.cumsum(returns ** 2)])
+    total = csum[window:] - csum[:-window]
+    squares = csq[window:] - csq[:-window]
+    variance = (squares - total ** 2 / window) / (window - 1)
+    out[window - 1:] = np.sqrt(np.maximum(variance, 0.0))
+    return out
+
+def _rolling_max_drawdown(equity: np.ndarray, window: int) -> np.ndarray:
+    """Deepest peak-to-trough decline inside each trailing window"""
+    out = np.full(len(equity), np.nan)
+    if len(equity) < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(equity, window)
+    out[window - 1:] = (windows / np.maximum.accumulate(windows, axis=1) - 1).min(axis=1)
+    return out
+
+def performance_metrics(
+    equity: np.ndarray,
+    benchmark: Optional[np.ndarray] = None,
+    gross_exposure: Optional[np.ndarray] = None,
+    traded_value: Optional[np.ndarray] = None,
+    index: Optional[pd.Index] = None,
+    periods_per_year: int = TRADING_DAYS,
+    risk_free_rate: float = 0.0,
+    window: int = 21,
+) -> PerformanceReport:
+    """Return, risk, trading and benchmark-relative statistics of an equity curve.
+
+    `benchmark` is a price level series aligned with `equity`; `gross_exposure` is the gross
+    position value and `traded_value` the traded notional on each bar.
+    """
+    equity = np.asarray(equity, dtype=float)
+    n = len(equity)
+    returns = np.zeros(n)
+    returns[1:] = equity[1:] / equity[:-1] - 1
+    periodic = returns[1:]
+    excess = periodic - risk_free_rate / periods_per_year
+
+    years = max(n - 1, 1) / periods_per_year
+    total_return = equity[-1] / equity[0] - 1
+    cagr = (equity[-1] / equity[0]) ** (1 / years) - 1 if equity[-1] > 0 else -1.0
+    std = periodic.std(ddof=1) if len(periodic) > 1 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2)) if len(excess) else 0.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    max_drawdown = drawdown.min()
+
+    metrics = {
+        "total_return": total_return,
+        "cagr": cagr,
+        "volatility": std * np.sqrt(periods_per_year),
+        "sharpe": excess.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0,
+        "sortino": excess.mean() / downside * np.sqrt(periods_per_year) if downside > 0 else 0.0,
+        "max_drawdown": max_drawdown,
+        "calmar": cagr / -max_drawdown if max_drawdown < 0 else 0.0,
+        "best_period": periodic.max() if len(periodic) else 0.0,
+        "worst_period": periodic.min() if len(periodic) else 0.0,
+        "hit_rate": (periodic > 0).mean() if len(periodic) else 0.0,
+    }
+    series = {
+        "equity": equity,
+        "returns": returns,
+        "drawdown": drawdown,
+        "rolling_volatility": _rolling_std(returns, window) * np.sqrt(periods_per_year),
+        "rolling_max_drawdown": _rolling_max_drawdown(equity, window),
+    }
+
+    if traded_value is not None:
+        traded_value = np.asarray(traded_value, dtype=float)
+        # One-way turnover: half of everything bought and sold, relative to average equity
+        metrics["turnover"] = traded_value.sum() / 2 / equity.mean() / years
+        series["traded_value"] = traded_value
+
+    if gross_exposure is not None:
+        exposure = np.asarray(gross_exposure, dtype=float) / equity
+        metrics["exposure"] = exposure.mean()
+        metrics["max_exposure"] = exposure.max()
+        series["exposure"] = exposure
+
+    if benchmark is not None:
+        benchmark = np.asarray(benchmark, dtype=float)
+        bench_returns = np.zeros(n)
+        bench_returns[1:] = benchmark[1:] / benchmark[:-1] - 1
+        bench_periodic = bench_returns[1:]
+        active = periodic - bench_periodic
+        bench_var = bench_periodic.var(ddof=1) if len(bench_periodic) > 1 else 0.0
+        beta = np.cov(periodic, bench_periodic, ddof=1)[0, 1] / bench_var if bench_var > 0 else 0.0
+        tracking_error = active.std(ddof=1) * np.sqrt(periods_per_year) if len(active) > 1 else 0.0
+        benchmark_return = benchmark[-1] / benchmark[0] - 1
+        metrics.update({
+            "benchmark_return": benchmark_return,
+            "excess_return": total_return - benchmark_return,
+            "beta": beta,
+            "alpha": (periodic.mean() - beta * bench_periodic.mean()) * periods_per_year,
+            "correlation": np.corrcoef(periodic, bench_periodic)[0, 1] if std > 0 and bench_var > 0 else 0.0,
+            "tracking_error": tracking_error,
+            "information_ratio": active.mean() * periods_per_year / tracking_error if tracking_error > 0 else 0.0,
+        })
+        series["benchmark_equity"] = equity[0] * benchmark / benchmark[0]
+
+    metrics = {name: float(value) for name, value in metrics.items()}
+    return PerformanceReport(metrics=metrics, series=pd.DataFrame(series, index=index))
+
+def analyze_result(result, benchmark: Optional[np.ndarray] = None, **kwargs) -> PerformanceReport:
+    """Report for a VectorizedBacktestResult or PortfolioBacktestResult"""
+    close = np.nan_to_num(result.close)
+    values = np.abs(result.shares * close)
+    traded = np.abs(result.executed * close)
+    if values.ndim > 1:
+        values, traded = values.sum(axis=1), traded.sum(axis=1)
+    index = getattr(result, "dates", None)
+    if index is None:
+        index = getattr(result, "index", None)
+    return performance_metrics(
+        result.equity, benchmark=benchmark, gross_exposure=values, traded_value=traded, index=index, **kwargs
+    )
+
+def benchmark_prices(quote_store, dates: pd.DatetimeIndex, ticker: str = "IBOV", column: str = "close") -> np.ndarray:
+    """Benchmark level from the quote store, forward-filled onto the backtest dates"""
+    quotes = quote_store.get(ticker, dates[0].strftime("%Y-%m-%d"), dates[-1].strftime("%Y-%m-%d"))[column]
+    return quotes.reindex(quotes.index.union(dates)).ffill().bfill().reindex(dates).to_numpy(dtype=float)
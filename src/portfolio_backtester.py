@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Standard B3 round lot; fractional-market tickers (suffix "F") trade in single shares
+B3_ROUND_LOT = 100
+
+def b3_lot_sizes(tickers: Iterable[str], round_lot: int = B3_ROUND_LOT) -> np.ndarray:
+    """Lot size per ticker: 1 on the fractional market (e.g. PETR4F), round_lot otherwise"""
+    return np.array([1 if ticker.endswith("F") else round_lot for ticker in tickers], dtype=float)
+
+@dataclass
+class PortfolioBacktestResult:
+    dates: pd.DatetimeIndex
+    tickers: list
+    close: np.ndarray
+    shares: np.ndarray
+    executed: np.ndarray
+    cash: np.ndarray
+    equity: np.ndarray
+    traded_value: np.ndarray
+    commissions: np.ndarray
+    initial_capital: float
+
+    @property
+    def total_return(self) -> float:
+        return self.equity[-1] / self.initial_capital - 1
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "cash": self.cash,
+                "traded_value": self.traded_value,
+                "commissions": self.commissions,
+                "Portfolio Value": self.equity,
+            },
+            index=self.dates,
+        )
+
+    def positions(self) -> pd.DataFrame:
+        """Shares held per (date, ticker)"""
+        return pd.DataFrame(self.shares, index=self.dates, columns=self.tickers)
+
+    def weights(self) -> pd.DataFrame:
+        """Marked-to-market weight of each ticker in the portfolio"""
+        values = np.nan_to_num(self.shares * self.close)
+        return pd.DataFrame(values / self.equity[:, None], index=self.dates, columns=self.tickers)
+
+class PortfolioBacktester:
+    """Multi-ticker backtester with holdings, cash and prices held as (date, ticker) NumPy arrays.
+
+    Each day's orders execute as one batch: sells first (capped at holdings), then buys rounded
+    down to lots and scaled back pro rata when they do not fit in the available cash.
+    """
+
+    def __init__(
+        self,
+        prices: pd.DataFrame,
+        initial_capital: float,
+        lot_sizes: Optional[Union[float, np.ndarray]] = None,
+        commission: float = 0.0
+    ):
+        self.dates = pd.DatetimeIndex(prices.index)
+        self.tickers = list(prices.columns)
+        self.raw_close = prices.to_numpy(dtype=float)
+        # Mark to market at the last traded price; NaN only before a ticker's first quote
+        self.close = prices.ffill().to_numpy(dtype=float)
+        self.initial_capital = initial_capital
+        self.lot_sizes = np.broadcast_to(
+            b3_lot_sizes(self.tickers) if lot_sizes is None else np.asarray(lot_sizes, dtype=float),
+            (len(self.tickers),)
+        )
+        self.commission = commission
+
+    def _round_lots(self, quantity: np.ndarray) -> np.ndarray:
+        return np.floor(quantity / self.lot_sizes) * self.lot_sizes
+
+    def _execute(self, orders: np.ndarray, shares: np.ndarray, cash: float, price: np.ndarray):
+        """Execute one day's signed orders; returns (executed, cash, traded value, commission)"""
+        tradable = ~np.isnan(price)
+        price = np.where(tradable, price, 0.0)
+        orders = np.where(tradable, np.trunc(np.nan_to_num(orders)), 0.0)
+
+        sells = np.minimum(np.maximum(-orders, 0.0), shares)
+        # Closing a whole position may include an odd lot; partial sells trade in round lots
+        sells = np.where(sells == shares, sells, self._round_lots(sells))
+        proceeds = sells @ price
+        available = cash + proceeds * (1 - self.commission)
+
+        buys = self._round_lots(np.maximum(orders, 0.0))
+        cost = buys @ price * (1 + self.commission)
+        if cost > available:
+            buys = self._round_lots(buys * max(available, 0.0) / cost)
+        buy_value = buys @ price
+
+        commission = (proceeds + buy_value) * self.commission
+        cash = cash + proceeds - buy_value - commission
+        return buys - sells, cash, proceeds + buy_value, commission
+
+    def _target_orders(self, weights: np.ndarray, shares: np.ndarray, cash: float, price: np.ndarray) -> np.ndarray:
+        """Orders that move holdings to the target weights of today's equity"""
+        equity = cash + np.nansum(shares * price)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            target = self._round_lots(np.nan_to_num(weights) * equity / price)
+        target = np.where(np.isnan(target), shares, target)
+        return target - shares
+
+    def _constructed_orders(
+        self, constructor, scores: np.ndarray, t: int, shares: np.ndarray, cash: float, cov_window: int
+    ) -> np.ndarray:
+        """Orders to the constructor's target weights for day t's scores, sized on today's book"""
+        price = self.close[t]
+        equity = cash + np.nansum(shares * price)
+        current = np.nan_to_num(shares * price / equity)
+        scores = np.where(np.isnan(self.raw_close[t]), 0.0, np.nan_to_num(scores))
+        cov = None
+        if constructor.scheme != "signal":
+            if t < cov_window:
+                return np.zeros_like(shares)
+            window = self.close[t - cov_window:t + 1]
+            # Tickers without a full window of returns are not bought
+            scores = np.where(np.isnan(window).any(axis=0), 0.0, scores)
+            returns = np.nan_to_num(window[1:] / window[:-1] - 1)
+            cov = np.atleast_2d(np.cov(returns, rowvar=False))
+        weights = constructor.target_weights(scores, cov, current)
+        return self._target_orders(weights, shares, cash, price)
+
+    def run(
+        self,
+        orders: Optional[Union[np.ndarray, pd.DataFrame]] = None,
+        target_weights: Optional[Union[np.ndarray, pd.DataFrame]] = None,
+        scores: Optional[Union[np.ndarray, pd.DataFrame]] = None,
+        constructor=None,
+        cov_window: int = 60
+    ) -> PortfolioBacktestResult:
+        """Backtest signed share orders, target weights or signal scores, all shaped (date, ticker).
+
+        Scores are sized each day by `constructor` (a PortfolioConstructor) from the current
+        weights and, for risk_parity and mean_variance, the covariance of the last `cov_window`
+        daily returns; those schemes stay in cash until the window is full.
+        """
+        plans = [plan for plan in (orders, target_weights, scores) if plan is not None]
+        if len(plans) != 1:
+            raise ValueError("Pass exactly one of orders, target_weights or scores")
+        if scores is not None and constructor is None:
+            raise ValueError("Sizing scores needs a constructor")
+        plan = np.asarray(plans[0], dtype=float)
+        if plan.shape != self.close.shape:
+            raise ValueError(f"Expected an array shaped {self.close.shape}, got {plan.shape}")
+
+        n_days, n_tickers = self.close.shape
+        shares = np.zeros((n_days, n_tickers))
+        executed = np.zeros((n_days, n_tickers))
+        cash = np.zeros(n_days)
+        traded_value = np.zeros(n_days)
+        commissions = np.zeros(n_days)
+
+        holdings, balance = np.zeros(n_tickers), float(self.initial_capital)
+        for t in range(n_days):
+            today = plan[t]
+            if target_weights is not None:
+                today = self._target_orders(today, holdings, balance, self.close[t])
+            elif scores is not None:
+                today = self._constructed_orders(constructor, today, t, holdings, balance, cov_window)
+            if today.any():
+                executed[t], balance, traded_value[t], commissions[t] = self._execute(
+                    today, holdings, balance, self.raw_close[t]
+                )
+                holdings = holdings + executed[t]
+            shares[t] = holdings
+            cash[t] = balance
+
+        equity = cash + np.nansum(shares * self.close, axis=1)
+        return PortfolioBacktestResult(
+            dates=self.dates,
+            tickers=self.tickers,
+            close=self.close,
+            shares=shares,
+            executed=executed,
+            cash=cash,
+            equity=equity,
+            traded_value=traded_value,
+            commissions=commissions,
+            initial_capital=self.initial_capital,
+        )
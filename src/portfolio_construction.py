@@ -0,0 +1,228 @@
+"""Long-only portfolio construction from per-ticker signals.
+
+Signals (direction * confidence, in [-1, 1]) become target weights under one of three schemes:
+signal-weighted, risk parity over the tickers with a positive signal, or mean-variance with
+alphas scaled from the signals. Every scheme respects a per-name cap and a gross budget, and
+the solvers warm-start from the previous solution, so daily rebalances over hundreds of names
+converge in a handful of vectorized iterations. Targets can then be throttled by turnover,
+rounded to B3 lots and emitted as the JSON orders Backtester.parse_action reads.
+"""
+import json
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.portfolio_backtester import b3_lot_sizes
+
+SCHEMES = ("signal", "risk_parity", "mean_variance")
+SIGNAL_DIRECTIONS = {"bullish": 1, "bearish": -1, "neutral": 0}
+
+@dataclass
+class ConstructionConstraints:
+    max_weight: float = 0.20
+    # Gross long exposure as a fraction of portfolio value; the rest stays in cash
+    budget: float = 1.0
+    # Cap on sum(|target - current|) per rebalance; None leaves turnover unconstrained
+    max_turnover: Optional[float] = None
+
+def signal_scores(analyses: Mapping[str, object], tickers: Sequence[str]) -> np.ndarray:
+    """direction * confidence per ticker from AnalystSignal-like objects (0 where missing)"""
+    scores = np.zeros(len(tickers))
+    for i, ticker in enumerate(tickers):
+        analysis = analyses.get(ticker)
+        if analysis is not None:
+            scores[i] = SIGNAL_DIRECTIONS[analysis.signal] * analysis.confidence
+    return scores
+
+def cap_weights(raw: np.ndarray, max_weight: float, budget: float) -> np.ndarray:
+    """Scale non-negative scores to the budget, moving any excess over max_weight pro rata to the rest"""
+    raw = np.maximum(np.nan_to_num(np.asarray(raw, dtype=float)), 0.0)
+    weights = np.zeros_like(raw)
+    if raw.sum() <= 0:
+        return weights
+    # Never more than the caps can hold
+    remaining = min(budget, max_weight * np.count_nonzero(raw))
+    free = raw > 0
+    while remaining > 1e-15 and free.any():
+        proposal = raw * free * remaining / raw[free].sum()
+        over = free & (weights + proposal > max_weight)
+        if not over.any():
+            weights += proposal
+            break
+        remaining -= (max_weight - weights[over]).sum()
+        weights[over] = max_weight
+        free &= ~over
+    return weights
+
+def project_capped_simplex(w: np.ndarray, max_weight: float, budget: float) -> np.ndarray:
+    """Euclidean projection onto {0 <= w <= max_weight, sum(w) <= budget}"""
+    clipped = np.clip(w, 0.0, max_weight)
+    if clipped.sum() <= budget:
+        return clipped
+    lo, hi = 0.0, float(w.max())
+    for _ in range(60):
+        tau = (lo + hi) / 2
+        if np.clip(w - tau, 0.0, max_weight).sum() > budget:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(w - hi, 0.0, max_weight)
+
+def risk_parity_weights(
+    cov: np.ndarray,
+    mask: Optional[np.ndarray] = None,
+    x0: Optional[np.ndarray] = None,
+    tol: float = 1e-10,
+    max_iter: int = 50,
+) -> np.ndarray:
+    """Equal-risk-contribution weights (summing to 1) over the masked assets.
+
+    Newton's method on 1/2 y'Σy - sum(log y) / n, whose minimizer has equal risk contributions
+    once normalized; warm-starting from a previous solution usually converges in 2-3 steps.
+    """
+    n_total = len(cov)
+    mask = np.ones(n_total, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    weights = np.zeros(n_total)
+    if not mask.any():
+        return weights
+    sigma = cov[np.ix_(mask, mask)]
+    n = len(sigma)
+    budget = np.full(n, 1.0 / n)
+    vol = np.sqrt(np.maximum(np.diag(sigma), 1e-18))
+    y = (1 / vol) if x0 is None or not (x0[mask] > 0).all() else x0[mask].copy()
+    # Rescale the starting point so y'Σy = 1, the optimum's scale
+    y /= np.sqrt(max(y @ sigma @ y, 1e-18))
+    for _ in range(max_iter):
+        gradient = sigma @ y - budget / y
+        if np.abs(gradient).max() < tol:
+            break
+        step = np.linalg.solve(sigma + np.diag(budget / y ** 2), gradient)
+        # Damp the step so every y stays positive
+        ratio = np.where(step > 0, y / np.maximum(step, 1e-300), np.inf)
+        y = y - min(1.0, 0.95 * ratio.min()) * step
+    weights[mask] = y / y.sum()
+    return weights
+
+def mean_variance_weights(
+    alpha: np.ndarray,
+    cov: np.ndarray,
+    constraints: ConstructionConstraints,
+    risk_aversion: float = 5.0,
+    x0: Optional[np.ndarray] = None,
+    tol: float = 1e-10,
+    max_iter: int = 500,
+) -> np.ndarray:
+    """argmax alpha'w - risk_aversion/2 w'Σw over the capped, budgeted long-only set.
+
+    Accelerated projected gradient (FISTA) with step 1 / (risk_aversion * largest eigenvalue).
+    """
+    lipschitz = risk_aversion * max(float(np.linalg.eigvalsh(cov)[-1]), 1e-18)
+    project = lambda w: project_capped_simplex(w, constraints.max_weight, constraints.budget)
+    w = project(np.zeros(len(alpha)) if x0 is None else x0)
+    z, t = w.copy(), 1.0
+    for _ in range(max_iter):
+        gradient = alpha - risk_aversion * (cov @ z)
+        w_next = project(z + gradient / lipschitz)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        z = w_next + (t - 1) / t_next * (w_next - w)
+        converged = np.abs(w_next - w).max() < tol
+        w, t = w_next, t_next
+        if converged:
+            break
+    return w
+
+def limit_turnover(target: np.ndarray, current: np.ndarray, max_turnover: Optional[float]) -> np.ndarray:
+    """Move from current toward target only as far as max_turnover allows"""
+    if max_turnover is None:
+        return target
+    turnover = np.abs(target - current).sum()
+    if turnover <= max_turnover:
+        return target
+    return current + (target - current) * (max_turnover / turnover)
+
+def shares_from_weights(
+    weights: np.ndarray,
+    prices: np.ndarray,
+    portfolio_value: float,
+    current_shares: np.ndarray,
+    lot_sizes: np.ndarray,
+) -> np.ndarray:
+    """Target share counts: buys rounded down to whole lots, exits closing odd lots too"""
+    prices = np.asarray(prices, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        target = np.nan_to_num(weights * portfolio_value / prices)
+    delta = np.trunc((target - current_shares) / lot_sizes) * lot_sizes
+    shares = current_shares + delta
+    return np.where(weights <= 0, 0.0, shares)
+
+def order_json(delta: float) -> str:
+    """One order in the form Backtester.parse_action expects"""
+    action = "buy" if delta > 0 else "sell" if delta < 0 else "hold"
+    return json.dumps({"action": action, "quantity": int(abs(delta))})
+
+class PortfolioConstructor:
+    """Turns per-ticker signals into target weights and lot-rounded orders.
+
+    The previous solution is kept and used to warm-start the next rebalance.
+    """
+
+    def __init__(
+        self,
+        scheme: str = "signal",
+        constraints: Optional[ConstructionConstraints] = None,
+        risk_aversion: float = 5.0,
+        information_coefficient: float = 0.05,
+    ):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown construction scheme: {scheme}")
+        self.scheme = scheme
+        self.constraints = constraints or ConstructionConstraints()
+        self.risk_aversion = risk_aversion
+        self.information_coefficient = information_coefficient
+        self._previous: Optional[np.ndarray] = None
+
+    def target_weights(
+        self,
+        scores: np.ndarray,
+        cov: Optional[np.ndarray] = None,
+        current: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Weights for the signals in `scores`; risk_parity and mean_variance need `cov`"""
+        if self.scheme != "signal" and cov is None:
+            raise ValueError(f"The {self.scheme} scheme needs a covariance matrix: pass cov")
+        scores = np.nan_to_num(np.asarray(scores, dtype=float))
+        c = self.constraints
+        warm = self._previous if self._previous is not None and len(self._previous) == len(scores) else None
+        if self.scheme == "signal":
+            weights = cap_weights(scores, c.max_weight, c.budget)
+        elif self.scheme == "risk_parity":
+            parity = risk_parity_weights(cov, scores > 0, warm)
+            weights = cap_weights(parity, c.max_weight, c.budget)
+        else:
+            # Grinold's rule: alpha = IC * volatility * score
+            alpha = self.information_coefficient * np.sqrt(np.diag(cov)) * scores
+            weights = mean_variance_weights(alpha, cov, c, self.risk_aversion, warm)
+        self._previous = weights
+        if current is not None:
+            weights = limit_turnover(weights, np.asarray(current, dtype=float), c.max_turnover)
+        return weights
+
+    def orders(
+        self,
+        tickers: Sequence[str],
+        scores: np.ndarray,
+        prices: np.ndarray,
+        current_shares: np.ndarray,
+        portfolio_value: float,
+        cov: Optional[np.ndarray] = None,
+        lot_sizes: Optional[np.ndarray] = None,
+    ) -> Dict[str, str]:
+        """JSON order per ticker that moves the book to its lot-rounded target weights"""
+        prices = np.asarray(prices, dtype=float)
+        current_shares = np.asarray(current_shares, dtype=float)
+        current = np.nan_to_num(current_shares * prices / portfolio_value)
+        weights = self.target_weights(scores, cov, current)
+        lots = b3_lot_sizes(tickers) if lot_sizes is None else np.asarray(lot_sizes, dtype=float)
+        target = shares_from_weights(weights, prices, portfolio_value, current_shares, lots)
+        return {ticker: order_json(delta) for ticker, delta in zip(tickers, target - current_shares)}
@@ -0,0 +1,259 @@
+"""Portfolio risk over quote panels: shrinkage covariance, VaR/CVaR, beta and position limits.
+
+Everything works on (days, assets) NumPy return arrays. RollingRisk keeps the sums the
+Ledoit-Wolf estimator needs over a rolling window, so a new bar costs O(N^2) rather than a
+full O(T * N^2) re-estimate, and a 300-asset book can be assessed inside each decision.
+"""
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.performance import TRADING_DAYS
+from src.windowed_sums import WindowedSums
+
+@dataclass
+class RiskLimits:
+    max_position_weight: float = 0.20
+    # Largest one-day VaR a single position may carry, as a fraction of portfolio value
+    max_position_var: float = 0.01
+    max_portfolio_var: float = 0.02
+    max_gross_exposure: float = 1.0
+
+@dataclass
+class RiskReport:
+    tickers: List[str]
+    weights: np.ndarray
+    level: float
+    volatility: float
+    parametric_var: float
+    parametric_cvar: float
+    historical_var: float
+    historical_cvar: float
+    betas: np.ndarray
+    component_var: np.ndarray
+    max_weights: np.ndarray
+    breaches: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        per_ticker = lambda values: {ticker: float(v) for ticker, v in zip(self.tickers, values)}
+        return {
+            "level": self.level,
+            "volatility": self.volatility,
+            "parametric_var": self.parametric_var,
+            "parametric_cvar": self.parametric_cvar,
+            "historical_var": self.historical_var,
+            "historical_cvar": self.historical_cvar,
+            "weights": per_ticker(self.weights),
+            "betas": per_ticker(self.betas),
+            "component_var": per_ticker(self.component_var),
+            "max_weights": per_ticker(self.max_weights),
+            "breaches": self.breaches,
+        }
+
+def _shrink(cov: np.ndarray, fourth: np.ndarray, n: int) -> Tuple[np.ndarray, float]:
+    """Ledoit-Wolf shrinkage of a 1/n covariance towards a scaled identity.
+
+    `fourth[i, j]` is the sum over observations of y_i^2 * y_j^2 for the demeaned returns y.
+    """
+    p = len(cov)
+    mu = np.trace(cov) / p
+    target = mu * np.eye(p)
+    delta = ((cov - target) ** 2).sum() / p
+    beta = (fourth / n - cov ** 2).sum() / (p * n)
+    shrinkage = min(beta, delta) / delta if delta > 0 else 0.0
+    return (1 - shrinkage) * cov + shrinkage * target, float(shrinkage)
+
+def ledoit_wolf(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Shrunk covariance of a (days, assets) return array and the shrinkage intensity used"""
+    x = np.asarray(returns, dtype=float)
+    y = x - x.mean(axis=0)
+    squares = y ** 2
+    return _shrink(y.T @ y / len(x), squares.T @ squares, len(x))
+
+def betas(cov: np.ndarray, benchmark: int = -1) -> np.ndarray:
+    """Beta of every column to the `benchmark` column of a covariance matrix"""
+    variance = cov[benchmark, benchmark]
+    return cov[:, benchmark] / variance if variance > 0 else np.zeros(len(cov))
+
+def historical_var(pnl: np.ndarray, level: float = 0.95) -> Tuple[float, float]:
+    """VaR and CVaR, as positive losses, of an empirical return or P&L sample"""
+    losses = -np.asarray(pnl, dtype=float)
+    if not len(losses):
+        return 0.0, 0.0
+    var = float(np.quantile(losses, level))
+    return var, float(losses[losses >= var].mean())
+
+def parametric_var(volatility, level: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """Gaussian VaR and CVaR of zero-mean returns with the given one-period volatility"""
+    normal = NormalDist()
+    z = normal.inv_cdf(level)
+    volatility = np.asarray(volatility, dtype=float)
+    return z * volatility, volatility * normal.pdf(z) / (1 - level)
+
+def max_position_weights(volatility: np.ndarray, limits: RiskLimits, level: float = 0.95) -> np.ndarray:
+    """Largest weight per asset allowed by both the weight cap and the per-position VaR cap"""
+    var, _ = parametric_var(volatility, level)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        by_var = np.where(var > 0, limits.max_position_var / var, np.inf)
+    return np.minimum(limits.max_position_weight, np.nan_to_num(by_var, nan=np.inf))
+
+def assess(
+    weights: np.ndarray,
+    cov: np.ndarray,
+    tickers: Sequence[str],
+    returns: Optional[np.ndarray] = None,
+    asset_betas: Optional[np.ndarray] = None,
+    level: float = 0.95,
+    limits: Optional[RiskLimits] = None,
+) -> RiskReport:
+    """Risk of a weight vector under a covariance matrix, with limit breaches listed"""
+    limits = limits or RiskLimits()
+    weights = np.asarray(weights, dtype=float)
+    marginal = cov @ weights
+    volatility = float(np.sqrt(max(weights @ marginal, 0.0)))
+    var, cvar = parametric_var(volatility, level)
+    z = NormalDist().inv_cdf(level)
+    component = weights * marginal / volatility * z if volatility > 0 else np.zeros(len(weights))
+    hist_var, hist_cvar = historical_var(returns @ weights, level) if returns is not None else (np.nan, np.nan)
+    max_weights = max_position_weights(np.sqrt(np.diag(cov)), limits, level)
+
+    breaches = [
+        f"{ticker} weight {w:.2%} exceeds limit {cap:.2%}"
+        for ticker, w, cap in zip(tickers, np.abs(weights), max_weights) if w > cap + 1e-12
+    ]
+    if var > limits.max_portfolio_var:
+        breaches.append(f"portfolio VaR {float(var):.2%} exceeds limit {limits.max_portfolio_var:.2%}")
+    gross = np.abs(weights).sum()
+    if gross > limits.max_gross_exposure + 1e-12:
+        breaches.append(f"gross exposure {gross:.2%} exceeds limit {limits.max_gross_exposure:.2%}")
+
+    return RiskReport(
+        tickers=list(tickers),
+        weights=weights,
+        level=level,
+        volatility=volatility * np.sqrt(TRADING_DAYS),
+        parametric_var=float(var),
+        parametric_cvar=float(cvar),
+        historical_var=hist_var,
+        historical_cvar=hist_cvar,
+        betas=asset_betas if asset_betas is not None else np.full(len(weights), np.nan),
+        component_var=component,
+        max_weights=max_weights,
+        breaches=breaches,
+    )
+
+class RollingRisk(WindowedSums):
+    """Ledoit-Wolf covariance of the last `window` return rows, updated in O(N^2) per row.
+
+    Keeps the sums of x, x x^T, x^2 x^T and x^2 (x^2)^T over the window, from which both the
+    demeaned covariance and the fourth moments of the shrinkage intensity follow exactly.
+    A NaN return counts as no move (see src.windowed_sums for how this compares to RollingCorrelation).
+    """
+
+    def __init__(self, n_assets: int, window: int = 252):
+        super().__init__(n_assets, window)
+
+    def _reset_sums(self, n: int) -> None:
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._cubic = np.zeros((n, n))
+        self._quartic = np.zeros((n, n))
+
+    def _add(self, x: np.ndarray, sign: float) -> None:
+        squares = x * x
+        self._sum += sign * x
+        self._cross += sign * np.outer(x, x)
+        self._cubic += sign * np.outer(squares, x)
+        self._quartic += sign * np.outer(squares, squares)
+
+    def _add_rows(self, rows: np.ndarray) -> None:
+        squares = rows * rows
+        self._sum += rows.sum(axis=0)
+        self._cross += rows.T @ rows
+        self._cubic += squares.T @ rows
+        self._quartic += squares.T @ squares
+
+    def update(self, returns: np.ndarray) -> None:
+        """Add one row of returns (NaN counts as no move), dropping the oldest once full"""
+        super().update(np.nan_to_num(np.asarray(returns, dtype=float)))
+
+    def covariance(self, columns: Optional[np.ndarray] = None, shrink: bool = True) -> Tuple[np.ndarray, float]:
+        """Covariance (1/n) of the window for a subset of columns, shrunk by default"""
+        n = self._count
+        index = np.arange(len(self._sum)) if columns is None else np.asarray(columns)
+        grid = np.ix_(index, index)
+        mean = self._sum[index] / n
+        cross, cubic, quartic = self._cross[grid], self._cubic[grid], self._quartic[grid]
+        cov = cross / n - np.outer(mean, mean)
+        if not shrink:
+            return cov, 0.0
+
+        squares = np.diag(cross)
+        mean_i, mean_j = mean[:, None], mean[None, :]
+        # Sum of (x_i - m_i)^2 (x_j - m_j)^2 over the window, expanded into the kept sums
+        fourth = (
+            quartic
+            - 2 * mean_j * cubic
+            - 2 * mean_i * cubic.T
+            + squares[:, None] * mean_j ** 2
+            + mean_i ** 2 * squares[None, :]
+            + 4 * mean_i * mean_j * cross
+            - 3 * n * mean_i ** 2 * mean_j ** 2
+        )
+        return _shrink(cov, fourth, n)
+
+class RiskEngine:
+    """Rolling risk of a fixed ticker universe plus a benchmark, fed by closing prices"""
+
+    def __init__(
+        self,
+        tickers: Iterable[str],
+        benchmark: str = "IBOV",
+        window: int = 252,
+        level: float = 0.95,
+        limits: Optional[RiskLimits] = None,
+    ):
+        self.tickers = list(tickers)
+        self.benchmark = benchmark
+        self.level = level
+        self.limits = limits or RiskLimits()
+        self.rolling = RollingRisk(len(self.tickers) + 1, window)
+        self._last_close: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_quotes(cls, quote_store, tickers: Iterable[str], start_date: str, end_date: str, **kwargs) -> "RiskEngine":
+        """Engine warmed up on the quote store's closes over [start_date, end_date]"""
+        engine = cls(tickers, **kwargs)
+        engine.warm_up(quote_store.panel(engine.tickers + [engine.benchmark], start_date, end_date))
+        return engine
+
+    def warm_up(self, prices: pd.DataFrame) -> "RiskEngine":
+        """Feed a (dates, tickers + benchmark) close panel"""
+        closes = prices[self.tickers + [self.benchmark]].ffill().to_numpy(dtype=float)
+        for row in closes:
+            self.update(row)
+        return self
+
+    def update(self, closes: np.ndarray) -> None:
+        """Advance one bar given the closes of tickers + benchmark, in that order"""
+        closes = np.asarray(closes, dtype=float)
+        if self._last_close is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.rolling.update(closes / self._last_close - 1)
+        self._last_close = np.where(np.isnan(closes), self._last_close, closes) if self._last_close is not None else closes
+
+    def covariance(self) -> np.ndarray:
+        """Shrunk daily covariance of the tickers (benchmark excluded)"""
+        return self.rolling.covariance(np.arange(len(self.tickers)))[0]
+
+    def betas(self) -> np.ndarray:
+        return betas(self.rolling.covariance(shrink=False)[0])[:-1]
+
+    def assess(self, positions: Mapping[str, float], portfolio_value: float) -> RiskReport:
+        """Risk of position values (negative for shorts) in a portfolio worth `portfolio_value`"""
+        weights = np.array([positions.get(ticker, 0.0) for ticker in self.tickers]) / portfolio_value
+        returns = self.rolling.returns()[:, :-1]
+        return assess(weights, self.covariance(), self.tickers, returns, self.betas(), self.level, self.limits)
@@ -0,0 +1,145 @@
+"""Bootstrap and Monte Carlo robustness analysis of backtest equity curves.
+
+Resampled return paths are generated and scored as (paths, days) NumPy arrays in chunks of
+`chunk_size` paths, so memory stays bounded at chunk_size * days floats whatever `n_paths` is.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.performance import TRADING_DAYS
+
+METRICS = ("total_return", "sharpe", "max_drawdown")
+
+@dataclass
+class RobustnessReport:
+    method: str
+    observed: Dict[str, float]
+    samples: Dict[str, np.ndarray]
+
+    @property
+    def n_paths(self) -> int:
+        return len(self.samples["total_return"])
+
+    def confidence_intervals(self, level: float = 0.95) -> Dict[str, Tuple[float, float]]:
+        """Percentile interval per metric"""
+        tail = (1 - level) / 2 * 100
+        return {
+            name: tuple(float(q) for q in np.percentile(values, [tail, 100 - tail]))
+            for name, values in self.samples.items()
+        }
+
+    def probability_of_loss(self) -> float:
+        return float((self.samples["total_return"] < 0).mean())
+
+    def to_dict(self, level: float = 0.95) -> Dict:
+        return {
+            "method": self.method,
+            "n_paths": self.n_paths,
+            "observed": self.observed,
+            "median": {name: float(np.median(values)) for name, values in self.samples.items()},
+            "confidence_level": level,
+            "confidence_intervals": self.confidence_intervals(level),
+            "probability_of_loss": self.probability_of_loss(),
+        }
+
+def equity_from_portfolio_values(portfolio_values: List[Dict]) -> np.ndarray:
+    """Equity array from Backtester.portfolio_values"""
+    return np.array([value["Portfolio Value"] for value in portfolio_values], dtype=float)
+
+def path_metrics(returns: np.ndarray, periods_per_year: int = TRADING_DAYS) -> Dict[str, np.ndarray]:
+    """Total return, Sharpe and max drawdown of each row of a (paths, days) return matrix"""
+    returns = np.atleast_2d(returns)
+    growth = np.cumprod(1 + returns, axis=1)
+    peaks = np.maximum(np.maximum.accumulate(growth, axis=1), 1.0)
+    std = returns.std(axis=1, ddof=1) if returns.shape[1] > 1 else np.zeros(len(returns))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, returns.mean(axis=1) / std * np.sqrt(periods_per_year), 0.0)
+    return {
+        "total_return": growth[:, -1] - 1,
+        "sharpe": sharpe,
+        "max_drawdown": np.minimum((growth / peaks - 1).min(axis=1), 0.0),
+    }
+
+def _block_bootstrap(returns: np.ndarray, n: int, block_size: int, rng: np.random.Generator) -> np.ndarray:
+    """(n, len(returns)) paths stitched from randomly placed contiguous blocks"""
+    days = len(returns)
+    block_size = min(block_size, days)
+    n_blocks = -(-days // block_size)
+    starts = rng.integers(0, days - block_size + 1, size=(n, n_blocks))
+    index = (starts[:, :, None] + np.arange(block_size)).reshape(n, -1)[:, :days]
+    return returns[index]
+
+def _permutation(returns: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    """(n, len(returns)) random reorderings of the same returns"""
+    return returns[np.argsort(rng.random((n, len(returns))), axis=1)]
+
+def resample(
+    returns: Sequence[float],
+    n_paths: int = 10000,
+    method: str = "block",
+    block_size: int = 5,
+    chunk_size: int = 2000,
+    seed: Optional[int] = None,
+    periods_per_year: int = TRADING_DAYS,
+) -> RobustnessReport:
+    """Score `n_paths` resampled versions of a return sequence.
+
+    method="block" draws a moving-block bootstrap of the returns, keeping short-range
+    autocorrelation; method="permutation" reshuffles their order (pass per-trade returns to
+    permute trades), which keeps the total return and varies the path and its drawdowns.
+    """
+    if method not in ("block", "permutation"):
+        raise ValueError(f"Unknown resampling method: {method}")
+    returns = np.asarray(returns, dtype=float)
+    if len(returns) < 2:
+        raise ValueError("Need at least two returns to resample")
+
+    rng = np.random.default_rng(seed)
+    samples = {name: np.empty(n_paths) for name in METRICS}
+    for lo in range(0, n_paths, chunk_size):
+        n = min(chunk_size, n_paths - lo)
+        if method == "block":
+            paths = _block_bootstrap(returns, n, block_size, rng)
+        else:
+            paths = _permutation(returns, n, rng)
+        for name, values in path_metrics(paths, periods_per_year).items():
+            samples[name][lo:lo + n] = values
+
+    observed = {name: float(values[0]) for name, values in path_metrics(returns, periods_per_year).items()}
+    return RobustnessReport(method=method, observed=observed, samples=samples)
+
+def analyze_equity(equity: Sequence[float], **kwargs) -> RobustnessReport:
+    """Resample the daily returns of an equity curve; see resample for the options"""
+    equity = np.asarray(equity, dtype=float)
+    return resample(equity[1:] / equity[:-1] - 1, **kwargs)
+
+def trade_returns(trades: List[Dict]) -> np.ndarray:
+    """Return of each closing trade in Backtester.trades: realized P&L over the portfolio value before it.
+
+    Buys add to the position at its average cost and each sell realizes (price - average cost)
+    on the shares sold; shares still held at the end are not counted.
+    """
+    shares, cost, returns = 0.0, 0.0, []
+    for trade in trades:
+        quantity, price = float(trade["quantity"]), float(trade["price"])
+        if trade["action"] == "buy":
+            shares, cost = shares + quantity, cost + quantity * price
+        elif trade["action"] == "sell" and shares > 0:
+            average = cost / shares
+            returns.append(quantity * (price - average) / trade["Portfolio Value"])
+            shares, cost = shares - quantity, cost - quantity * average
+    return np.array(returns)
+
+def analyze_backtest(portfolio_values: List[Dict], trades: Optional[List[Dict]] = None, **kwargs) -> RobustnessReport:
+    """Resample a Backtester run: daily returns for method="block", per-trade returns for "permutation"
+
+    Permutation needs the run's executed trades (Backtester.trades); reshuffling daily returns
+    would only reorder days, not the sequence of trades.
+    """
+    if kwargs.get("method") == "permutation":
+        if trades is None:
+            raise ValueError("Permutation resamples per-trade returns: pass Backtester.trades")
+        return resample(trade_returns(trades), **kwargs)
+    return analyze_equity(equity_from_portfolio_values(portfolio_values), **kwargs)
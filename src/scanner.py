@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Rank the whole B3 stock universe by the quant_agent's technical signal.
+
+Quotes come from a persistent QuoteStore, with uncovered tickers fetched concurrently on
+threads; indicator votes are then computed across a process pool, one batch of tickers per task:
+
+    python -m src.scanner --cache-dir .cache/quotes --output scan.parquet
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.agents import quant_agent, technical_features
+from src.data_providers.bar_store import calendar_days, resample_many
+from src.data_providers.quote_store import QuoteStore
+from src.tools.new_tools import list_tickers
+from src.utils import get_default_period_end
+
+SUB_SIGNALS = ("MACD", "RSI", "Bollinger", "OBV")
+SIGNAL_SCORES = {"bullish": 1, "bearish": -1, "neutral": 0}
+
+def load_universe() -> List[str]:
+    """Unique stock tickers listed by the API"""
+    return sorted({row["ticker"] for row in list_tickers() if row.get("ticker")})
+
+def load_quotes(
+    store: QuoteStore,
+    tickers: Iterable[str],
+    start_date: str,
+    end_date: str,
+    max_threads: int = 16,
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """Close and volume per ticker from the store, plus the error of every ticker that failed"""
+    def load(ticker):
+        return store.get(ticker, start_date, end_date)[["close", "volume"]]
+
+    tickers = list(tickers)
+    frames, errors = {}, {}
+    with ThreadPoolExecutor(max_threads) as pool:
+        futures = {ticker: pool.submit(load, ticker) for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                frames[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = str(e)
+    return frames, errors
+
+def score_ticker(ticker: str, quotes: pd.DataFrame) -> Dict:
+    """quant_agent's verdict on a quote window, flattened into one table row"""
+    features = technical_features(quotes)
+    state = {
+        "messages": [],
+        "data": {"ticker": ticker, "quotes": quotes, "features": features},
+        "metadata": {"show_reasoning": False},
+    }
+    analysis = quant_agent(state)["analyses"]["quant_agent"]
+    return {
+        "ticker": ticker,
+        "date": quotes.index[-1],
+        "close": features.close,
+        "signal": analysis.signal,
+        "confidence": analysis.confidence,
+        "score": SIGNAL_SCORES[analysis.signal] * analysis.confidence,
+        **{name.lower(): analysis.reasoning[name].signal for name in SUB_SIGNALS},
+        "rsi_value": features.rsi,
+        "obv_slope": features.obv_slope,
+        "bars": features.bars,
+    }
+
+def _score_batch(batch: List[Tuple[str, pd.DataFrame]]) -> List[Dict]:
+    return [score_ticker(ticker, quotes) for ticker, quotes in batch]
+
+def rank(rows: List[Dict]) -> pd.DataFrame:
+    """Most bullish first, then by confidence within each signal"""
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame(rows).sort_values(["score", "confidence", "ticker"], ascending=[False, False, True])
+    table.insert(0, "rank", range(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+def scan(
+    tickers: Optional[Iterable[str]] = None,
+    store: Optional[QuoteStore] = None,
+    end_date: Optional[str] = None,
+    lookback_days: int = 180,
+    min_bars: int = 35,
+    max_workers: Optional[int] = None,
+    batch_size: int = 25,
+    max_threads: int = 16,
+    frequency: Optional[str] = None,
+) -> pd.DataFrame:
+    """Ranked quant signals for `tickers` (default: the whole universe).
+
+    Tickers whose quotes fail to load or have fewer than `min_bars` bars are left out; the MACD
+    signal line needs about 35 bars before its crossovers mean anything. The load errors are
+    kept per ticker in `table.attrs["errors"]`. With a `frequency`
+    ('W', 'M' or 'nD') the daily quotes are resampled first and the indicators run on those bars;
+    the lookback is then widened as needed so `min_bars` of them fit.
+    """
+    tickers = list(tickers) if tickers is not None else load_universe()
+    store = store or QuoteStore()
+    end = pd.Timestamp(end_date or get_default_period_end())
+    if frequency:
+        lookback_days = max(lookback_days, calendar_days(frequency, min_bars))
+    start = end - timedelta(days=lookback_days)
+    frames, errors = load_quotes(store, tickers, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), max_threads)
+    if frequency:
+        frames = resample_many(frames, frequency)
+
+    items = [(ticker, frame) for ticker, frame in frames.items() if len(frame) >= min_bars]
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(batches) <= 1:
+        rows = [row for batch in batches for row in _score_batch(batch)]
+    else:
+        with ProcessPoolExecutor(min(max_workers, len(batches))) as pool:
+            rows = [row for batch_rows in pool.map(_score_batch, batches) for row in batch_rows]
+    table = rank(rows)
+    table.attrs["errors"] = errors
+    return table
+
+def write_table(table: pd.DataFrame, path: str) -> None:
+    """CSV, or Parquet when the path ends in .parquet (needs pyarrow)"""
+    if path.endswith(".parquet"):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank B3 stocks by the quant agent signal')
+    parser.add_argument('--tickers', type=str, nargs='+', help='Ticker symbols (default: every listed stock)')
+    parser.add_argument('--end-date', type=str, help='Last quote date (YYYY-MM-DD, default: latest session)')
+    parser.add_argument('--lookback-days', type=int, default=180, help='Calendar days of quotes per ticker (default: 180, widened to fit 35 bars with --frequency)')
+    parser.add_argument('--cache-dir', type=str, default='.cache/quotes', help='Persistent quote cache (default: .cache/quotes)')
+    parser.add_argument('--frequency', type=str, help="Score weekly ('W'), monthly ('M') or n-session ('5D') bars instead of daily ones")
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent quote downloads (default: 16)')
+    parser.add_argument('--top', type=int, default=20, help='Rows to print (default: 20)')
+    parser.add_argument('--output', type=str, help='Write the ranked table to this CSV or .parquet file')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    table = scan(
+        args.tickers, QuoteStore(args.cache_dir), args.end_date, args.lookback_days,
+        max_workers=args.workers, max_threads=args.threads, frequency=args.frequency,
+    )
+    print(table.head(args.top).to_string(index=False))
+    print(f"\nScanned {len(table)} tickers in {time.perf_counter() - started:.1f}s")
+    errors = table.attrs["errors"]
+    if errors:
+        print(f"{len(errors)} tickers failed to load:")
+        for ticker, error in sorted(errors.items()):
+            print(f"  {ticker}: {error}")
+    if args.output:
+        write_table(table, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -28,4 +28,17 @@ class SentimentAnalysis(BaseModel):
     confidence: float = Field(..., ge=0, le=1)
     source_count: int
     key_topics: List[str]
-    signal: Literal["bullish", "bearish", "neutral"]
\ No newline at end of file
+    signal: Literal["bullish", "bearish", "neutral"]
+
+class SignalReasoning(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    details: str
+
+class AnalystSignal(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float = Field(..., ge=0, le=1)
+    reasoning: Dict[str, SignalReasoning]
+
+class RiskAssessment(BaseModel):
+    max_position_size: float = Field(..., ge=0)
+    reasoning: str
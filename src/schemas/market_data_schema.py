@@ -1,5 +1,5 @@
 from typing import Dict, List, Optional, Union, Literal
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator, validator
 from datetime import datetime
 from enum import Enum
 
@@ -49,30 +49,91 @@ class Quote(BaseModel):
         return v
 
 class FinancialMetric(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     value: float
     currency: str
     unit: Optional[str] = None
 
-class BalanceSheet(BaseModel):
+def _section_total(section: Dict[str, FinancialMetric]) -> float:
+    return sum(metric.value for metric in section.values())
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator != 0 else 0
+
+class _ReadOnlySection(dict):
+    """Statement section that rejects in-place edits, which would leave the cached totals stale"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Statement sections are read-only; use model_copy(update=...) instead")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+class Statement(BaseModel):
+    """Base for statements whose aggregates are computed once, when the model is built.
+
+    Statements are immutable (fields, sections and metrics reject edits): the agents read the
+    aggregates many times per decision, so they are not re-summed on every access.
+    model_copy(update=...) builds a changed statement with fresh aggregates.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    _aggregates: Dict[str, float] = PrivateAttr(default_factory=dict)
+
+    @field_validator("*", mode="after")
+    @classmethod
+    def _freeze_sections(cls, value):
+        return _ReadOnlySection(value) if isinstance(value, dict) else value
+
+    def model_post_init(self, __context) -> None:
+        self._aggregates = self._compute_aggregates()
+
+    def _compute_aggregates(self) -> Dict[str, float]:
+        return {}
+
+    def model_copy(self, *, update=None, deep: bool = False):
+        copy = super().model_copy(update=update, deep=deep)
+        if update:
+            for name, value in update.items():
+                if isinstance(value, dict):
+                    copy.__dict__[name] = _ReadOnlySection(value)
+            copy._aggregates = copy._compute_aggregates()
+        return copy
+
+    def aggregates(self) -> Dict[str, float]:
+        """Compact numeric form: every aggregate by name"""
+        return dict(self._aggregates)
+
+class BalanceSheet(Statement):
     period: str
     statement_type: StatementType
     assets: Dict[str, FinancialMetric]
     liabilities: Dict[str, FinancialMetric]
     equity: Dict[str, FinancialMetric]
 
+    def _compute_aggregates(self) -> Dict[str, float]:
+        return {
+            "total_assets": _section_total(self.assets),
+            "total_liabilities": _section_total(self.liabilities),
+            "total_equity": _section_total(self.equity),
+        }
+
     @property
     def total_assets(self) -> float:
-        return sum(asset.value for asset in self.assets.values())
+        return self._aggregates["total_assets"]
 
     @property
     def total_liabilities(self) -> float:
-        return sum(liability.value for liability in self.liabilities.values())
+        return self._aggregates["total_liabilities"]
 
     @property
     def total_equity(self) -> float:
-        return sum(equity.value for equity in self.equity.values())
+        return self._aggregates["total_equity"]
 
-class IncomeStatement(BaseModel):
+class IncomeStatement(Statement):
     period: str
     statement_type: StatementType
     period_type: PeriodType
@@ -83,19 +144,27 @@ class IncomeStatement(BaseModel):
     ebit: FinancialMetric
     ebitda: FinancialMetric
 
+    def _compute_aggregates(self) -> Dict[str, float]:
+        revenue = self.revenue.value
+        return {
+            "gross_margin": _ratio(self.gross_profit.value, revenue),
+            "operating_margin": _ratio(self.operating_income.value, revenue),
+            "net_margin": _ratio(self.net_income.value, revenue),
+        }
+
     @property
     def gross_margin(self) -> float:
-        return self.gross_profit.value / self.revenue.value if self.revenue.value != 0 else 0
+        return self._aggregates["gross_margin"]
 
     @property
     def operating_margin(self) -> float:
-        return self.operating_income.value / self.revenue.value if self.revenue.value != 0 else 0
+        return self._aggregates["operating_margin"]
 
     @property
     def net_margin(self) -> float:
-        return self.net_income.value / self.revenue.value if self.revenue.value != 0 else 0
+        return self._aggregates["net_margin"]
 
-class CashFlow(BaseModel):
+class CashFlow(Statement):
     period: str
     statement_type: StatementType
     period_type: PeriodType
@@ -103,17 +172,24 @@ class CashFlow(BaseModel):
     investing: Dict[str, FinancialMetric]
     financing: Dict[str, FinancialMetric]
 
+    def _compute_aggregates(self) -> Dict[str, float]:
+        return {
+            "net_operating_cash_flow": _section_total(self.operating),
+            "net_investing_cash_flow": _section_total(self.investing),
+            "net_financing_cash_flow": _section_total(self.financing),
+        }
+
     @property
     def net_operating_cash_flow(self) -> float:
-        return sum(flow.value for flow in self.operating.values())
+        return self._aggregates["net_operating_cash_flow"]
 
     @property
     def net_investing_cash_flow(self) -> float:
-        return sum(flow.value for flow in self.investing.values())
+        return self._aggregates["net_investing_cash_flow"]
 
     @property
     def net_financing_cash_flow(self) -> float:
-        return sum(flow.value for flow in self.financing.values())
+        return self._aggregates["net_financing_cash_flow"]
 
 class FinancialRatios(BaseModel):
     period: str
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Cross-sectional fundamental screening of every listed company in one table.
+
+The latest ratios, market ratios, income statement and balance sheet of each company are
+flattened into one row; fundamentals_agent's scores and sector-relative percentiles are then
+computed as column operations over the whole table:
+
+    python -m src.screener --query "signal == 'bullish' and p_e_sector_pct < 0.3" --sort-by roe
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_providers.fundamentals_store import STATEMENT_FIELDS, parse_statement, statement_fields
+from src.data_providers.market_data_provider import MarketDataProvider
+from src.scanner import write_table
+
+FUNDAMENTAL_COLUMNS = tuple(name for fields in STATEMENT_FIELDS.values() for name in fields)
+PERCENTILE_METRICS = (
+    "roe", "net_margin", "operating_margin", "p_e", "p_b", "dividend_yield", "current_ratio", "debt_to_equity",
+)
+SUB_SIGNALS = ("profitability", "valuation", "financial_health")
+
+def fundamentals_row(financials: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten the latest of each statement into the columns fundamentals_agent reads.
+
+    Accepts raw API payloads as returned by MarketDataProvider.get_statements or already
+    parsed schema objects; missing values become NaN.
+    """
+    row = {}
+    for statement in STATEMENT_FIELDS:
+        items = financials.get(statement)
+        latest = (items[0] if items else None) if isinstance(items, list) else items
+        row.update(statement_fields(statement, parse_statement(statement, latest)))
+    return row
+
+def load_fundamentals(
+    provider: Optional[MarketDataProvider] = None,
+    tickers: Optional[Iterable[str]] = None,
+    max_threads: int = 16,
+) -> pd.DataFrame:
+    """One row per listed company with its sector fields and latest fundamentals.
+
+    Statements are fetched concurrently through the provider's cache; companies whose
+    statements fail to load are left out.
+    """
+    provider = provider or MarketDataProvider()
+    companies = provider.company_data
+    if tickers is not None:
+        companies = companies[companies["ticker"].isin(list(tickers))]
+    companies = companies[["ticker", "cvm_code", "trade_name", "sector", "subsector", "segment"]].reset_index(drop=True)
+
+    def load(cvm_code):
+        return fundamentals_row(provider.get_statements(cvm_code))
+
+    rows, keep = [], []
+    with ThreadPoolExecutor(max_threads) as pool:
+        futures = [pool.submit(load, cvm_code) for cvm_code in companies["cvm_code"]]
+        for i, future in enumerate(futures):
+            try:
+                rows.append(future.result())
+                keep.append(i)
+            except Exception:
+                continue
+    fundamentals = pd.DataFrame(rows, columns=list(FUNDAMENTAL_COLUMNS), index=keep)
+    return companies.loc[keep].join(fundamentals).reset_index(drop=True)
+
+def _signal(score: pd.Series, bullish_at: int) -> np.ndarray:
+    return np.select([score >= bullish_at, score == 0], ["bullish", "bearish"], "neutral")
+
+def score_fundamentals(table: pd.DataFrame) -> pd.DataFrame:
+    """fundamentals_agent's thresholds, signals and confidence as column operations"""
+    table = table.copy()
+    # The agent skips missing or zero ratios; NaN comparisons are False, so only zero needs masking
+    p_e, p_b = table["p_e"].where(table["p_e"] != 0), table["p_b"].where(table["p_b"] != 0)
+    liabilities = table["total_liabilities"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table["current_ratio"] = np.where(liabilities != 0, table["total_assets"] / liabilities, np.inf)
+        table["debt_to_equity"] = liabilities / table["total_equity"]
+
+    table["profitability_score"] = (
+        (table["roe"] > 0.15).astype(int) + (table["net_margin"] > 0.20) + (table["operating_margin"] > 0.15)
+    )
+    table["valuation_score"] = (p_e < 15).astype(int) + (p_b < 2) + (table["dividend_yield"] > 0.03)
+    table["health_score"] = (table["current_ratio"] > 1.5).astype(int) + (table["debt_to_equity"] < 1.0)
+
+    table["profitability"] = _signal(table["profitability_score"], 2)
+    table["valuation"] = _signal(table["valuation_score"], 2)
+    table["financial_health"] = _signal(table["health_score"], 1)
+
+    votes = table[list(SUB_SIGNALS)]
+    bullish, bearish = (votes == "bullish").sum(axis=1), (votes == "bearish").sum(axis=1)
+    table["signal"] = np.select([bullish > bearish, bearish > bullish], ["bullish", "bearish"], "neutral")
+    table["confidence"] = (np.maximum(bullish, bearish) / len(SUB_SIGNALS)).round(2)
+    return table
+
+def sector_percentiles(
+    table: pd.DataFrame,
+    metrics: Iterable[str] = PERCENTILE_METRICS,
+    levels: Iterable[str] = ("sector", "subsector"),
+) -> pd.DataFrame:
+    """Add `{metric}_{level}_pct`: the company's percentile rank among peers of the same level.
+
+    Higher values rank higher, so cheap valuations have low p_e percentiles. Companies without
+    a value or a sector get NaN.
+    """
+    table = table.copy()
+    metrics = list(metrics)
+    for level in levels:
+        ranks = table.groupby(level, dropna=True)[metrics].rank(pct=True)
+        for metric in metrics:
+            table[f"{metric}_{level}_pct"] = ranks[metric]
+    return table
+
+def build_screen(
+    provider: Optional[MarketDataProvider] = None,
+    tickers: Optional[Iterable[str]] = None,
+    max_threads: int = 16,
+) -> pd.DataFrame:
+    """Fundamentals, agent scores and sector percentiles for the whole universe"""
+    return sector_percentiles(score_fundamentals(load_fundamentals(provider, tickers, max_threads)))
+
+def screen(
+    table: pd.DataFrame,
+    query: Optional[str] = None,
+    sort_by: str = "confidence",
+    ascending: bool = False,
+    limit: Optional[int] = None,
+) -> pd.DataFrame:
+    """Filter with a DataFrame.query expression, then sort and cut to `limit` rows"""
+    if query:
+        table = table.query(query)
+    table = table.sort_values(sort_by, ascending=ascending, na_position="last")
+    return (table.head(limit) if limit else table).reset_index(drop=True)
+
+def read_table(path: str) -> pd.DataFrame:
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path, dtype={"cvm_code": str})
+
+def main():
+    parser = argparse.ArgumentParser(description='Screen B3 companies on fundamentals relative to their sector')
+    parser.add_argument('--tickers', type=str, nargs='+', help='Restrict to these tickers (default: every listed company)')
+    parser.add_argument('--input', type=str, help='Screen a table saved by --save instead of fetching statements')
+    parser.add_argument('--save', type=str, help='Save the full table to this CSV or .parquet file')
+    parser.add_argument('--query', type=str, help="Filter expression, e.g. \"roe > 0.15 and p_e_sector_pct < 0.3\"")
+    parser.add_argument('--sort-by', type=str, default='confidence', help='Column to sort by (default: confidence)')
+    parser.add_argument('--ascending', action='store_true', help='Sort in ascending order')
+    parser.add_argument('--limit', type=int, default=20, help='Rows to keep (default: 20)')
+    parser.add_argument('--output', type=str, help='Write the screened rows to this CSV or .parquet file')
+    args = parser.parse_args()
+
+    table = read_table(args.input) if args.input else build_screen(tickers=args.tickers)
+    if args.save:
+        write_table(table, args.save)
+    result = screen(table, args.query, args.sort_by, args.ascending, args.limit)
+    columns = ["ticker", "sector", "signal", "confidence", *SUB_SIGNALS, "roe", "p_e", "p_b", "dividend_yield"]
+    print(result[columns].to_string(index=False))
+    if args.output:
+        write_table(result, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from src import agents
+from src.agent_orchestrator import AgentOrchestrator
+from src.data_providers.market_data_provider import MarketDataProvider
+
+class RequestCoalescer:
+    """Collapses concurrent calls with the same key into a single execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.coalesced = 0
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+class LatencyTracker:
+    """Keeps a rolling window of request latencies per endpoint"""
+
+    def __init__(self, window: int = 1000):
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {endpoint: sorted(samples) for endpoint, samples in self._samples.items()}
+            counts = dict(self._counts)
+
+        def percentile(samples: List[float], q: float) -> float:
+            return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+        return {
+            endpoint: {
+                "count": counts[endpoint],
+                "mean_ms": 1000 * sum(samples) / len(samples),
+                "p50_ms": 1000 * percentile(samples, 0.50),
+                "p95_ms": 1000 * percentile(samples, 0.95),
+                "max_ms": 1000 * samples[-1],
+            }
+            for endpoint, samples in snapshot.items()
+        }
+
+class AnalysisService:
+    """Long-lived analysis service that keeps the orchestrator and market data caches warm"""
+
+    def __init__(
+        self,
+        orchestrator: Optional[AgentOrchestrator] = None,
+        provider: Optional[MarketDataProvider] = None
+    ):
+        # market_data_agent reads through agents.provider, so share it by default
+        self.provider = provider or agents.provider
+        self.orchestrator = orchestrator or AgentOrchestrator(show_reasoning=False)
+        self.coalescer = RequestCoalescer()
+        self.latency = LatencyTracker()
+        self.started_at = time.time()
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started_at, 3)}
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "latency": self.latency.summary(),
+            "coalesced_requests": self.coalescer.coalesced,
+            "quote_fetches": self.provider.quote_store.fetches,
+        }
+
+    def quotes(self, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+        """Daily quotes for a ticker from the warm quote store"""
+        def load():
+            frame = self.provider.get_quotes_df(ticker, start_date, end_date).reset_index()
+            frame["date"] = frame["date"].dt.strftime('%Y-%m-%d')
+            return {"ticker": ticker, "quotes": frame.to_dict(orient="records")}
+
+        return self.coalescer.run(("quotes", ticker, start_date, end_date), load)
+
+    def invalid_agents(self, agent_names: Any) -> Optional[str]:
+        """Why `agent_names` is not a list of the orchestrator's agent names, or None if it is (or is omitted)"""
+        if agent_names is None:
+            return None
+        if not isinstance(agent_names, list) or not all(isinstance(name, str) for name in agent_names):
+            return "Field agents must be a list of agent names"
+        unknown = [name for name in agent_names if name not in self.orchestrator.agents]
+        if unknown:
+            return f"Unknown agents: {', '.join(unknown)} (expected any of {', '.join(self.orchestrator.agents)})"
+        return None
+
+    def signals(
+        self,
+        ticker: str,
+        agent_names: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run the analyst agents for a ticker without going through the LLM"""
+        agent_names = agent_names or ["technical", "fundamental"]
+
+        def run():
+            _, outcomes = self.orchestrator.run_agents(ticker, agent_names, start_date, end_date)
+            return {
+                "ticker": ticker,
+                "analyses": {
+                    name: analysis.model_dump()
+                    for _, analyses, _ in outcomes
+                    for name, analysis in analyses.items()
+                },
+                "errors": {agent: error for agent, _, error in outcomes if error is not None},
+            }
+
+        return self.coalescer.run(("signals", ticker, tuple(agent_names), start_date, end_date), run)
+
+    def analyze(self, prompt: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+        """Full natural language analysis through AgentOrchestrator"""
+        def run():
+            return {"result": self.orchestrator.process_prompt(prompt, start_date, end_date)}
+
+        return self.coalescer.run(("analyze", prompt, start_date, end_date), run)
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    service: AnalysisService = None
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(
+        self,
+        endpoint: str,
+        fields: Dict[str, Any],
+        required: Sequence[str],
+        handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+        validate: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None
+    ) -> None:
+        """Run `handler` on the request fields; 400 if a required field is missing or `validate` returns an error, 500 on any error"""
+        start = time.perf_counter()
+        try:
+            missing = [name for name in required if name not in fields]
+            invalid = validate(fields) if validate is not None and not missing else None
+            if missing:
+                status, payload = 400, {"error": f"Missing field: {', '.join(missing)}"}
+            elif invalid:
+                status, payload = 400, {"error": invalid}
+            else:
+                status, payload = 200, handler(fields)
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        # Record before replying so a client reading /metrics right after sees this request
+        self.service.latency.record(endpoint, time.perf_counter() - start)
+        self._send(status, payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/health":
+            self._send(200, self.service.health())
+        elif url.path == "/metrics":
+            self._send(200, self.service.metrics())
+        elif url.path == "/quotes":
+            self._dispatch("/quotes", query, ["ticker"], lambda fields: self.service.quotes(
+                fields["ticker"], fields.get("start_date"), fields.get("end_date")
+            ))
+        else:
+            self._send(404, {"error": f"Unknown endpoint: {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send(400, {"error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(body, dict):
+            self._send(400, {"error": "Expected a JSON object"})
+            return
+
+        if url.path == "/signals":
+            self._dispatch("/signals", body, ["ticker"], lambda fields: self.service.signals(
+                fields["ticker"], fields.get("agents"), fields.get("start_date"), fields.get("end_date")
+            ), validate=lambda fields: self.service.invalid_agents(fields.get("agents")))
+        elif url.path == "/analyze":
+            self._dispatch("/analyze", body, ["prompt"], lambda fields: self.service.analyze(
+                fields["prompt"], fields.get("start_date"), fields.get("end_date")
+            ))
+        else:
+            self._send(404, {"error": f"Unknown endpoint: {url.path}"})
+
+    def log_message(self, format, *args):
+        # Latency is tracked in /metrics; keep stderr quiet under load
+        pass
+
+def make_server(service: AnalysisService, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """Create a threaded HTTP server bound to the given service"""
+    handler = type("BoundAnalysisRequestHandler", (AnalysisRequestHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description='AI Market Analysis Service')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    args = parser.parse_args()
+
+    server = make_server(AnalysisService(), args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
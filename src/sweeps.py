@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Parameter sweeps and walk-forward runs of rule-based strategies across a process pool.
+
+Prices for every ticker are loaded once, written to memory-mapped .npy files and opened
+read-only by each worker, so nothing but the small run configs is sent between processes:
+
+    python -m src.sweeps --tickers PETR4 VALE3 --start-date 2022-01-01 --end-date 2024-06-28 \\
+        --short 5 10 20 --long 50 100 --walk-forward --train-days 252 --test-days 63
+"""
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.performance import analyze_result
+from src.tools import get_price_data
+from src.vectorized_backtester import (
+    ALL,
+    VectorizedBacktestResult,
+    orders_from_signals,
+    quant_signals,
+    run_vectorized_backtest,
+    sma_crossover_signals,
+)
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+SWEEP_METRICS = ("total_return", "sharpe", "sortino", "calmar", "max_drawdown", "turnover", "exposure")
+
+# Strategy name -> function of (price frame, **params) returning +1/-1/0 signals per bar
+STRATEGIES: Dict[str, Callable[..., np.ndarray]] = {
+    "sma_crossover": lambda prices, short=5, long=20: sma_crossover_signals(prices["close"], short, long),
+    "quant": lambda prices: quant_signals(prices),
+}
+
+@dataclass
+class SweepConfig:
+    ticker: str
+    start_date: str
+    end_date: str
+    initial_capital: float = 100000
+    strategy: str = "sma_crossover"
+    params: Dict[str, Any] = field(default_factory=dict)
+    quantity: float = ALL
+
+class SharedPrices:
+    """Price frames stored as memory-mapped (len(PRICE_COLUMNS) + 1, n) float64 arrays, one per ticker.
+
+    Row 0 holds the dates as days since the epoch. Only the directory path is pickled to workers.
+    """
+
+    def __init__(self, directory: str, owner: bool = False):
+        self.directory = directory
+        self.owner = owner
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def create(cls, frames: Dict[str, pd.DataFrame], directory: Optional[str] = None) -> "SharedPrices":
+        owner = directory is None
+        directory = directory or tempfile.mkdtemp(prefix="sweep-prices-")
+        for ticker, frame in frames.items():
+            days = frame.index.values.astype("datetime64[D]").astype(np.float64)
+            block = np.vstack([days] + [frame[column].to_numpy(dtype=np.float64) for column in PRICE_COLUMNS])
+            np.save(os.path.join(directory, f"{ticker}.npy"), block)
+        return cls(directory, owner=owner)
+
+    def __getstate__(self):
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def array(self, ticker: str) -> np.ndarray:
+        if ticker not in self._arrays:
+            self._arrays[ticker] = np.load(os.path.join(self.directory, f"{ticker}.npy"), mmap_mode="r")
+        return self._arrays[ticker]
+
+    def frame(self, ticker: str, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Price frame for `ticker`, up to and including `end_date`"""
+        block = self.array(ticker)
+        stop = block.shape[1]
+        if end_date is not None:
+            stop = np.searchsorted(block[0], _days(end_date), side="right")
+        index = pd.DatetimeIndex(block[0, :stop].astype("datetime64[D]"), name="Date")
+        return pd.DataFrame({column: block[i + 1, :stop] for i, column in enumerate(PRICE_COLUMNS)}, index=index)
+
+    def close(self):
+        self._arrays.clear()
+        if self.owner:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _days(date) -> float:
+    return float(np.datetime64(pd.Timestamp(date).date(), "D").astype(np.float64))
+
+def load_price_frames(tickers: Iterable[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+    """One get_price_data request per ticker covering the whole sweep"""
+    frames = {}
+    for ticker in tickers:
+        frame = get_price_data(ticker, start_date, end_date)
+        if frame.index.tz is not None:
+            frame.index = frame.index.tz_localize(None)
+        frames[ticker] = frame
+    return frames
+
+def backtest_metrics(result: VectorizedBacktestResult, periods_per_year: int = 252) -> Dict[str, float]:
+    """Headline metrics of a single run"""
+    if not len(result.equity):
+        metrics = dict.fromkeys(SWEEP_METRICS, 0.0)
+    else:
+        report = analyze_result(result, periods_per_year=periods_per_year)
+        metrics = {name: report.metrics[name] for name in SWEEP_METRICS}
+    return {
+        **metrics,
+        "trades": int(np.count_nonzero(result.executed)),
+        "final_value": result.equity[-1] if len(result.equity) else result.initial_capital,
+    }
+
+def run_config(prices: SharedPrices, config: SweepConfig) -> Dict[str, Any]:
+    """Backtest one configuration; indicators see all history before start_date as warm-up"""
+    frame = prices.frame(config.ticker, config.end_date)
+    signals = STRATEGIES[config.strategy](frame, **config.params)
+    trading = frame.index >= pd.Timestamp(config.start_date)
+    orders = orders_from_signals(signals[trading], config.quantity)
+    result = run_vectorized_backtest(frame["close"][trading], orders, config.initial_capital)
+    return {
+        "ticker": config.ticker,
+        "start_date": config.start_date,
+        "end_date": config.end_date,
+        "initial_capital": config.initial_capital,
+        "strategy": config.strategy,
+        **config.params,
+        **backtest_metrics(result),
+    }
+
+_worker_prices: Optional[SharedPrices] = None
+
+def _init_worker(prices: SharedPrices):
+    global _worker_prices
+    _worker_prices = prices
+
+def _run_in_worker(config: SweepConfig) -> Dict[str, Any]:
+    return run_config(_worker_prices, config)
+
+def parameter_grid(
+    tickers: Iterable[str],
+    date_ranges: Iterable[Tuple[str, str]],
+    params: Dict[str, Iterable[Any]],
+    initial_capitals: Iterable[float] = (100000,),
+    strategy: str = "sma_crossover",
+) -> List[SweepConfig]:
+    """Cartesian product of tickers, date ranges, strategy parameters and capitals"""
+    names = list(params)
+    configs = []
+    for ticker, (start, end), values, capital in itertools.product(
+        tickers, date_ranges, itertools.product(*params.values()), initial_capitals
+    ):
+        config_params = dict(zip(names, values))
+        if strategy == "sma_crossover" and config_params.get("short", 0) >= config_params.get("long", np.inf):
+            continue
+        configs.append(SweepConfig(ticker, start, end, capital, strategy, config_params))
+    return configs
+
+def run_sweep(
+    configs: List[SweepConfig],
+    prices: Optional[SharedPrices] = None,
+    max_workers: Optional[int] = None,
+    warmup_days: int = 180,
+) -> pd.DataFrame:
+    """Run every configuration on a process pool and collect one metrics row per run"""
+    if not configs:
+        return pd.DataFrame()
+
+    owned = prices is None
+    if owned:
+        start = min(pd.Timestamp(c.start_date) for c in configs) - timedelta(days=warmup_days)
+        end = max(pd.Timestamp(c.end_date) for c in configs)
+        frames = load_price_frames(sorted({c.ticker for c in configs}), start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        prices = SharedPrices.create(frames)
+
+    try:
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_workers == 1:
+            rows = [run_config(prices, config) for config in configs]
+        else:
+            chunksize = max(1, len(configs) // (4 * max_workers))
+            with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(prices,)) as pool:
+                rows = list(pool.map(_run_in_worker, configs, chunksize=chunksize))
+    finally:
+        if owned:
+            prices.close()
+    return pd.DataFrame(rows)
+
+def walk_forward_splits(
+    dates: pd.DatetimeIndex,
+    train_days: int,
+    test_days: int,
+    step_days: Optional[int] = None,
+) -> List[Tuple[str, str, str, str]]:
+    """Rolling (train_start, train_end, test_start, test_end) windows counted in trading days"""
+    step_days = step_days or test_days
+    splits = []
+    fmt = "%Y-%m-%d"
+    for start in range(0, len(dates) - train_days - test_days + 1, step_days):
+        train = dates[start:start + train_days]
+        test = dates[start + train_days:start + train_days + test_days]
+        splits.append((train[0].strftime(fmt), train[-1].strftime(fmt), test[0].strftime(fmt), test[-1].strftime(fmt)))
+    return splits
+
+def walk_forward(
+    tickers: Iterable[str],
+    start_date: str,
+    end_date: str,
+    params: Dict[str, Iterable[Any]],
+    train_days: int = 252,
+    test_days: int = 63,
+    step_days: Optional[int] = None,
+    initial_capital: float = 100000,
+    strategy: str = "sma_crossover",
+    metric: str = "sharpe",
+    max_workers: Optional[int] = None,
+    warmup_days: int = 180,
+    prices: Optional[SharedPrices] = None,
+) -> pd.DataFrame:
+    """Pick the best parameters on each training window by `metric` and score them out of sample"""
+    tickers = list(tickers)
+    owned = prices is None
+    if owned:
+        warmup_start = (pd.Timestamp(start_date) - timedelta(days=warmup_days)).strftime("%Y-%m-%d")
+        prices = SharedPrices.create(load_price_frames(tickers, warmup_start, end_date))
+
+    try:
+        train_configs, splits = [], {}
+        for ticker in tickers:
+            dates = prices.frame(ticker, end_date).index
+            dates = dates[dates >= pd.Timestamp(start_date)]
+            splits[ticker] = walk_forward_splits(dates, train_days, test_days, step_days)
+            date_ranges = [(train_start, train_end) for train_start, train_end, _, _ in splits[ticker]]
+            train_configs += parameter_grid([ticker], date_ranges, params, [initial_capital], strategy)
+
+        train = run_sweep(train_configs, prices, max_workers)
+        test_configs, train_scores = [], []
+        for ticker in tickers:
+            for train_start, _, test_start, test_end in splits[ticker]:
+                window = train[(train["ticker"] == ticker) & (train["start_date"] == train_start)]
+                best = window.loc[window[metric].idxmax()]
+                best_params = {name: best[name].item() if hasattr(best[name], "item") else best[name] for name in params}
+                test_configs.append(SweepConfig(ticker, test_start, test_end, initial_capital, strategy, best_params))
+                train_scores.append(best[metric])
+
+        test = run_sweep(test_configs, prices, max_workers)
+    finally:
+        if owned:
+            prices.close()
+
+    if test.empty:
+        return test
+    test.insert(0, "split", test.groupby("ticker").cumcount())
+    test[f"train_{metric}"] = train_scores
+    return test
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel parameter sweeps and walk-forward backtests')
+    parser.add_argument('--tickers', type=str, nargs='+', required=True, help='Ticker symbols')
+    parser.add_argument('--start-date', type=str, required=True, help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, required=True, help='End date (YYYY-MM-DD)')
+    parser.add_argument('--short', type=int, nargs='+', default=[5, 10, 20], help='Short SMA windows')
+    parser.add_argument('--long', type=int, nargs='+', default=[50, 100, 200], help='Long SMA windows')
+    parser.add_argument('--initial-capital', type=float, nargs='+', default=[100000], help='Initial capital amounts')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--walk-forward', action='store_true', help='Optimize on rolling train windows, score on test windows')
+    parser.add_argument('--train-days', type=int, default=252, help='Trading days per training window (default: 252)')
+    parser.add_argument('--test-days', type=int, default=63, help='Trading days per test window (default: 63)')
+    parser.add_argument('--metric', type=str, default='sharpe', help='Metric maximized on training windows (default: sharpe)')
+    parser.add_argument('--output', type=str, help='Write the metrics table to this CSV file')
+    args = parser.parse_args()
+
+    params = {"short": args.short, "long": args.long}
+    if args.walk_forward:
+        results = walk_forward(
+            args.tickers, args.start_date, args.end_date, params,
+            train_days=args.train_days, test_days=args.test_days,
+            initial_capital=args.initial_capital[0], metric=args.metric, max_workers=args.workers,
+        )
+    else:
+        configs = parameter_grid(args.tickers, [(args.start_date, args.end_date)], params, args.initial_capital)
+        results = run_sweep(configs, max_workers=args.workers)
+        results = results.sort_values(args.metric, ascending=False)
+
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
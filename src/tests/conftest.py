@@ -0,0 +1,18 @@
+import pandas as pd
+import pytest
+
+from src.data_providers.quote_store import QuoteStore
+
+@pytest.fixture
+def quote_store():
+    """Build an offline QuoteStore from {ticker: close Series, quotes DataFrame or Exception to raise}"""
+    def build(series):
+        def fetch(ticker, period_init=None, period_end=None):
+            quotes = series[ticker]
+            if isinstance(quotes, Exception):
+                raise quotes
+            if isinstance(quotes, pd.Series):
+                quotes = quotes.to_frame("close")
+            return quotes.loc[period_init:period_end]
+        return QuoteStore(fetch_quotes=fetch)
+    return build
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.backtester as backtester
+from src.backtester import Backtester
+from src.decision_store import DecisionStore
+
+def synthetic_prices(start_date, end_date):
+    index = pd.bdate_range(start_date, end_date, name="Date")
+    close = 10 + np.arange(len(index)) * 0.1
+    return pd.DataFrame({"open": close, "close": close, "high": close, "low": close, "volume": 1000}, index=index)
+
+def test_prices_are_loaded_once_and_sliced_per_day(monkeypatch):
+    fetches = []
+    def fake_get_price_data(ticker, start_date, end_date):
+        fetches.append((ticker, start_date, end_date))
+        return synthetic_prices(start_date, end_date)
+    monkeypatch.setattr(backtester, "get_price_data", fake_get_price_data)
+
+    windows = []
+    def agent(ticker, start_date, end_date, portfolio, prices):
+        windows.append((end_date, prices))
+        return json.dumps({"action": "buy", "quantity": 10})
+
+    bt = Backtester(agent, "PETR4", "2024-03-01", "2024-03-29", 10000)
+    bt.run_backtest()
+
+    assert fetches == [("PETR4", "2024-01-31", "2024-03-29")]
+    # 2024-03-29 is Good Friday, a B3 holiday
+    assert len(windows) == len(pd.bdate_range("2024-03-01", "2024-03-29")) - 1
+    assert "2024-03-29" not in [end_date for end_date, _ in windows]
+    for end_date, prices in windows:
+        assert prices.index[-1] == pd.Timestamp(end_date)
+        assert prices.index[0] >= pd.Timestamp(end_date) - pd.Timedelta(days=30)
+    assert np.shares_memory(windows[-1][1]["close"].to_numpy(), bt.price_data["close"].to_numpy())
+    assert bt.portfolio["stock"] == 10 * len(windows)
+
+def test_agents_with_the_original_signature_still_run(monkeypatch):
+    monkeypatch.setattr(backtester, "get_price_data", lambda ticker, start, end: synthetic_prices(start, end))
+    calls = []
+    def agent(ticker, start_date, end_date, portfolio):
+        calls.append(end_date)
+        return json.dumps({"action": "buy", "quantity": 1})
+    windows = []
+    def keyword_agent(ticker, start_date, end_date, portfolio, **inputs):
+        windows.append(inputs["prices"])
+        return json.dumps({"action": "hold", "quantity": 0})
+
+    bt = Backtester(agent, "PETR4", "2024-03-01", "2024-03-08", 10000)
+    bt.run_backtest()
+    Backtester(keyword_agent, "PETR4", "2024-03-01", "2024-03-08", 10000).run_backtest()
+
+    assert bt.agent_inputs == frozenset()
+    assert bt.portfolio["stock"] == len(calls) == 6
+    assert len(windows) == 6 and windows[-1].index[-1] == pd.Timestamp("2024-03-08")
+
+def test_decisions_are_replayed_and_runs_resume(monkeypatch, tmp_path):
+    monkeypatch.setattr(backtester, "get_price_data", lambda ticker, start, end: synthetic_prices(start, end))
+    store = DecisionStore(str(tmp_path / "decisions.db"))
+    calls, failures = [], ["2024-03-15"]
+    def agent(ticker, start_date, end_date, portfolio, prices):
+        if end_date in failures:
+            failures.remove(end_date)
+            raise RuntimeError("LLM timeout")
+        calls.append(end_date)
+        return json.dumps({"action": "buy", "quantity": 10})
+
+    bt = Backtester(agent, "PETR4", "2024-03-01", "2024-03-29", 10000, decision_store=store)
+    with pytest.raises(RuntimeError):
+        bt.run_backtest()
+    assert store.last_date("PETR4") == "2024-03-14"
+
+    calls.clear()
+    resumed = Backtester(agent, "PETR4", "2024-03-01", "2024-03-29", 10000, decision_store=store)
+    resumed.run_backtest()
+    assert calls[0] == "2024-03-15"
+    assert resumed.replayed == 10 and resumed.agent_calls == 10
+
+    # Changing the execution rules only replays the recorded decisions
+    calls.clear()
+    Backtester(agent, "PETR4", "2024-03-01", "2024-03-29", 5000, decision_store=store).run_backtest()
+    assert calls == []
+
+    # Unless only unchanged inputs may be replayed: a smaller portfolio changes every day's inputs
+    changed = Backtester(agent, "PETR4", "2024-03-01", "2024-03-29", 5000, decision_store=store, recompute_changed=True)
+    changed.run_backtest()
+    assert changed.agent_calls == 20
+    unchanged = Backtester(agent, "PETR4", "2024-03-01", "2024-03-29", 5000, decision_store=store, recompute_changed=True)
+    unchanged.run_backtest()
+    assert unchanged.agent_calls == 0
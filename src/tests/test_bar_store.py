@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import scanner
+from src.data_providers.bar_store import BarStore, parse_frequency, resample_many, resample_quotes
+from src.vectorized_backtester import quant_signals
+
+def _quotes(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.cumprod(1 + rng.normal(0, 0.02, len(dates)))
+    return pd.DataFrame({
+        "open": close * rng.uniform(0.98, 1.02, len(dates)),
+        "close": close,
+        "adj_close": close * 0.9,
+        "min": close * 0.97,
+        "max": close * 1.03,
+        "volume": rng.integers(1000, 5000, len(dates)).astype(float),
+    }, index=pd.DatetimeIndex(dates, name="date"))
+
+def test_weekly_and_monthly_bars_match_pandas_resample():
+    # Carnival and Good Friday leave short weeks
+    dates = pd.bdate_range("2024-01-01", "2024-06-28").drop(pd.to_datetime(["2024-02-12", "2024-02-13", "2024-03-29"]))
+    quotes = _quotes(dates, 0)
+    rules = {"open": "first", "close": "last", "adj_close": "last", "min": "min", "max": "max", "volume": "sum"}
+
+    weekly = resample_quotes(quotes, "W")
+    expected = quotes.resample("W-FRI").agg(rules)
+    np.testing.assert_allclose(weekly.to_numpy(), expected.to_numpy())
+    # Labelled with the last session of each bar: the Thursday before Good Friday
+    assert pd.Timestamp("2024-03-28") in weekly.index
+
+    monthly = resample_quotes(quotes, "monthly")
+    np.testing.assert_allclose(monthly.to_numpy(), quotes.resample("ME").agg(rules).to_numpy())
+    assert list(monthly.index) == list(quotes.groupby(quotes.index.to_period("M")).tail(1).index)
+
+def test_session_bars_are_counted_per_ticker():
+    frames = {"AAAA3": _quotes(pd.bdate_range("2024-01-01", "2024-01-31"), 1),
+              "BBBB3": _quotes(pd.bdate_range("2024-01-10", "2024-01-31"), 2)}
+    bars = resample_many(frames, "5D")
+    for ticker, frame in frames.items():
+        daily = frame.iloc[:5]
+        first = bars[ticker].iloc[0]
+        assert bars[ticker].index[0] == daily.index[-1]
+        assert first["open"] == daily["open"].iloc[0] and first["close"] == daily["close"].iloc[-1]
+        assert first["max"] == daily["max"].max() and first["volume"] == daily["volume"].sum()
+        assert len(bars[ticker]) == -(-len(frame) // 5)
+
+    with pytest.raises(ValueError):
+        parse_frequency("0D")
+
+def test_bar_store_reuses_cached_quotes(quote_store):
+    dates = pd.bdate_range("2022-01-03", "2024-06-28")
+    store = quote_store({ticker: _quotes(dates, ord(ticker[0])) for ticker in ("PETR4", "VALE3")})
+    bars = BarStore(store)
+    weekly = bars.get_many(["PETR4", "VALE3"], "W", "2022-01-03", "2024-06-28")
+    assert bars.resamples == 1 and store.fetches == 2
+
+    # Another timeframe over the same range, and repeats, cost no fetches
+    panel = bars.panel(["PETR4", "VALE3"], "M", "2022-01-03", "2024-06-28")
+    assert bars.get("PETR4", "W", "2022-01-03", "2024-06-28") is weekly["PETR4"]
+    assert store.fetches == 2 and bars.resamples == 2
+    assert list(panel.columns) == ["PETR4", "VALE3"] and len(panel) == 30
+
+    # Indicators and vectorized backtests run on the resampled bars as they are
+    assert len(quant_signals(weekly["PETR4"])) == len(weekly["PETR4"])
+
+def test_scan_on_higher_timeframes_with_default_lookback(quote_store):
+    store = quote_store({"WEEK3": _quotes(pd.bdate_range("2019-01-02", "2024-06-28"), 3)})
+    for frequency in ("W", "M", "5D"):
+        table = scanner.scan(["WEEK3"], store, end_date="2024-06-28", frequency=frequency)
+        assert len(table) == 1 and table["bars"].iloc[0] >= 35
+        assert table["date"].iloc[0] == pd.Timestamp("2024-06-28")
+
+    start = (pd.Timestamp("2024-06-28") - pd.Timedelta(days=365)).strftime("%Y-%m-%d")
+    weekly = scanner.scan(["WEEK3"], store, end_date="2024-06-28", lookback_days=365, frequency="W")
+    assert weekly["bars"].iloc[0] == len(resample_quotes(store.get("WEEK3", start, "2024-06-28"), "W"))
@@ -0,0 +1,34 @@
+from src import agents
+from src.benchmarks import bench_orchestrator, bench_suite
+from src.tools import new_tools
+
+def test_check_regressions():
+    baseline = {"a[1]": {"best": 1.0}, "b[1]": {"best": 1.0}}
+    results = {"a[1]": {"best": 1.2}, "b[1]": {"best": 1.5}, "new[1]": {"best": 9.0}}
+
+    assert bench_suite.check_regressions(results, baseline, threshold=0.3) == ["b[1]"]
+
+def test_quick_run_and_baseline_round_trip(tmp_path):
+    base_url = new_tools.base_url
+    results = bench_suite.run("provider.*", quick=True, repeat=2, min_time=0.001)
+
+    assert set(results) == {"provider.get_quotes_df_warm[1]", "provider.get_quotes_df_cold[1]", "provider.get_statements_warm[1]"}
+    assert new_tools.base_url == base_url
+
+    path = str(tmp_path / "baselines.json")
+    bench_suite.save_baseline(results, path)
+    assert bench_suite.check_regressions(results, bench_suite.load_baseline(path), threshold=0.0) == []
+
+def test_stored_baseline_covers_every_case():
+    baseline = bench_suite.load_baseline()
+
+    for case in bench_suite.CASES:
+        for size in case.sizes:
+            assert f"{case.name}[{size}]" in baseline
+
+def test_orchestrator_bench_restores_the_shared_globals():
+    base_url, provider = new_tools.base_url, agents.provider
+    results = bench_orchestrator.run(requests=2, llm_latency_ms=1, api_latency_ms=0, workers=[1], iterations=1)
+
+    assert results["cache"]["warm_requests"] == 0
+    assert new_tools.base_url == base_url and agents.provider is provider
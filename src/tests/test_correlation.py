@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.correlation import CorrelationService, RollingCorrelation
+from src.risk import RollingRisk
+
+def _returns(days, assets, seed=0):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, (days, 1))
+    return common * np.linspace(-1.5, 1.5, assets) + rng.normal(0, 0.01, (days, assets))
+
+def test_rolling_correlation_matches_pairwise_pandas():
+    returns = _returns(600, 8)
+    # Listings, suspensions and delistings leave gaps that pandas handles pairwise
+    returns[:350, 1] = np.nan
+    returns[400:430, 4] = np.nan
+    returns[550:, 6] = np.nan
+    rolling = RollingCorrelation(8, window=200).warm_up(returns[:300])
+    for row in returns[300:]:
+        rolling.update(row)
+
+    frame = pd.DataFrame(returns[-200:])
+    np.testing.assert_allclose(rolling.correlation(), frame.corr(min_periods=2).to_numpy(), atol=1e-10)
+    complete = [0, 2, 3, 5, 7]
+    np.testing.assert_allclose(rolling.covariance()[np.ix_(complete, complete)], np.cov(returns[-200:, complete], rowvar=False, ddof=0), atol=1e-15)
+    np.testing.assert_allclose(rolling.correlation(np.array([4]))[0], frame.corr()[4].to_numpy(), atol=1e-10)
+    assert rolling.pair_counts()[6, 0] == 150
+    assert np.isnan(rolling.correlation(min_periods=160)[6, 0])
+
+def test_ewma_correlation_matches_pandas():
+    returns = _returns(400, 3, seed=1)
+    rolling = RollingCorrelation(3, halflife=30).warm_up(returns)
+    frame = pd.DataFrame(returns)
+    expected = frame[0].ewm(halflife=30).corr(frame[2]).iloc[-1]
+    assert rolling.correlation()[0, 2] == pytest.approx(expected, abs=1e-10)
+
+def test_covariance_agrees_with_rolling_risk():
+    returns = _returns(500, 6, seed=2)
+    risk = RollingRisk(6, window=200).warm_up(returns[:250])
+    rolling = RollingCorrelation(6, window=200).warm_up(returns[:250])
+    for row in returns[250:]:
+        risk.update(row)
+        rolling.update(row)
+    np.testing.assert_allclose(risk.covariance(shrink=False)[0], rolling.covariance(), atol=1e-15)
+
+    # RollingRisk counts a gap as a 0% return, so it agrees with the zero-filled panel
+    gaps = returns.copy()
+    gaps[420:450, 2] = np.nan
+    risk = RollingRisk(6, window=200).warm_up(gaps)
+    filled = RollingCorrelation(6, window=200).warm_up(np.nan_to_num(gaps))
+    pairwise = RollingCorrelation(6, window=200).warm_up(gaps)
+    np.testing.assert_allclose(risk.covariance(shrink=False)[0], filled.covariance(), atol=1e-15)
+    assert not np.allclose(risk.covariance(shrink=False)[0][2], pairwise.covariance()[2], atol=1e-7)
+
+def test_service_queries_refresh_and_persistence(quote_store, tmp_path):
+    dates = pd.bdate_range("2023-01-02", "2024-06-28")
+    tickers = ["T0", "T1", "T2", "T3", "T4", "T5"]
+    returns = _returns(len(dates), len(tickers), seed=2)
+    closes = {ticker: pd.Series(50 * np.cumprod(1 + returns[:, i]), index=dates) for i, ticker in enumerate(tickers)}
+    store = quote_store(closes)
+
+    service = CorrelationService(tickers, window=120).refresh(store, "2024-03-28", start_date="2023-01-02")
+    path = str(tmp_path / "correlation" / "state.pkl")
+    service.save(path)
+    service = CorrelationService.load_or_create(path, tickers, window=120)
+    service.refresh(store, "2024-06-28")
+
+    full = CorrelationService(tickers, window=120).warm_up(store.panel(tickers, "2023-01-02", "2024-06-28"))
+    np.testing.assert_allclose(service.correlation().to_numpy(), full.correlation().to_numpy(), atol=1e-10)
+    expected = pd.DataFrame(returns[-120:]).corr().to_numpy()
+    np.testing.assert_allclose(service.correlation().to_numpy(), expected, atol=1e-10)
+
+    # Loadings run from -1.5 to 1.5, so T5 moves with T4 and against T0
+    most = service.most_correlated("T5", k=2)
+    assert list(most.index) == ["T4", "T3"] and most.is_monotonic_decreasing
+    least = service.least_correlated("T5", k=2)
+    assert list(least.index) == ["T0", "T1"] and least.iloc[0] < -0.5
+
+    pairs = service.top_pairs(k=3)
+    assert list(zip(pairs["ticker"], pairs["other"]))[0] in {("T0", "T1"), ("T4", "T5")}
+    assert (pairs["observations"] == 120).all()
+    assert service.top_pairs(k=1, largest=False).iloc[0][["ticker", "other"]].tolist() == ["T0", "T5"]
+
+    # Different settings start from scratch
+    assert CorrelationService.load_or_create(path, tickers, window=60).last_date is None
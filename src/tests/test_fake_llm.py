@@ -0,0 +1,39 @@
+import json
+
+from src import agents
+from src.agent_orchestrator import AgentOrchestrator
+from src.data_providers.market_data_provider import MarketDataProvider
+from src.fake_llm import FakeChatModel, lognormal_latency
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.tools import new_tools
+
+def test_parse_prompt_returns_schema_valid_json():
+    orchestrator = AgentOrchestrator(llm=FakeChatModel())
+
+    parsed = orchestrator._parse_prompt("What's the momentum and valuation of VALE3?")
+
+    assert parsed == {
+        "agents": ["market_data", "technical", "fundamental"],
+        "ticker": "VALE3",
+        "focus_areas": ["technical", "fundamental"],
+    }
+
+def test_latency_distribution_is_seeded():
+    first = FakeChatModel(latency=lognormal_latency(0.001), seed=7)
+    second = FakeChatModel(latency=lognormal_latency(0.001), seed=7)
+
+    assert [first._next_latency() for _ in range(5)] == [second._next_latency() for _ in range(5)]
+
+def test_process_prompt_runs_offline(monkeypatch):
+    with FakeMarketDataAPI() as api:
+        monkeypatch.setattr(new_tools, "base_url", api.url)
+        monkeypatch.setattr(agents, "provider", MarketDataProvider())
+        llm = FakeChatModel()
+        orchestrator = AgentOrchestrator(llm=llm)
+
+        result = orchestrator.process_prompt("Technical analysis of ITUB4", "2024-01-01", "2024-06-28")
+
+    assert "ANALYSIS FOR ITUB4" in result
+    assert "TECHNICAL ANALYSIS" in result
+    assert "Recommended action" in result
+    assert llm.calls == 2
@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.backtester as backtester
+from src.agents import quant_agent, technical_features
+from src.backtester import Backtester
+from src.decision_store import DecisionStore
+from src.features import FeaturePipeline
+
+def random_walk_prices(periods=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, periods)))
+    close[50:53] = close[49]  # flat bars exercise the zero-change OBV and RSI paths
+    volume = rng.integers(1_000, 10_000, periods)
+    return pd.DataFrame({"close": close, "volume": volume}, index=pd.bdate_range("2023-01-02", periods=periods))
+
+@pytest.mark.parametrize("bars", [1, 2, 14, 15, 20, 35, 300])
+def test_incremental_features_match_batch_indicators(bars):
+    prices = random_walk_prices().iloc[:bars]
+
+    incremental = FeaturePipeline().warm_up(prices).snapshot()
+    batch = technical_features(prices)
+
+    for name, value in vars(batch).items():
+        np.testing.assert_allclose(getattr(incremental, name), value, rtol=1e-9, err_msg=name)
+
+def test_quant_agent_uses_precomputed_features():
+    prices = random_walk_prices()
+    features = FeaturePipeline().warm_up(prices).snapshot()
+    state = {"messages": [], "data": {"quotes": prices.iloc[-3:], "features": features}, "metadata": {"show_reasoning": False}}
+
+    with_features = quant_agent(state)["analyses"]["quant_agent"]
+    del state["data"]["features"]
+    state["data"]["quotes"] = prices
+    from_scratch = quant_agent(state)["analyses"]["quant_agent"]
+
+    assert with_features == from_scratch
+
+def test_backtester_advances_features_from_warmed_up_history(monkeypatch):
+    prices = random_walk_prices(periods=400).rename_axis("Date")
+    monkeypatch.setattr(backtester, "get_price_data", lambda ticker, start, end: prices.loc[start:end])
+
+    seen = []
+    def agent(ticker, start_date, end_date, portfolio, prices, features):
+        seen.append((end_date, features))
+        return json.dumps({"action": "hold", "quantity": 0})
+
+    bt = Backtester(agent, "PETR4", "2024-01-02", "2024-02-29", 10000, use_features=True, warmup_days=365)
+    bt.run_backtest()
+
+    assert seen[0][1].bars > 200
+    for end_date, features in seen:
+        expected = technical_features(prices.loc[bt.price_data.index[0]:end_date])
+        assert vars(features) == pytest.approx(vars(expected), nan_ok=True)
+    assert bt.feature_pipeline.bars == bt.price_data.index.searchsorted(pd.Timestamp(seen[-1][0]), side="right")
+
+def test_recompute_changed_reruns_when_the_feature_snapshot_changes(monkeypatch, tmp_path):
+    prices = random_walk_prices(periods=400).rename_axis("Date")
+    monkeypatch.setattr(backtester, "get_price_data", lambda ticker, start, end: prices.loc[start:end])
+    calls = []
+    def agent(ticker, start_date, end_date, portfolio, prices, features=None):
+        calls.append(end_date)
+        return json.dumps({"action": "hold", "quantity": 0})
+
+    def run(**settings):
+        calls.clear()
+        store = DecisionStore(str(tmp_path / "decisions.db"), run_id="run_hedge_fund")
+        Backtester(agent, "PETR4", "2024-01-02", "2024-01-31", 10000, decision_store=store, recompute_changed=True, **settings).run_backtest()
+        return len(calls)
+
+    days = run()
+    assert run() == 0
+    # Decisions made without indicators, or with a different warm-up, are not replayed
+    assert run(use_features=True, warmup_days=365) == days
+    assert run(use_features=True, warmup_days=365) == 0
+    assert run(use_features=True, warmup_days=120) == days
@@ -0,0 +1,124 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import src.backtester as backtester
+from src.backtester import Backtester
+from src.decision_store import DecisionStore
+from src.data_providers.fundamentals_store import FundamentalsStore, publication_date
+from src.schemas.market_data_schema import BalanceSheet
+
+def metric(value):
+    return {"value": value, "currency": "BRL"}
+
+def balance(period, assets, **extra):
+    return {
+        "period": period, "statement_type": "con", "assets": {"total": metric(assets)},
+        "liabilities": {"total": metric(assets / 2)}, "equity": {"total": metric(assets / 2)}, **extra,
+    }
+
+def fetchers(calls):
+    def fetch_balance(cvm_code, statement_type):
+        calls.append(cvm_code)
+        return [
+            balance("2023-06-30", 300.0),
+            # A late restatement of an old period must not replace the newer one
+            balance("2022-12-31", 999.0, publication_date="2023-10-02"),
+            balance("2023-03-31", 200.0),
+            balance("2022-12-31", 100.0),
+        ]
+    def fetch_market(cvm_code, statement_type):
+        return [{"date": "2023-05-02", "p_e": 8.0}, {"date": "2023-05-03", "p_e": 9.0}]
+    return {"balance": fetch_balance, "market_ratios": fetch_market}
+
+def test_publication_dates():
+    assert publication_date("balance", {"period": "2023-12-31"}) == pd.Timestamp("2024-03-30")
+    assert publication_date("income", {"period": "2023-09-30"}) == pd.Timestamp("2023-11-14")
+    assert publication_date("ratios", {"period": "2023-09-30", "published_at": "2023-10-27T18:00:00Z"}) == pd.Timestamp("2023-10-27")
+    assert publication_date("market_ratios", {"date": "2023-05-02"}) == pd.Timestamp("2023-05-02")
+
+def test_as_of_join_sees_only_published_statements(tmp_path):
+    calls = []
+    store = FundamentalsStore(str(tmp_path), fetchers=fetchers(calls))
+    dates = pd.bdate_range("2023-03-28", "2023-10-31")
+
+    joined = store.as_of_join("9512", dates)
+
+    assert list(joined.index) == list(dates)
+    total_assets = joined["total_assets"]
+    assert total_assets[:"2023-03-30"].isna().all()
+    assert (total_assets["2023-03-31":"2023-05-14"] == 100.0).all()
+    assert (total_assets["2023-05-15":"2023-08-13"] == 200.0).all()
+    assert (total_assets["2023-08-14":] == 300.0).all()
+    assert joined.loc["2023-10-31", "balance_period"] == pd.Timestamp("2023-06-30")
+    assert np.isnan(joined.loc["2023-05-01", "p_e"]) and joined.loc["2023-05-04", "p_e"] == 9.0
+
+    # Every query is as of a day the first fetch already covered, even in a fresh process
+    FundamentalsStore(str(tmp_path), fetchers=fetchers(calls)).as_of_join("9512", dates)
+    store.financials_as_of("9512", "2023-06-01")
+    assert calls == ["9512"]
+
+def test_financials_as_of_are_typed_and_latest_first(tmp_path):
+    store = FundamentalsStore(fetchers=fetchers([]))
+
+    financials = store.financials_as_of("9512", "2023-06-01")
+
+    assert [b.period for b in financials["balance"]] == ["2023-03-31", "2022-12-31"]
+    assert isinstance(financials["balance"][0], BalanceSheet)
+    assert [m.p_e for m in financials["market_ratios"]] == [9.0, 8.0]
+
+def test_backtester_hands_agents_point_in_time_financials(monkeypatch):
+    index = pd.bdate_range("2023-04-20", "2023-05-31", name="Date")
+    prices = pd.DataFrame({"close": 10.0, "volume": 1000}, index=index)
+    monkeypatch.setattr(backtester, "get_price_data", lambda ticker, start, end: prices.loc[start:end])
+
+    seen = {}
+    def agent(ticker, start_date, end_date, portfolio, prices, financials):
+        seen[end_date] = financials["balance"][0].total_assets
+        return json.dumps({"action": "hold", "quantity": 0})
+
+    store = FundamentalsStore(fetchers=fetchers([]))
+    Backtester(agent, "PETR4", "2023-05-10", "2023-05-19", 10000, fundamentals_store=store, cvm_code="9512").run_backtest()
+
+    assert seen["2023-05-12"] == 100.0
+    assert seen["2023-05-15"] == 200.0
+
+def test_recompute_changed_reruns_days_whose_filings_changed(monkeypatch, tmp_path):
+    index = pd.bdate_range("2023-04-20", "2023-05-31", name="Date")
+    prices = pd.DataFrame({"close": 10.0, "volume": 1000}, index=index)
+    monkeypatch.setattr(backtester, "get_price_data", lambda ticker, start, end: prices.loc[start:end])
+    calls = []
+    def agent(ticker, start_date, end_date, portfolio, prices, financials):
+        calls.append(end_date)
+        return json.dumps({"action": "hold", "quantity": 0})
+
+    def run(fetch):
+        decisions = DecisionStore(str(tmp_path / "decisions.db"))
+        store = FundamentalsStore(fetchers=fetch)
+        Backtester(agent, "PETR4", "2023-05-10", "2023-05-19", 10000, decision_store=decisions,
+                   recompute_changed=True, fundamentals_store=store, cvm_code="9512").run_backtest()
+
+    run(fetchers([]))
+    assert len(calls) == 8
+    calls.clear()
+    run(fetchers([]))
+    assert calls == []
+
+    # A restatement of 2023-03-31 filed on 2023-05-16 changes what the agents knew from that day on
+    restated = fetchers([])
+    original_balance = restated["balance"]
+    restated["balance"] = lambda cvm_code, statement_type: original_balance(cvm_code, statement_type) + [
+        balance("2023-03-31", 250.0, publication_date="2023-05-16")
+    ]
+    run(restated)
+    assert calls == ["2023-05-16", "2023-05-17", "2023-05-18", "2023-05-19"]
+
+def test_history_keeps_latest_version_of_each_period():
+    store = FundamentalsStore(fetchers=fetchers([]))
+
+    before = store.history("9512", "balance", "2023-06-01")
+    after = store.history("9512", "balance", "2023-12-29")
+
+    assert list(before["total_assets"]) == [100.0, 200.0]
+    assert list(after["total_assets"]) == [999.0, 200.0, 300.0]
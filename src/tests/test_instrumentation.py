@@ -0,0 +1,66 @@
+import json
+from uuid import uuid4
+
+from langchain_core.caches import InMemoryCache
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.fake_llm import FakeChatModel
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.instrumentation import LLMCallbackHandler, RecordingCache, llm_callback, recorder
+from src.tools import new_tools
+
+def test_http_and_agent_spans(monkeypatch, tmp_path):
+    recorder.clear()
+    with FakeMarketDataAPI() as api:
+        monkeypatch.setattr(new_tools, "base_url", api.url)
+        with recorder.span("agent", "market_data", ticker="PETR4"):
+            new_tools.get_quotes("PETR4", "2024-01-01", "2024-01-31")
+
+    http, agent = recorder.spans
+    assert http["category"] == "http"
+    assert http["name"] == "/tickers/{ticker}/quotes"
+    assert http["status"] == 200 and http["bytes"] > 0
+    assert http["agent"] == "market_data"
+    assert agent["category"] == "agent" and agent["duration"] >= http["duration"]
+
+    recorder.export_chrome_trace(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {event["ph"] for event in events} == {"X"}
+    assert "market_data" in recorder.format_summary()
+
+def test_llm_callback_records_tokens_cost_and_cache_hits():
+    recorder.clear()
+    handler = LLMCallbackHandler()
+    message = AIMessage(content="{}", usage_metadata={"input_tokens": 1000, "output_tokens": 500, "total_tokens": 1500})
+    generations = [[ChatGeneration(message=message)]]
+
+    run_id = uuid4()
+    handler.on_chat_model_start({}, [], run_id=run_id, invocation_params={"model": "gpt-4"})
+    handler.on_llm_end(LLMResult(generations=generations, llm_output={"model_name": "gpt-4"}), run_id=run_id)
+    # Providers may omit llm_output; that alone is not a cache hit
+    bare_run_id = uuid4()
+    handler.on_chat_model_start({}, [], run_id=bare_run_id, invocation_params={"model": "gpt-4"})
+    handler.on_llm_end(LLMResult(generations=generations), run_id=bare_run_id)
+    cached_run_id = uuid4()
+    cached = [[ChatGeneration(message=message, generation_info={"cache_hit": True})]]
+    handler.on_chat_model_start({}, [], run_id=cached_run_id, invocation_params={"model": "gpt-4"})
+    handler.on_llm_end(LLMResult(generations=cached), run_id=cached_run_id)
+
+    (row,) = recorder.summary()
+    assert row["name"] == "gpt-4" and row["count"] == 3
+    assert row["tokens"] == 4500
+    assert row["cache_hits"] == 1
+    assert abs(row["cost_usd"] - 0.12) < 1e-9
+
+def test_cache_hits_come_from_the_llm_cache_lookup():
+    recorder.clear()
+    llm = FakeChatModel(cache=RecordingCache(InMemoryCache()))
+    prompt = [HumanMessage(content="What's the momentum of PETR4?")]
+
+    first = llm.invoke(prompt, config={"callbacks": [llm_callback]})
+    second = llm.invoke(prompt, config={"callbacks": [llm_callback]})
+
+    assert first.content == second.content
+    assert llm.calls == 1
+    assert [span["cache_hit"] for span in recorder.spans] == [False, True]
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+
+from src.data_providers.fundamentals_store import statement_history
+from src.schemas.market_data_schema import BalanceSheet, CashFlow, FinancialMetric, IncomeStatement
+
+def metric(value):
+    return {"value": value, "currency": "BRL"}
+
+def balance(period, current_assets):
+    return BalanceSheet(
+        period=period, statement_type="con",
+        assets={"current": metric(current_assets), "non_current": metric(600.0)},
+        liabilities={"current": metric(200.0), "non_current": metric(250.0)},
+        equity={"capital": metric(300.0), "reserves": metric(150.0)},
+    )
+
+def test_aggregates_are_computed_at_construction():
+    sheet = balance("2023-12-31", 400.0)
+
+    assert sheet.aggregates() == {"total_assets": 1000.0, "total_liabilities": 450.0, "total_equity": 450.0}
+    assert "_aggregates" not in sheet.model_dump()
+    assert sheet.model_copy(update={"assets": {"total": FinancialMetric(**metric(10.0))}}).total_assets == 10.0
+
+    flows = CashFlow(
+        period="2023-12-31", statement_type="con", period_type="year",
+        operating={"net_income": metric(90.0), "depreciation": metric(30.0)},
+        investing={"capex": metric(-70.0)}, financing={"dividends": metric(-40.0)},
+    )
+    assert (flows.net_operating_cash_flow, flows.net_investing_cash_flow, flows.net_financing_cash_flow) == (120.0, -70.0, -40.0)
+
+    income = IncomeStatement(
+        period="2023-12-31", statement_type="con", period_type="year",
+        revenue=metric(0.0), gross_profit=metric(0.0), operating_income=metric(0.0),
+        net_income=metric(-5.0), ebit=metric(0.0), ebitda=metric(0.0),
+    )
+    assert income.net_margin == 0
+
+def test_statements_reject_edits_that_would_leave_totals_stale():
+    sheet = balance("2023-12-31", 400.0)
+    with pytest.raises(ValidationError):
+        sheet.assets = {"total": FinancialMetric(**metric(10.0))}
+    with pytest.raises(TypeError):
+        sheet.liabilities["debt"] = FinancialMetric(**metric(50.0))
+    with pytest.raises(TypeError):
+        sheet.equity.update(capital=FinancialMetric(**metric(50.0)))
+    with pytest.raises(ValidationError):
+        sheet.assets["current"].value = 1.0
+    assert sheet.total_assets == 1000.0
+
+    # The supported way to change a statement rebuilds its totals, and the copy is frozen too
+    changed = sheet.model_copy(update={"liabilities": {**sheet.liabilities, "debt": FinancialMetric(**metric(50.0))}})
+    assert changed.total_liabilities == sheet.total_liabilities + 50.0
+    with pytest.raises(TypeError):
+        changed.liabilities.pop("debt")
+
+def test_statement_history_is_columnar_and_sorted():
+    history = statement_history([balance("2023-12-31", 400.0), balance("2022-12-31", 100.0)])
+
+    assert list(history.index) == [pd.Timestamp("2022-12-31"), pd.Timestamp("2023-12-31")]
+    assert list(history["assets.current"]) == [100.0, 400.0]
+    assert list(history["total_assets"]) == [700.0, 1000.0]
+    assert history["total_equity"].dtype == float
@@ -0,0 +1,100 @@
+import pandas as pd
+
+from src import tools
+from src.agents import parse_sentiment, sentiment_agent
+from src.data_providers.news_store import NewsStore, parse_published, static_search
+from src.fake_llm import FakeChatModel
+
+def _article(url, published, title=None):
+    return {"url": url, "title": title or url, "content": "", "published_date": published}
+
+RESULTS = {
+    "PETR4 ações": [
+        _article("https://a/1", "Mon, 01 Jul 2024 12:30:00 GMT", "Petrobras lucro recorde"),
+        _article("https://a/2", "Fri, 14 Jun 2024 09:00:00 GMT"),
+        _article("https://a/3", "2024-06-20T15:00:00Z"),
+        _article("https://a/4", None),
+    ],
+    "petróleo": [
+        _article("https://a/2", "Fri, 14 Jun 2024 09:00:00 GMT"),
+        _article("https://b/1", "Wed, 26 Jun 2024 18:00:00 GMT"),
+    ],
+}
+
+def test_parse_published_handles_tavily_and_iso_dates():
+    parsed = parse_published(["Mon, 01 Jul 2024 12:30:00 GMT", "2024-06-20T15:00:00Z", None, "soon"])
+    assert list(parsed[:2]) == [pd.Timestamp("2024-07-01 12:30"), pd.Timestamp("2024-06-20 15:00")]
+    assert parsed[2:].isna().all()
+
+def test_news_up_to_date_is_served_locally(tmp_path):
+    calls = []
+    search = static_search(RESULTS)
+
+    def counting(query, max_results):
+        calls.append(query)
+        return search(query, max_results)
+
+    store = NewsStore(str(tmp_path), search=counting)
+    assert store.fetch(["PETR4 ações", "petróleo"], as_of="2024-07-01") == 2
+
+    # Each day of a backtest filters the stored results; nothing is searched again
+    for day, expected in [
+        ("2024-06-13", []),
+        ("2024-06-14", ["https://a/2"]),
+        ("2024-06-30", ["https://a/3", "https://a/2"]),
+        ("2024-07-01", ["https://a/1", "https://a/3", "https://a/2"]),
+    ]:
+        assert [a["url"] for a in store.news("PETR4 ações", day)["results"]] == expected
+    assert [a["url"] for a in store.news("PETR4 ações", "2024-07-01", max_results=1)["results"]] == ["https://a/1"]
+    assert sorted(calls) == ["PETR4 ações", "petróleo"]
+
+    # An article found by two queries is stored once
+    assert len(store._articles) == 5
+
+    # A new process reads the persisted store instead of searching
+    reloaded = NewsStore(str(tmp_path), search=counting)
+    assert [a["url"] for a in reloaded.news("petróleo", "2024-06-30")["results"]] == ["https://b/1", "https://a/2"]
+    assert len(calls) == 2 and reloaded.searches == 0
+
+def test_get_news_and_sentiment_agent_use_the_shared_store(monkeypatch):
+    store = NewsStore(search=static_search(RESULTS))
+    monkeypatch.setattr(tools, "_news_store", None)
+    tools.set_news_store(store)
+
+    response = tools.get_news("PETR4 ações", end_date="2024-06-30")
+    assert [a["url"] for a in response["results"]] == ["https://a/3", "https://a/2"]
+
+    state = {
+        "messages": [],
+        "data": {"ticker": "PETR4", "end_date": "2024-07-01"},
+        "metadata": {"show_reasoning": False, "llm": FakeChatModel()},
+    }
+    analysis = sentiment_agent(state)["analyses"]["sentiment_agent"]
+    assert analysis.signal == "bullish"
+    assert store.searches == 1
+
+class ScriptedChatModel(FakeChatModel):
+    reply: str = ""
+
+    def _respond(self, messages):
+        return self.reply
+
+def test_sentiment_agent_reads_fenced_json_and_falls_back_to_neutral(monkeypatch):
+    monkeypatch.setattr(tools, "_news_store", None)
+    tools.set_news_store(NewsStore(search=static_search(RESULTS)))
+    state = lambda reply: {
+        "messages": [],
+        "data": {"ticker": "PETR4", "end_date": "2024-07-01"},
+        "metadata": {"show_reasoning": False, "llm": ScriptedChatModel(reply=reply)},
+    }
+
+    fenced = '```json\n{"signal": "bearish", "confidence": 0.6, "reasoning": "Queda"}\n```'
+    analysis = sentiment_agent(state(fenced))["analyses"]["sentiment_agent"]
+    assert (analysis.signal, analysis.confidence) == ("bearish", 0.6)
+
+    for reply in ("The news looks good", '{"signal": "very bullish", "confidence": 0.9, "reasoning": "x"}', '{"signal": "bullish"}', "[]"):
+        analysis = sentiment_agent(state(reply))["analyses"]["sentiment_agent"]
+        assert (analysis.signal, analysis.confidence) == ("neutral", 0.0)
+        assert analysis.reasoning["News"].details.startswith("Unreadable sentiment response")
+
+    assert parse_sentiment('{"signal": "bullish", "confidence": 1.5, "reasoning": "x"}').signal == "neutral"
@@ -0,0 +1,122 @@
+import json
+import pandas as pd
+
+import src.agent_orchestrator as agent_orchestrator
+import src.orchestrator as orchestrator
+from src.fake_llm import FakeChatModel
+from src.schemas.analysis import AnalystSignal, RiskAssessment, SignalReasoning
+from src.schemas.portfolio import TradeDecision
+
+def fake_market_data_agent(state):
+    quotes = pd.DataFrame(
+        {"close": [10.0, 10.5, 11.0], "volume": [100, 120, 90]},
+        index=pd.date_range("2024-01-02", periods=3, freq="B")
+    )
+    return {"messages": [], "data": {**state["data"], "quotes": quotes}}
+
+def fake_analyst(name, signal):
+    def agent(state):
+        analysis = AnalystSignal(
+            signal=signal,
+            confidence=0.75,
+            reasoning={"Test": SignalReasoning(signal=signal, details="it's a test")}
+        )
+        return {"analyses": {name: analysis}, "data": state["data"]}
+    return agent
+
+def make_runner(monkeypatch):
+    monkeypatch.setattr(orchestrator, "market_data_agent", fake_market_data_agent)
+    monkeypatch.setattr(orchestrator, "quant_agent", fake_analyst("quant_agent", "bullish"))
+    monkeypatch.setattr(orchestrator, "fundamentals_agent", fake_analyst("fundamentals_agent", "bullish"))
+    monkeypatch.setattr(orchestrator, "sentiment_agent", fake_analyst("sentiment_agent", "neutral"))
+    return orchestrator.HedgeFundRunner(max_concurrency=4)
+
+def test_runner_batch_reuses_compiled_workflow(monkeypatch):
+    runner = make_runner(monkeypatch)
+    workflow = runner.workflow
+    inputs = [
+        {
+            "ticker": ticker,
+            "start_date": "2024-01-01",
+            "end_date": "2024-01-05",
+            "portfolio": {"cash": 10000.0, "stock": 0},
+        }
+        for ticker in ("PETR4", "VALE3", "ITUB4")
+    ]
+
+    outputs = runner.batch(inputs)
+
+    assert runner.workflow is workflow
+    assert len(outputs) == 3
+    for output in outputs:
+        decision = json.loads(output)
+        assert decision["action"] == "buy"
+        # 20% of 10000 at a price of 11.0
+        assert decision["quantity"] == 181
+
+    timings = runner.node_timings()
+    assert set(timings) == {"market_data", "quant", "fundamentals", "sentiment", "risk", "portfolio"}
+    assert all(stats["count"] == 3 for stats in timings.values())
+
+def test_runner_invoke_sells_on_bearish_consensus(monkeypatch):
+    monkeypatch.setattr(orchestrator, "market_data_agent", fake_market_data_agent)
+    monkeypatch.setattr(orchestrator, "quant_agent", fake_analyst("quant_agent", "bearish"))
+    monkeypatch.setattr(orchestrator, "fundamentals_agent", fake_analyst("fundamentals_agent", "bearish"))
+    monkeypatch.setattr(orchestrator, "sentiment_agent", fake_analyst("sentiment_agent", "neutral"))
+    runner = orchestrator.HedgeFundRunner()
+
+    output = runner.invoke("PETR4", "2024-01-01", "2024-01-05", {"cash": 0.0, "stock": 50})
+
+    assert json.loads(output) == {"action": "sell", "quantity": 50}
+
+def test_runner_run_returns_typed_analyses(monkeypatch):
+    monkeypatch.setattr(orchestrator, "market_data_agent", fake_market_data_agent)
+    monkeypatch.setattr(orchestrator, "quant_agent", fake_analyst("quant_agent", "bullish"))
+    monkeypatch.setattr(orchestrator, "fundamentals_agent", fake_analyst("fundamentals_agent", "bullish"))
+    monkeypatch.setattr(orchestrator, "sentiment_agent", fake_analyst("sentiment_agent", "neutral"))
+    runner = orchestrator.HedgeFundRunner(llm=FakeChatModel())
+
+    state = runner.run("PETR4", "2024-01-01", "2024-01-05", {"cash": 10000.0, "stock": 0})
+
+    analyses = state["analyses"]
+    assert isinstance(analyses["quant_agent"], AnalystSignal)
+    assert analyses["fundamentals_agent"].signal == "bullish"
+    assert analyses["sentiment_agent"].signal == "neutral"
+    assert isinstance(analyses["risk_management_agent"], RiskAssessment)
+    decision = analyses["portfolio_management_agent"]
+    assert isinstance(decision, TradeDecision)
+    assert (decision.action, decision.ticker, decision.quantity) == ("buy", "PETR4", 181)
+    assert state["metadata"]["llm"] is runner.llm
+
+def test_orchestrator_runs_agents_on_typed_state(monkeypatch):
+    monkeypatch.setattr(agent_orchestrator, "market_data_agent", fake_market_data_agent)
+    monkeypatch.setattr(agent_orchestrator, "quant_agent", fake_analyst("quant_agent", "bullish"))
+    monkeypatch.setattr(agent_orchestrator, "fundamentals_agent", fake_analyst("fundamentals_agent", "bearish"))
+    llm = FakeChatModel()
+
+    state, outcomes = agent_orchestrator.AgentOrchestrator(llm=llm).run_agents(
+        "PETR4", ["technical", "fundamental"], "2024-01-01", "2024-01-05"
+    )
+
+    assert [(name, error) for name, _, error in outcomes] == [
+        ("market_data", None), ("technical", None), ("fundamental", None)
+    ]
+    assert "quotes" in state["data"]
+    assert state["metadata"]["llm"] is llm
+    technical, fundamental = state["analyses"]["quant_agent"], state["analyses"]["fundamentals_agent"]
+    assert isinstance(technical, AnalystSignal) and isinstance(fundamental, AnalystSignal)
+    assert (technical.signal, fundamental.signal) == ("bullish", "bearish")
+    assert technical.reasoning["Test"].details == "it's a test"
+
+def test_process_prompt_formats_typed_signals(monkeypatch):
+    monkeypatch.setattr(agent_orchestrator, "market_data_agent", fake_market_data_agent)
+    monkeypatch.setattr(agent_orchestrator, "quant_agent", fake_analyst("quant_agent", "bullish"))
+    monkeypatch.setattr(agent_orchestrator, "fundamentals_agent", fake_analyst("fundamentals_agent", "bearish"))
+
+    result = agent_orchestrator.AgentOrchestrator(llm=FakeChatModel()).process_prompt(
+        "What's the momentum and valuation of PETR4?", "2024-01-01", "2024-01-05"
+    )
+
+    assert "TECHNICAL ANALYSIS:\nSignal: BULLISH" in result
+    assert "FUNDAMENTAL ANALYSIS:\nSignal: BEARISH" in result
+    assert "it's a test" in result
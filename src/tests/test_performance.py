@@ -0,0 +1,76 @@
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_providers.quote_store import QuoteStore
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.performance import analyze_result, benchmark_prices, performance_metrics
+from src.portfolio_backtester import PortfolioBacktester
+from src.tools import new_tools
+
+def random_equity(periods=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100_000 * np.exp(np.cumsum(np.concatenate([[0.0], rng.normal(0.0005, 0.01, periods - 1)])))
+
+def test_metrics_match_pandas_reference():
+    equity = random_equity()
+    report = performance_metrics(equity, window=21)
+    returns = pd.Series(equity).pct_change().dropna()
+
+    assert report.metrics["sharpe"] == pytest.approx(returns.mean() / returns.std() * np.sqrt(252))
+    downside = np.sqrt((np.minimum(returns, 0) ** 2).mean())
+    assert report.metrics["sortino"] == pytest.approx(returns.mean() / downside * np.sqrt(252))
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    assert report.metrics["max_drawdown"] == pytest.approx(drawdown.min())
+    assert report.metrics["calmar"] == pytest.approx(report.metrics["cagr"] / -drawdown.min())
+
+    rolling = pd.Series(equity).pct_change().fillna(0).rolling(21).std() * np.sqrt(252)
+    np.testing.assert_allclose(report.series["rolling_volatility"], rolling, equal_nan=True)
+    rolling_dd = pd.Series(equity).rolling(21).apply(lambda w: (w / np.maximum.accumulate(w) - 1).min(), raw=True)
+    np.testing.assert_allclose(report.series["rolling_max_drawdown"], rolling_dd, equal_nan=True)
+
+def test_benchmark_relative_stats():
+    benchmark = random_equity(seed=1)
+    report = performance_metrics(benchmark * 1.5 - 50_000, benchmark=benchmark)
+
+    assert report.metrics["correlation"] == pytest.approx(1.0, abs=1e-3)
+    assert report.metrics["beta"] > 1
+    assert report.metrics["excess_return"] > 0
+
+    same = performance_metrics(benchmark, benchmark=benchmark)
+    assert same.metrics["beta"] == pytest.approx(1.0)
+    assert same.metrics["tracking_error"] == pytest.approx(0.0)
+
+def test_turnover_and_exposure_from_portfolio_result():
+    prices = pd.DataFrame({"PETR4": [10.0, 10.0, 10.0, 10.0]}, index=pd.bdate_range("2024-01-02", periods=4))
+    result = PortfolioBacktester(prices, 10_000).run(np.array([[500], [0], [-500], [0]]))
+
+    report = analyze_result(result, periods_per_year=3)
+
+    np.testing.assert_allclose(report.series["exposure"], [0.5, 0.5, 0.0, 0.0])
+    assert report.metrics["turnover"] == pytest.approx(0.5)
+    assert report.series.index.equals(prices.index)
+
+def test_exports_and_stays_headless(tmp_path):
+    report = performance_metrics(random_equity(60), index=pd.bdate_range("2024-01-02", periods=60))
+    report.to_json(str(tmp_path / "report.json"))
+
+    payload = json.loads((tmp_path / "report.json").read_text())
+    assert payload["metrics"]["sharpe"] == report.metrics["sharpe"]
+    assert len(payload["series"]["data"]) == 60
+    assert "matplotlib.pyplot" not in sys.modules
+
+    pytest.importorskip("pyarrow")
+    report.to_parquet(str(tmp_path / "report.parquet"))
+    assert len(pd.read_parquet(tmp_path / "report.parquet")) == 60
+
+def test_benchmark_from_quote_store(monkeypatch):
+    with FakeMarketDataAPI(tickers=("PETR4", "IBOV")) as api:
+        monkeypatch.setattr(new_tools, "base_url", api.url)
+        dates = pd.bdate_range("2024-01-01", "2024-03-28")
+        levels = benchmark_prices(QuoteStore(), dates)
+
+    assert len(levels) == len(dates) and not np.isnan(levels).any()
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_providers.quote_store import QuoteStore
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.portfolio_backtester import PortfolioBacktester, b3_lot_sizes
+from src.portfolio_construction import ConstructionConstraints, PortfolioConstructor, cap_weights
+from src.tools import new_tools
+from src.vectorized_backtester import orders_from_signals, run_vectorized_backtest, sma_crossover_signals
+
+def random_panel(tickers, periods, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, (periods, len(tickers))), axis=0))
+    return pd.DataFrame(close, index=pd.bdate_range("2023-01-02", periods=periods), columns=tickers)
+
+def test_single_ticker_matches_vectorized_engine():
+    prices = random_panel(["PETR4"], 250)
+    orders = orders_from_signals(sma_crossover_signals(prices["PETR4"], 5, 20), 300)
+
+    result = PortfolioBacktester(prices, 100_000, lot_sizes=1).run(orders[:, None])
+    expected = run_vectorized_backtest(prices["PETR4"], orders, 100_000)
+
+    np.testing.assert_allclose(result.equity, expected.equity)
+    np.testing.assert_array_equal(result.shares[:, 0], expected.shares)
+
+def test_round_lots_and_pro_rata_cash_scaling():
+    prices = pd.DataFrame(
+        {"PETR4": [10.0, 10.0], "VALE3": [50.0, 50.0], "ITUB4F": [25.0, 25.0]},
+        index=pd.bdate_range("2024-01-02", periods=2),
+    )
+    orders = np.array([[1_000, 200, 0], [-150, 0, 7]])
+
+    result = PortfolioBacktester(prices, 15_000).run(orders)
+
+    # Day 1 wants 20,000 with 15,000 available: both buys scale by 0.75 and round down to lots
+    np.testing.assert_array_equal(result.executed[0], [700, 100, 0])
+    # Partial sells trade in round lots, the fractional ticker in single shares
+    np.testing.assert_array_equal(result.executed[1], [-100, 0, 7])
+    np.testing.assert_allclose(result.cash, [3_000, 3_825])
+    np.testing.assert_allclose(result.equity, [15_000, 15_000])
+
+def test_target_weights_and_missing_prices():
+    prices = random_panel(["PETR4", "VALE3", "ITUB4"], 60, seed=3)
+    prices.iloc[:10, 2] = np.nan
+    weights = np.tile([0.3, 0.3, 0.3], (60, 1))
+
+    result = PortfolioBacktester(prices, 1_000_000, commission=0.0005).run(target_weights=weights)
+
+    assert (result.shares[:10, 2] == 0).all() and result.shares[10, 2] > 0
+    assert (result.shares % 100 == 0).all()
+    assert (result.cash >= 0).all()
+    assert result.weights().iloc[-1].between(0.25, 0.35).all()
+    assert result.commissions.sum() == pytest.approx(0.0005 * result.traded_value.sum())
+    marked = result.cash + (result.shares * prices.ffill().fillna(0).to_numpy()).sum(axis=1)
+    np.testing.assert_allclose(result.equity, marked)
+
+def test_scores_are_sized_by_the_constructor():
+    prices = random_panel(["PETR4", "VALE3", "ITUB4", "BBDC4"], 120, seed=4)
+    scores = np.random.default_rng(5).uniform(-1, 1, prices.shape)
+    backtester = PortfolioBacktester(prices, 1_000_000)
+
+    # Signal weights need no covariance and match the same weights passed as targets
+    constraints = ConstructionConstraints(max_weight=0.4)
+    sized = backtester.run(scores=scores, constructor=PortfolioConstructor("signal", constraints))
+    weights = np.array([cap_weights(row, 0.4, 1.0) for row in scores])
+    np.testing.assert_array_equal(sized.shares, backtester.run(target_weights=weights).shares)
+
+    parity = backtester.run(scores=scores, constructor=PortfolioConstructor("risk_parity"), cov_window=40)
+    assert (parity.shares[:40] == 0).all() and parity.shares[40].any()
+    held = parity.shares[40:] > 0
+    assert not (held & (scores[40:] <= 0)).any()
+    assert (parity.weights().to_numpy() <= 0.2 + 1e-9).all()
+
+def test_requires_exactly_one_plan():
+    backtester = PortfolioBacktester(random_panel(["PETR4"], 5), 10_000)
+    with pytest.raises(ValueError):
+        backtester.run()
+    with pytest.raises(ValueError):
+        backtester.run(orders=np.zeros((4, 1)))
+    with pytest.raises(ValueError):
+        backtester.run(scores=np.ones((5, 1)))
+
+def test_lot_sizes():
+    np.testing.assert_array_equal(b3_lot_sizes(["PETR4", "PETR4F", "BOVA11"]), [100, 1, 100])
+
+def test_quote_store_panel(monkeypatch):
+    with FakeMarketDataAPI() as api:
+        monkeypatch.setattr(new_tools, "base_url", api.url)
+        panel = QuoteStore().panel(["PETR4", "VALE3"], "2024-01-01", "2024-03-28")
+
+    assert list(panel.columns) == ["PETR4", "VALE3"]
+    assert panel.index.is_monotonic_increasing and not panel.isna().any().any()
@@ -0,0 +1,122 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.backtester import Backtester
+from src.portfolio_construction import (
+    ConstructionConstraints,
+    PortfolioConstructor,
+    cap_weights,
+    limit_turnover,
+    mean_variance_weights,
+    project_capped_simplex,
+    risk_parity_weights,
+    signal_scores,
+)
+from src.risk import ledoit_wolf
+from src.schemas.analysis import AnalystSignal
+
+def _covariance(n, seed=0):
+    returns = np.random.default_rng(seed).normal(0.0005, 0.02, (500, n)) * np.linspace(0.5, 2.0, n)
+    return ledoit_wolf(returns)[0]
+
+def test_signal_scores_and_capped_weights():
+    analyses = {
+        "PETR4": AnalystSignal(signal="bullish", confidence=0.8, reasoning={}),
+        "VALE3": AnalystSignal(signal="bearish", confidence=0.5, reasoning={}),
+    }
+    scores = signal_scores(analyses, ["PETR4", "VALE3", "ITUB4"])
+    np.testing.assert_allclose(scores, [0.8, -0.5, 0.0])
+
+    weights = cap_weights(np.array([10.0, 1.0, 1.0, 1.0, 1.0, 1.0, -3.0]), max_weight=0.3, budget=1.0)
+    assert weights[0] == pytest.approx(0.3)
+    np.testing.assert_allclose(weights[1:6], 0.14)
+    assert weights[6] == 0
+    # Three names capped at 20% cannot absorb the whole budget
+    assert cap_weights(np.ones(3), 0.2, 1.0).sum() == pytest.approx(0.6)
+
+def test_projection_onto_capped_simplex():
+    w = project_capped_simplex(np.array([0.9, 0.5, 0.3, -0.2]), max_weight=0.4, budget=0.8)
+    assert w.sum() == pytest.approx(0.8)
+    assert w.max() <= 0.4 + 1e-12 and w.min() >= 0
+
+def test_risk_parity_equalizes_risk_contributions():
+    cov = _covariance(40)
+    weights = risk_parity_weights(cov)
+    contributions = weights * (cov @ weights)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-6)
+    assert weights.sum() == pytest.approx(1.0)
+
+    mask = np.arange(40) % 2 == 0
+    subset = risk_parity_weights(cov, mask, x0=weights)
+    assert (subset[~mask] == 0).all()
+    np.testing.assert_allclose(subset[mask], risk_parity_weights(cov[np.ix_(mask, mask)]), atol=1e-9)
+
+def test_mean_variance_satisfies_kkt_conditions():
+    n = 60
+    cov = _covariance(n, seed=3)
+    alpha = np.random.default_rng(4).normal(0, 0.0003, n)
+    constraints = ConstructionConstraints(max_weight=0.1, budget=1.0)
+    w = mean_variance_weights(alpha, cov, constraints, risk_aversion=3.0)
+    assert w.min() >= 0 and w.max() <= 0.1 + 1e-12 and w.sum() <= 1 + 1e-9
+
+    gradient = alpha - 3.0 * cov @ w
+    interior = (w > 1e-8) & (w < 0.1 - 1e-8)
+    # Interior names share one shadow price on the budget; names at zero have a lower gradient
+    assert np.ptp(gradient[interior]) < 1e-6
+    level = gradient[interior].mean()
+    assert (gradient[w <= 1e-8] <= level + 1e-6).all()
+    assert (gradient[w >= 0.1 - 1e-8] >= level - 1e-6).all()
+
+    warm = mean_variance_weights(alpha * 1.01, cov, constraints, risk_aversion=3.0, x0=w)
+    np.testing.assert_allclose(warm, mean_variance_weights(alpha * 1.01, cov, constraints, risk_aversion=3.0), atol=1e-6)
+
+def test_limit_turnover_scales_toward_target():
+    current, target = np.array([0.5, 0.5, 0.0]), np.array([0.0, 0.5, 0.5])
+    limited = limit_turnover(target, current, 0.5)
+    np.testing.assert_allclose(limited, [0.25, 0.5, 0.25])
+    assert limit_turnover(target, current, None) is target
+
+def test_orders_are_lot_rounded_json_for_parse_action():
+    constructor = PortfolioConstructor("signal", ConstructionConstraints(max_weight=0.5))
+    tickers = ["PETR4", "VALE3", "ITUB4F"]
+    orders = constructor.orders(
+        tickers,
+        scores=np.array([0.6, -0.4, 0.4]),
+        prices=np.array([30.0, 60.0, 25.0]),
+        current_shares=np.array([0.0, 250.0, 0.0]),
+        portfolio_value=100_000.0,
+    )
+    decisions = {ticker: Backtester.parse_action(None, order) for ticker, order in orders.items()}
+    # 50% of 100k at 30 is 1666 shares, rounded down to 16 lots of 100
+    assert decisions["PETR4"] == ("buy", 1600)
+    # A bearish signal closes the whole position, odd lot included
+    assert decisions["VALE3"] == ("sell", 250)
+    # PETR4 is capped at 50%, so the fractional ticker gets the rest and trades single shares
+    assert decisions["ITUB4F"] == ("buy", 2000)
+    assert json.loads(orders["PETR4"]) == {"action": "buy", "quantity": 1600}
+
+@pytest.mark.parametrize("scheme", ["risk_parity", "mean_variance"])
+def test_constructor_schemes_respect_constraints(scheme):
+    n = 100
+    cov = _covariance(n, seed=5)
+    scores = np.random.default_rng(6).uniform(-1, 1, n)
+    constraints = ConstructionConstraints(max_weight=0.05, budget=0.9, max_turnover=0.2)
+    constructor = PortfolioConstructor(scheme, constraints)
+
+    first = constructor.target_weights(scores, cov)
+    assert first.min() >= 0 and first.max() <= 0.05 + 1e-9 and first.sum() <= 0.9 + 1e-9
+    assert (first[scores <= 0] < 1e-9).all()
+
+    second = constructor.target_weights(scores[::-1].copy(), cov, current=first)
+    assert np.abs(second - first).sum() == pytest.approx(0.2)
+
+def test_unknown_scheme_is_rejected():
+    with pytest.raises(ValueError):
+        PortfolioConstructor("kelly")
+
+@pytest.mark.parametrize("scheme", ["risk_parity", "mean_variance"])
+def test_covariance_schemes_require_cov(scheme):
+    with pytest.raises(ValueError, match="covariance"):
+        PortfolioConstructor(scheme).target_weights(np.ones(3))
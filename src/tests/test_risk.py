@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents import risk_management_agent
+from src.risk import RiskEngine, RiskLimits, RollingRisk, assess, historical_var, ledoit_wolf, parametric_var
+from src.schemas.analysis import AnalystSignal
+
+def test_rolling_covariance_matches_batch_estimate():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.0005, 0.02, (700, 12))
+    rolling = RollingRisk(12, window=250).warm_up(returns[:400])
+    for row in returns[400:]:
+        rolling.update(row)
+
+    cov, shrinkage = rolling.covariance()
+    expected, expected_shrinkage = ledoit_wolf(returns[-250:])
+    np.testing.assert_allclose(cov, expected, atol=1e-15)
+    assert shrinkage == pytest.approx(expected_shrinkage)
+    assert 0 < shrinkage < 1
+
+    subset, _ = rolling.covariance(np.array([2, 5, 7]))
+    np.testing.assert_allclose(subset, ledoit_wolf(returns[-250:, [2, 5, 7]])[0], atol=1e-15)
+    np.testing.assert_allclose(rolling.covariance(shrink=False)[0], np.cov(returns[-250:], rowvar=False, ddof=0), atol=1e-15)
+
+def test_var_measures():
+    sample = np.linspace(-0.05, 0.05, 101)
+    var, cvar = historical_var(sample, 0.95)
+    assert var == pytest.approx(0.045)
+    assert cvar == pytest.approx(0.0475)
+
+    var, cvar = parametric_var(0.01, 0.95)
+    assert var == pytest.approx(0.016449, abs=1e-6)
+    assert cvar == pytest.approx(0.020627, abs=1e-6)
+
+def test_assess_reports_breaches():
+    cov = np.diag([0.0001, 0.0009])
+    report = assess(np.array([0.5, 0.3]), cov, ["LOW3", "HIGH3"], limits=RiskLimits(max_position_weight=0.4))
+
+    # HIGH3's 3% daily volatility caps it at 1% / (1.645 * 3%) of the portfolio
+    assert report.max_weights[1] == pytest.approx(0.01 / (1.6448536 * 0.03), rel=1e-6)
+    assert report.breaches[:2] == ["LOW3 weight 50.00% exceeds limit 40.00%", "HIGH3 weight 30.00% exceeds limit 20.27%"]
+    assert report.component_var.sum() == pytest.approx(report.parametric_var)
+
+def test_engine_from_quote_panels(quote_store):
+    dates = pd.bdate_range("2023-01-02", "2023-12-29")
+    rng = np.random.default_rng(3)
+    bench = rng.normal(0, 0.01, len(dates))
+    returns = {"IBOV": bench, "BETA2": 2 * bench + rng.normal(0, 0.002, len(dates)), "FLAT3": rng.normal(0, 0.01, len(dates))}
+
+    store = quote_store({ticker: pd.Series(100 * np.cumprod(1 + r), index=dates) for ticker, r in returns.items()})
+
+    engine = RiskEngine.from_quotes(store, ["BETA2", "FLAT3"], "2023-01-02", "2023-12-29", window=120)
+    report = engine.assess({"BETA2": 30000.0, "FLAT3": 20000.0}, 100000.0)
+
+    assert engine.rolling.count == 120
+    assert report.betas[0] == pytest.approx(2.0, abs=0.1)
+    assert abs(report.betas[1]) < 0.3
+    assert list(report.to_dict()["weights"].values()) == [0.3, 0.2]
+    assert report.historical_var > 0 and report.historical_cvar >= report.historical_var
+
+def test_risk_agent_caps_volatile_positions():
+    def run(volatility):
+        rng = np.random.default_rng(0)
+        closes = pd.Series(50 * np.cumprod(1 + rng.normal(0, volatility, 30)))
+        state = {
+            "data": {"quotes": pd.DataFrame({"close": closes}), "portfolio": {"cash": 100000.0, "stock": 0}},
+            "analyses": {"quant_agent": AnalystSignal(signal="bullish", confidence=1.0, reasoning={})},
+        }
+        return risk_management_agent(state)["analyses"]["risk_management_agent"].max_position_size
+
+    assert run(0.005) == 20000.0
+    assert run(0.05) < 20000.0
@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.backtester as backtester
+from src.backtester import Backtester
+from src.robustness import analyze_backtest, path_metrics, resample, trade_returns
+
+def daily_returns(days=252, seed=0):
+    return np.random.default_rng(seed).normal(0.0005, 0.01, days)
+
+def test_path_metrics_match_single_path_reference():
+    returns = daily_returns()
+    equity = np.cumprod(np.concatenate([[1.0], 1 + returns]))
+    metrics = path_metrics(returns)
+
+    assert metrics["total_return"][0] == pytest.approx(equity[-1] - 1)
+    assert metrics["sharpe"][0] == pytest.approx(returns.mean() / returns.std(ddof=1) * np.sqrt(252))
+    assert metrics["max_drawdown"][0] == pytest.approx((equity / np.maximum.accumulate(equity) - 1).min())
+
+def test_permutation_keeps_total_return_and_varies_drawdown():
+    report = resample(daily_returns(), n_paths=500, method="permutation", seed=1)
+
+    np.testing.assert_allclose(report.samples["total_return"], report.observed["total_return"])
+    np.testing.assert_allclose(report.samples["sharpe"], report.observed["sharpe"])
+    assert report.samples["max_drawdown"].std() > 0
+
+def test_block_bootstrap_is_chunk_invariant_and_brackets_observed():
+    returns = daily_returns(seed=2)
+    small = resample(returns, n_paths=3000, block_size=10, chunk_size=128, seed=3)
+    large = resample(returns, n_paths=3000, block_size=10, chunk_size=3000, seed=3)
+
+    for name in small.samples:
+        np.testing.assert_array_equal(small.samples[name], large.samples[name])
+    low, high = small.confidence_intervals(0.95)["total_return"]
+    assert low < small.observed["total_return"] < high
+    assert 0 <= small.probability_of_loss() <= 1
+
+def test_full_length_blocks_reproduce_the_observed_path():
+    returns = daily_returns(20)
+    report = resample(returns, n_paths=10, block_size=20, seed=0)
+
+    np.testing.assert_allclose(report.samples["total_return"], report.observed["total_return"])
+
+def test_analyze_backtest_portfolio_values():
+    equity = 100_000 * np.cumprod(np.concatenate([[1.0], 1 + daily_returns(100)]))
+    values = [{"Date": date, "Portfolio Value": value} for date, value in zip(pd.bdate_range("2024-01-02", periods=101), equity)]
+
+    summary = analyze_backtest(values, n_paths=200, seed=0).to_dict()
+
+    assert summary["n_paths"] == 200
+    assert summary["observed"]["total_return"] == pytest.approx(equity[-1] / equity[0] - 1)
+    assert set(summary["confidence_intervals"]) == {"total_return", "sharpe", "max_drawdown"}
+
+def test_trade_returns_realize_pnl_at_average_cost():
+    trades = [
+        {"action": "buy", "quantity": 10, "price": 10.0, "Portfolio Value": 1000.0},
+        {"action": "buy", "quantity": 10, "price": 20.0, "Portfolio Value": 1100.0},
+        {"action": "sell", "quantity": 5, "price": 30.0, "Portfolio Value": 1300.0},
+        {"action": "sell", "quantity": 15, "price": 12.0, "Portfolio Value": 1200.0},
+    ]
+    np.testing.assert_allclose(trade_returns(trades), [5 * 15 / 1300, 15 * -3 / 1200])
+
+def test_permutation_reshuffles_the_backtester_trades(monkeypatch):
+    def prices(ticker, start_date, end_date):
+        index = pd.bdate_range(start_date, end_date, name="Date")
+        close = 10 + np.sin(np.arange(len(index)) / 3)
+        return pd.DataFrame({"open": close, "close": close, "high": close, "low": close, "volume": 1000}, index=index)
+    monkeypatch.setattr(backtester, "get_price_data", prices)
+
+    days = iter(range(1000))
+    def agent(ticker, start_date, end_date, portfolio, prices):
+        return json.dumps({"action": "buy" if next(days) % 4 < 2 else "sell", "quantity": 50})
+
+    bt = Backtester(agent, "PETR4", "2024-01-02", "2024-06-28", 10_000)
+    bt.run_backtest()
+    returns = trade_returns(bt.trades)
+    assert len(returns) == sum(trade["action"] == "sell" for trade in bt.trades) > 10
+
+    report = analyze_backtest(bt.portfolio_values, bt.trades, method="permutation", n_paths=300, seed=0)
+    assert report.observed["total_return"] == pytest.approx(np.prod(1 + returns) - 1)
+    np.testing.assert_allclose(report.samples["total_return"], report.observed["total_return"])
+    assert report.samples["max_drawdown"].std() > 0
+
+    with pytest.raises(ValueError):
+        analyze_backtest(bt.portfolio_values, method="permutation")
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from src import scanner
+from src.data_providers.quote_store import QuoteStore
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.tools import new_tools
+
+TICKERS = [f"TK{i:02d}3" for i in range(12)]
+
+def test_scan_ranks_universe_across_processes(monkeypatch, tmp_path):
+    with FakeMarketDataAPI(TICKERS) as api:
+        monkeypatch.setattr(new_tools, "base_url", api.url)
+        store = QuoteStore(str(tmp_path / "quotes"))
+        serial = scanner.scan(store=store, end_date="2024-06-28", max_workers=1)
+        fetched = sum(count for path, count in api.requests.items() if path.endswith("/quotes"))
+        parallel = scanner.scan(store=QuoteStore(str(tmp_path / "quotes")), end_date="2024-06-28", max_workers=2, batch_size=4)
+        assert sum(count for path, count in api.requests.items() if path.endswith("/quotes")) == fetched
+
+    assert sorted(serial["ticker"]) == TICKERS
+    assert list(serial["rank"]) == list(range(1, len(TICKERS) + 1))
+    assert serial["score"].is_monotonic_decreasing
+    assert set(serial["signal"]) <= {"bullish", "bearish", "neutral"}
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    path = str(tmp_path / "scan.csv")
+    scanner.write_table(serial, path)
+    assert list(pd.read_csv(path)["ticker"]) == list(serial["ticker"])
+
+def test_scan_skips_failed_and_short_histories(quote_store, monkeypatch, capsys):
+    dates = pd.bdate_range("2024-05-01", "2024-06-28")
+    quotes = pd.DataFrame({"close": range(1, len(dates) + 1), "volume": 1000.0}, index=dates)
+    store = quote_store({"LONG3": quotes, "SHRT3": quotes.iloc[-10:], "FAIL3": Exception("Failed to get quotes: 500")})
+
+    table = scanner.scan(["LONG3", "SHRT3", "FAIL3"], store, end_date="2024-06-28")
+
+    assert list(table["ticker"]) == ["LONG3"]
+    assert table.loc[0, "rsi"] == "bearish"
+    assert table.attrs["errors"] == {"FAIL3": "Failed to get quotes: 500"}
+
+    monkeypatch.setattr(scanner, "scan", lambda *args, **kwargs: table)
+    monkeypatch.setattr("sys.argv", ["scanner", "--tickers", "LONG3", "SHRT3", "FAIL3"])
+    scanner.main()
+    assert "1 tickers failed to load:\n  FAIL3: Failed to get quotes: 500" in capsys.readouterr().out
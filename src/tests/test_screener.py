@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from src import screener
+from src.agents import fundamentals_agent
+from src.schemas.market_data_schema import BalanceSheet, FinancialRatios, IncomeStatement, MarketRatios
+
+def metric(value):
+    return {"value": value, "currency": "BRL"}
+
+def random_financials(rng):
+    revenue = rng.uniform(100, 1000)
+    liabilities = rng.uniform(50, 800)
+    return {
+        "ratios": [FinancialRatios(period="2023-12-31", statement_type="con", period_type="year", roe=rng.uniform(-0.1, 0.4))],
+        "market_ratios": [MarketRatios(
+            date="2024-06-28", p_e=rng.choice([0.0, rng.uniform(-5, 30)]),
+            p_b=rng.uniform(0.3, 4), dividend_yield=rng.uniform(0, 0.1),
+        )],
+        "income": [IncomeStatement(
+            period="2023-12-31", statement_type="con", period_type="year",
+            revenue=metric(revenue), gross_profit=metric(revenue * 0.5), operating_income=metric(revenue * rng.uniform(0, 0.3)),
+            net_income=metric(revenue * rng.uniform(-0.1, 0.35)), ebit=metric(revenue * 0.2), ebitda=metric(revenue * 0.3),
+        )],
+        "balance": [BalanceSheet(
+            period="2023-12-31", statement_type="con",
+            assets={"total": metric(rng.uniform(100, 1500))},
+            liabilities={"total": metric(liabilities)},
+            equity={"total": metric(rng.uniform(100, 1000))},
+        )],
+    }
+
+def test_vectorized_scores_match_fundamentals_agent():
+    rng = np.random.default_rng(7)
+    companies = [random_financials(rng) for _ in range(60)]
+    table = screener.score_fundamentals(pd.DataFrame([screener.fundamentals_row(f) for f in companies]))
+
+    for financials, (_, row) in zip(companies, table.iterrows()):
+        state = {"messages": [], "data": {"financials": financials}, "metadata": {"show_reasoning": False}}
+        analysis = fundamentals_agent(state)["analyses"]["fundamentals_agent"]
+        assert row["signal"] == analysis.signal
+        assert row["confidence"] == analysis.confidence
+        assert row["profitability"] == analysis.reasoning["Profitability"].signal
+        assert row["valuation"] == analysis.reasoning["Valuation"].signal
+        assert row["financial_health"] == analysis.reasoning["Financial_Health"].signal
+
+def test_raw_payloads_and_malformed_statements():
+    row = screener.fundamentals_row({
+        "ratios": [{"period": "2023-12-31", "statement_type": "con", "period_type": "year", "roe": 0.2}],
+        "market_ratios": [{"date": "2024-06-28", "p_e": 9.0}],
+        "income": [{"period": "2023-12-31"}],
+        "balance": [],
+    })
+
+    assert row["roe"] == 0.2 and row["p_e"] == 9.0
+    assert np.isnan(row["net_margin"]) and np.isnan(row["total_assets"])
+
+def test_sector_percentiles_and_screen():
+    table = pd.DataFrame({
+        "ticker": ["AAA3", "BBB3", "CCC3", "DDD3", "EEE3"],
+        "sector": ["Energia", "Energia", "Energia", "Financeiro", None],
+        "subsector": ["Petróleo", "Petróleo", "Elétricas", "Bancos", None],
+        "p_e": [5.0, 10.0, 20.0, 8.0, 4.0],
+    })
+
+    ranked = screener.sector_percentiles(table, metrics=["p_e"])
+
+    assert list(ranked["p_e_sector_pct"].iloc[:4]) == [1 / 3, 2 / 3, 1.0, 1.0]
+    assert np.isnan(ranked.loc[4, "p_e_sector_pct"])
+    assert list(ranked["p_e_subsector_pct"].iloc[:3]) == [0.5, 1.0, 1.0]
+
+    cheap = screener.screen(ranked, "p_e_sector_pct < 0.7", sort_by="p_e", ascending=True)
+    assert list(cheap["ticker"]) == ["AAA3", "BBB3"]
+
+def test_load_fundamentals_skips_failures():
+    class Provider:
+        company_data = pd.DataFrame({
+            "ticker": ["PETR4", "VALE3"], "cvm_code": ["9512", "4170"], "trade_name": ["PETROBRAS", "VALE"],
+            "sector": ["Energia", "Mineração"], "subsector": [None, None], "segment": [None, None],
+        })
+
+        def get_statements(self, cvm_code):
+            if cvm_code == "4170":
+                raise Exception("Failed to get statements")
+            return random_financials(np.random.default_rng(0))
+
+    table = screener.build_screen(Provider())
+
+    assert list(table["ticker"]) == ["PETR4"]
+    assert table.loc[0, "p_b_sector_pct"] == 1.0
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from src import agents
+from src.tools import new_tools
+from src.agent_orchestrator import AgentOrchestrator
+from src.data_providers.market_data_provider import MarketDataProvider
+from src.fake_llm import FakeChatModel
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.service import AnalysisService, make_server
+
+@pytest.fixture
+def service_url(monkeypatch):
+    with FakeMarketDataAPI(latency=0.1) as api:
+        monkeypatch.setattr(new_tools, "base_url", api.url)
+        monkeypatch.setattr(agents, "provider", MarketDataProvider())
+        server = make_server(AnalysisService(orchestrator=AgentOrchestrator(llm=FakeChatModel())), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_address[1]}", api
+        finally:
+            server.shutdown()
+            server.server_close()
+
+def post(url, payload):
+    request = Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+def get(url):
+    with urlopen(url) as response:
+        return json.loads(response.read())
+
+def test_concurrent_requests_are_coalesced(service_url):
+    url, api = service_url
+    payload = {"ticker": "PETR4", "agents": ["technical"], "start_date": "2024-01-01", "end_date": "2024-06-28"}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: post(f"{url}/signals", payload), range(4)))
+
+    assert all(result == results[0] for result in results)
+    assert results[0]["analyses"]["quant_agent"]["signal"] in ("bullish", "bearish", "neutral")
+    assert api.requests["/tickers/PETR4/quotes"] == 1
+    assert get(f"{url}/metrics")["coalesced_requests"] >= 1
+
+def test_repeat_ticker_is_served_from_warm_caches(service_url):
+    url, api = service_url
+    payload = {"ticker": "VALE3", "agents": ["technical"], "start_date": "2024-01-01", "end_date": "2024-06-28"}
+    post(f"{url}/signals", payload)
+    upstream_calls = sum(api.requests.values())
+
+    start = time.perf_counter()
+    post(f"{url}/signals", {**payload, "start_date": "2024-02-01"})
+    elapsed = time.perf_counter() - start
+
+    assert sum(api.requests.values()) == upstream_calls
+    assert elapsed < 1.0
+
+def test_analyze_prompt(service_url):
+    url, _ = service_url
+
+    result = post(f"{url}/analyze", {"prompt": "Technical analysis of PETR4", "end_date": "2024-06-28"})
+
+    assert "ANALYSIS FOR PETR4" in result["result"]
+
+def test_health_and_metrics(service_url):
+    url, _ = service_url
+    quotes = get(f"{url}/quotes?ticker=ITUB4&start_date=2024-01-01&end_date=2024-01-31")
+
+    assert get(f"{url}/health")["status"] == "ok"
+    assert quotes["quotes"][0]["date"] == "2024-01-01"
+    assert get(f"{url}/metrics")["latency"]["/quotes"]["count"] == 1
+
+def test_missing_fields_are_400_and_internal_key_errors_500(service_url, monkeypatch):
+    url, _ = service_url
+    for request in (lambda: post(f"{url}/signals", {"agents": ["technical"]}), lambda: get(f"{url}/quotes?start_date=2024-01-01")):
+        with pytest.raises(HTTPError) as error:
+            request()
+        assert error.value.code == 400 and json.loads(error.value.read()) == {"error": "Missing field: ticker"}
+
+    def broken(self, prompt, start_date=None, end_date=None):
+        return {}["result"]
+
+    monkeypatch.setattr(AnalysisService, "analyze", broken)
+    with pytest.raises(HTTPError) as error:
+        post(f"{url}/analyze", {"prompt": "Technical analysis of PETR4"})
+    assert error.value.code == 500
+
+def test_agents_must_be_a_list_of_known_names(service_url):
+    url, _ = service_url
+    for agents, message in (
+        ("technical", "Field agents must be a list of agent names"),
+        (["technical", "quant_agent"], "Unknown agents: quant_agent (expected any of market_data, technical, fundamental)"),
+    ):
+        with pytest.raises(HTTPError) as error:
+            post(f"{url}/signals", {"ticker": "PETR4", "agents": agents})
+        assert error.value.code == 400 and json.loads(error.value.read()) == {"error": message}
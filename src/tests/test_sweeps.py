@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.sweeps as sweeps
+from src.sweeps import SharedPrices, SweepConfig, parameter_grid, run_sweep, walk_forward, walk_forward_splits
+
+def random_walk_prices(start_date, end_date, seed):
+    index = pd.bdate_range(start_date, end_date, name="Date")
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+    return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1000.0}, index=index)
+
+@pytest.fixture
+def frames():
+    return {
+        "PETR4": random_walk_prices("2021-07-01", "2023-12-29", seed=1),
+        "VALE3": random_walk_prices("2021-07-01", "2023-12-29", seed=2),
+    }
+
+def test_shared_prices_round_trip(frames):
+    with SharedPrices.create(frames) as prices:
+        frame = prices.frame("PETR4", "2023-06-30")
+
+        assert frame.index[-1] == pd.Timestamp("2023-06-30")
+        pd.testing.assert_frame_equal(frame, frames["PETR4"].loc[:"2023-06-30"], check_freq=False, check_index_type=False)
+        assert isinstance(prices.array("PETR4"), np.memmap)
+
+def test_process_pool_matches_serial_run(frames):
+    configs = parameter_grid(
+        ["PETR4", "VALE3"], [("2022-01-03", "2023-12-29")], {"short": [5, 10, 50], "long": [20, 50]}, [10000, 50000]
+    )
+
+    with SharedPrices.create(frames) as prices:
+        serial = run_sweep(configs, prices, max_workers=1)
+        parallel = run_sweep(configs, prices, max_workers=2)
+
+    assert len(serial) == 2 * 4 * 2
+    assert (serial["short"] < serial["long"]).all()
+    pd.testing.assert_frame_equal(serial, parallel)
+
+def test_prices_are_loaded_once_per_ticker(monkeypatch, frames):
+    calls = []
+    def fake_load(tickers, start_date, end_date):
+        calls.append(list(tickers))
+        return {ticker: frames[ticker] for ticker in tickers}
+    monkeypatch.setattr(sweeps, "load_price_frames", fake_load)
+
+    results = run_sweep(
+        [SweepConfig("PETR4", "2022-01-03", "2022-12-30", strategy="quant"),
+         SweepConfig("PETR4", "2023-01-02", "2023-12-29", params={"short": 5, "long": 20})],
+        max_workers=2,
+    )
+
+    assert calls == [["PETR4"]]
+    assert list(results["strategy"]) == ["quant", "sma_crossover"]
+
+def test_walk_forward(frames):
+    dates = frames["PETR4"].loc["2022-01-03":].index
+    splits = walk_forward_splits(dates, train_days=126, test_days=63)
+
+    with SharedPrices.create(frames) as prices:
+        results = walk_forward(
+            ["PETR4", "VALE3"], "2022-01-03", "2023-12-29", {"short": [5, 10], "long": [20, 50]},
+            train_days=126, test_days=63, prices=prices, max_workers=2,
+        )
+
+    assert len(splits) == (len(dates) - 126) // 63
+    assert splits[1][0] == dates[63].strftime("%Y-%m-%d")
+    assert len(results) == 2 * len(splits)
+    assert list(results.loc[results["ticker"] == "PETR4", "start_date"]) == [split[2] for split in splits]
+    assert {"split", "train_sharpe", "sharpe", "total_return", "max_drawdown"} <= set(results.columns)
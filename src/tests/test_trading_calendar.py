@@ -0,0 +1,60 @@
+from datetime import date
+
+import pandas as pd
+
+from src.data_providers.quote_store import QuoteStore
+from src.fake_market_data_api import FakeMarketDataAPI
+from src.tools import new_tools
+from src.trading_calendar import TradingCalendar, b3_holidays
+
+def test_holiday_rules():
+    holidays = b3_holidays(2024)
+
+    assert date(2024, 2, 12) in holidays and date(2024, 2, 13) in holidays  # Carnaval
+    assert date(2024, 3, 29) in holidays                                    # Good Friday
+    assert date(2024, 5, 30) in holidays                                    # Corpus Christi
+    assert date(2024, 11, 20) in holidays and date(2023, 11, 20) not in b3_holidays(2023)
+    assert date(2021, 1, 25) in b3_holidays(2021) and date(2024, 1, 25) not in holidays
+
+def test_year_end_closure_falls_on_the_last_weekday():
+    calendar = TradingCalendar()
+
+    # 31 Dec 2023 was a Sunday and 31 Dec 2022 a Saturday, so B3 closed on the Friday before
+    assert list(calendar.sessions("2023-12-26", "2024-01-03")) == list(pd.to_datetime(["2023-12-26", "2023-12-27", "2023-12-28", "2024-01-02", "2024-01-03"]))
+    assert pd.Timestamp("2022-12-30") not in calendar.sessions("2022-12-26", "2023-01-03")
+    assert date(2024, 12, 31) in b3_holidays(2024)
+
+def test_sessions_and_navigation():
+    calendar = TradingCalendar()
+
+    assert len(calendar.sessions("2024-03-01", "2024-03-31")) == 20
+    assert not calendar.is_session("2024-12-25")
+    assert calendar.previous_session("2024-04-01") == pd.Timestamp("2024-04-01")
+    assert calendar.previous_session("2024-03-31") == pd.Timestamp("2024-03-28")
+    assert calendar.next_session("2024-12-24") == pd.Timestamp("2024-12-26")
+
+def test_observed_quotes_override_rules_and_persist(tmp_path):
+    path = str(tmp_path / "calendar.pkl")
+    calendar = TradingCalendar(path)
+    traded = pd.DatetimeIndex(["2024-03-27", "2024-03-29"])  # pretend the exchange closed on the 28th
+    calendar.observe_quotes("PETR4", "2024-03-27", "2024-03-29", pd.DataFrame({"close": 1.0}, index=traded))
+    calendar.observe_quotes("XPTO3", "2024-04-01", "2024-04-05", pd.DataFrame({"close": 1.0}, index=traded))
+
+    reloaded = TradingCalendar(path)
+
+    assert list(reloaded.sessions("2024-03-26", "2024-04-02")) == list(
+        pd.DatetimeIndex(["2024-03-26", "2024-03-27", "2024-03-29", "2024-04-01", "2024-04-02"])
+    )
+
+def test_quote_store_skips_ranges_without_sessions(monkeypatch, tmp_path):
+    with FakeMarketDataAPI() as api:
+        monkeypatch.setattr(new_tools, "base_url", api.url)
+        store = QuoteStore(cache_dir=str(tmp_path))
+        store.get("PETR4", "2024-03-01", "2024-03-28")
+        store.get("PETR4", "2024-03-01", "2024-03-31")  # Good Friday and a weekend: nothing to fetch
+        store.get("PETR4", "2024-02-10", "2024-03-31")  # Carnaval weekend edge does hold sessions
+
+    assert store.fetches == 2
+    assert api.requests["/tickers/PETR4/quotes"] == 2
+    assert (tmp_path / "calendar.pkl").exists()
+    assert store.calendar.is_session("2024-03-27")
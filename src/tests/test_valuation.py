@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from src.data_providers.fundamentals_store import FundamentalsStore, trailing_twelve_months
+from src.valuation import TRAILING_FIELDS, reconcile, universe_valuations
+
+DATES = pd.bdate_range("2023-01-02", "2023-12-29")
+SHARES = {"AAAA3": 1000.0, "BBBB4": 250.0}
+# Three-month ITR quarters and the DFP year, as the API reports them
+NET_INCOME = {
+    ("2022-03-31", "quarter"): 180.0, ("2022-06-30", "quarter"): 200.0, ("2022-09-30", "quarter"): 190.0,
+    ("2022-12-31", "year"): 800.0,
+    ("2023-03-31", "quarter"): 250.0, ("2023-06-30", "quarter"): 260.0, ("2023-09-30", "quarter"): 240.0,
+}
+NET_DEBT, DPS, EQUITY, EBITDA = 500.0, 0.5, 4000.0, 1500.0
+# Trailing net income from each filing's CVM deadline: 800 + YTD 2023 - YTD 2022
+TTM_NET_INCOME = {"2023-03-31": 800.0, "2023-05-15": 870.0, "2023-08-14": 930.0, "2023-11-14": 980.0}
+
+def ttm_net_income(days):
+    steps = pd.Series(TTM_NET_INCOME).rename(index=pd.Timestamp)
+    return steps.reindex(pd.DatetimeIndex(days), method="ffill").to_numpy()
+
+def close(ticker):
+    rng = np.random.default_rng(len(ticker) + int(SHARES[ticker]))
+    return pd.Series(20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(DATES)))), index=DATES)
+
+def quotes():
+    return {ticker: pd.DataFrame({"close": close(ticker), "volume": 1000}) for ticker in SHARES}
+
+def metric(value):
+    return {"value": value, "currency": "BRL"}
+
+def fetchers():
+    # cvm_code doubles as the ticker here
+    def income(cvm_code, statement_type):
+        scale = lambda kind: 1.0 if kind == "year" else 0.25
+        return [
+            {"period": period, "statement_type": "con", "period_type": kind, "revenue": metric(5000.0 * scale(kind)),
+             "gross_profit": metric(2000.0 * scale(kind)), "operating_income": metric(1200.0 * scale(kind)),
+             "net_income": metric(value), "ebit": metric(1300.0 * scale(kind)), "ebitda": metric(EBITDA * scale(kind))}
+            for (period, kind), value in NET_INCOME.items()
+        ]
+    def balance(cvm_code, statement_type):
+        return [{"period": "2022-12-31", "statement_type": "con", "assets": {"total": metric(9000.0)},
+                 "liabilities": {"total": metric(5000.0)}, "equity": {"total": metric(EQUITY)}}]
+    def market_ratios(ticker, statement_type):
+        # What the API reports: monthly snapshots computed from the statements already public
+        prices, records = close(ticker), []
+        for day, net_income in zip(DATES[::21], ttm_net_income(DATES[::21])):
+            market_cap = prices[day] * SHARES[ticker]
+            records.append({
+                "date": day.strftime("%Y-%m-%d"), "market_cap": metric(market_cap),
+                "enterprise_value": metric(market_cap + NET_DEBT), "p_e": market_cap / net_income,
+                "p_b": market_cap / EQUITY, "ev_ebitda": (market_cap + NET_DEBT) / EBITDA,
+                "dividend_yield": DPS / prices[day],
+            })
+        return records
+    return {"income": income, "balance": balance, "market_ratios": market_ratios}
+
+def test_local_ratios_match_api_between_snapshots(quote_store):
+    companies = {ticker: ticker for ticker in SHARES}
+    store = FundamentalsStore(fetchers=fetchers())
+
+    ratios = universe_valuations(companies, "2023-04-03", "2023-12-29", quote_store(quotes()), store)
+
+    for ticker in SHARES:
+        prices = close(ticker).loc["2023-04-03":]
+        market_cap = prices * SHARES[ticker]
+        net_income = ttm_net_income(prices.index)
+        pd.testing.assert_series_equal(ratios["market_cap"][ticker], market_cap, check_names=False, check_freq=False)
+        np.testing.assert_allclose(ratios["p_e"][ticker], market_cap / net_income)
+        np.testing.assert_allclose(ratios["p_b"][ticker], market_cap / EQUITY)
+        np.testing.assert_allclose(ratios["ev_ebitda"][ticker], (market_cap + NET_DEBT) / EBITDA)
+        np.testing.assert_allclose(ratios["dividend_yield"][ticker], DPS / prices)
+
+    report = reconcile(ratios, companies, store)
+    assert report["within_tolerance"].all()
+    assert (report["observations"] > 0).all()
+    assert report["max_error"].max() < 1e-9
+
+def test_trailing_twelve_months_falls_back_to_the_last_year():
+    known = {(pd.Timestamp(period), kind): {"net_income": value} for (period, kind), value in NET_INCOME.items()}
+    assert trailing_twelve_months(known, ["net_income"]) == {"net_income": 980.0}
+
+    # Without 2022's first quarter the YTD comparison is incomplete
+    del known[(pd.Timestamp("2022-03-31"), "quarter")]
+    assert trailing_twelve_months(known, ["net_income"]) == {"net_income": 800.0}
+
+def test_reconcile_flags_single_quarter_earnings(quote_store):
+    companies = {ticker: ticker for ticker in SHARES}
+    store = FundamentalsStore(fetchers=fetchers())
+    ratios = universe_valuations(companies, "2023-04-03", "2023-12-29", quote_store(quotes()), store)
+
+    # Ratios built from the latest filing as it is: one quarter's earnings after each ITR
+    joined = {ticker: store.as_of_join(ticker, ratios["market_cap"].index) for ticker in SHARES}
+    latest = {name: pd.DataFrame({ticker: joined[ticker][name] for ticker in SHARES}) for name in TRAILING_FIELDS}
+    quarterly = {**ratios, **{
+        "p_e": ratios["market_cap"] / latest["net_income"],
+        "ev_ebitda": ratios["enterprise_value"] / latest["ebitda"],
+    }}
+    assert (quarterly["p_e"].loc["2023-06-01"] / ratios["p_e"].loc["2023-06-01"]).round(2).tolist() == [3.48, 3.48]
+
+    report = reconcile(quarterly, companies, store).set_index("ratio")
+    assert not report.loc[["p_e", "ev_ebitda"], "within_tolerance"].any()
+    assert report.loc[["market_cap", "p_b", "dividend_yield"], "within_tolerance"].all()
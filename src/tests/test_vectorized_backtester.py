@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.backtester as backtester
+import src.vectorized_backtester as vectorized
+from src.agents import quant_agent
+from src.backtester import Backtester
+from src.trading_calendar import b3_calendar
+from src.vectorized_backtester import (
+    ALL,
+    orders_from_signals,
+    orders_from_targets,
+    quant_signals,
+    run_vectorized_backtest,
+    sma_crossover_signals,
+)
+
+def random_walk_prices(start_date, end_date, seed=7):
+    index = b3_calendar.sessions(start_date, end_date).rename("Date")
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+    volume = rng.integers(1_000, 10_000, len(index))
+    return pd.DataFrame({"open": close, "close": close, "high": close, "low": close, "volume": volume}, index=index)
+
+def loop_equity(monkeypatch, prices, orders, initial_capital):
+    """Portfolio values from the per-day Backtester replaying the same signed orders"""
+    monkeypatch.setattr(backtester, "get_price_data", lambda ticker, start_date, end_date: prices)
+    by_date = dict(zip(prices.index, orders))
+
+    def agent(ticker, start_date, end_date, portfolio, prices):
+        quantity = by_date[pd.Timestamp(end_date)]
+        action = "buy" if quantity > 0 else "sell" if quantity < 0 else "hold"
+        return json.dumps({"action": action, "quantity": abs(quantity)})
+
+    bt = Backtester(agent, "PETR4", prices.index[0], prices.index[-1], initial_capital, lookback_days=0)
+    bt.run_backtest()
+    return np.array([value["Portfolio Value"] for value in bt.portfolio_values])
+
+def test_matches_loop_engine_on_sma_crossover(monkeypatch):
+    prices = random_walk_prices("2023-01-02", "2023-12-29")
+    orders = orders_from_signals(sma_crossover_signals(prices["close"], 5, 20))
+
+    result = run_vectorized_backtest(prices["close"], orders, 100_000)
+
+    assert (orders != 0).sum() > 2
+    np.testing.assert_allclose(result.equity, loop_equity(monkeypatch, prices, orders, 100_000))
+
+def test_matches_loop_engine_when_orders_hit_constraints(monkeypatch):
+    prices = random_walk_prices("2023-01-02", "2023-06-30", seed=3)
+    rng = np.random.default_rng(11)
+    orders = rng.choice([-150.0, 0.0, 0.0, 200.0], len(prices))
+
+    result = run_vectorized_backtest(prices["close"], orders, 5_000)
+
+    assert (result.executed != orders).any()
+    assert (result.shares >= 0).all() and (result.cash >= 0).all()
+    np.testing.assert_allclose(result.equity, loop_equity(monkeypatch, prices, orders, 5_000))
+
+def test_unconstrained_orders_fill_as_requested():
+    close = np.array([10.0, 11.0, 12.0, 11.0])
+    orders = orders_from_targets(np.array([0, 100, 100, 50]))
+
+    result = run_vectorized_backtest(close, orders, 10_000)
+
+    np.testing.assert_array_equal(result.executed, [0, 100, 0, -50])
+    np.testing.assert_allclose(result.equity, [10_000, 10_000, 10_100, 10_000])
+    assert result.total_return == 0.0
+
+def test_all_in_orders():
+    close = np.array([10.0, 20.0, 40.0])
+
+    result = run_vectorized_backtest(close, orders_from_signals([1, 0, -1], ALL), 1_005)
+
+    np.testing.assert_array_equal(result.shares, [100, 100, 0])
+    assert result.cash[-1] == 4_005
+
+def test_signal_orders_never_walk_order_by_order(monkeypatch):
+    walk = vectorized._fill_sequentially
+    def fail(*args):
+        raise AssertionError("all-in orders walked order by order")
+    monkeypatch.setattr(vectorized, "_fill_sequentially", fail)
+
+    prices = random_walk_prices("2020-01-02", "2023-12-29", seed=9)
+    close = prices["close"].to_numpy()
+    # quant_agent votes repeat buys while long, which add shares only when cash allows
+    for signals in (quant_signals(prices), sma_crossover_signals(close), np.sign(np.sin(np.arange(len(close)) / 4))):
+        orders = orders_from_signals(signals)
+        for capital in (100_000, 1_000, 30):
+            result = run_vectorized_backtest(close, orders, capital)
+            np.testing.assert_array_equal(result.executed, walk(close, orders, capital))
+            assert (result.shares >= 0).all() and (result.cash >= -1e-9).all()
+
+def test_all_in_repeat_buys_spend_leftover_cash_at_new_lows():
+    close = np.array([10.0, 12.0, 4.0, 5.0, 3.0, 8.0])
+    orders = orders_from_signals([1, 1, 1, 1, 1, -1])
+
+    result = run_vectorized_backtest(close, orders, 108)
+
+    # 10 shares leave 8: nothing at 12, two at 4, none at 5 or 3 with nothing left
+    np.testing.assert_array_equal(result.executed, [10, 0, 2, 0, 0, -12])
+    assert result.cash[-1] == pytest.approx(96)
+
+def test_quant_signals_match_quant_agent():
+    prices = random_walk_prices("2023-01-02", "2023-06-30", seed=5)
+    signals = quant_signals(prices)
+    expected = {"bullish": 1.0, "bearish": -1.0, "neutral": 0.0}
+
+    for t in range(30, len(prices), 7):
+        state = {"messages": [], "data": {"quotes": prices.iloc[:t + 1]}, "metadata": {"show_reasoning": False}}
+        analysis = quant_agent(state)["analyses"]["quant_agent"]
+        assert signals[t] == expected[analysis.signal]
@@ -3,13 +3,14 @@ import os
 import pandas as pd
 import requests
 from typing import Dict, Union
-from tavily import TavilyClient
 from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional, TypedDict
 
 import requests
 
+from src.data_providers.news_store import NewsStore
+
 # Define response schemas
 class PriceData(TypedDict):
     time: str
@@ -123,6 +124,20 @@ def get_financial_metrics(ticker, report_period, period='ttm', limit=1):
         raise ValueError("No financial metrics returned")
     return financial_metrics
 
+_news_store = None
+
+def get_news_store() -> NewsStore:
+    """Return the shared news store, created on first use"""
+    global _news_store
+    if _news_store is None:
+        _news_store = NewsStore()
+    return _news_store
+
+def set_news_store(store: NewsStore) -> None:
+    """Route get_news through `store`, e.g. one persisted to disk or with offline results"""
+    global _news_store
+    _news_store = store
+
 def get_news(
     query: str,
     end_date: str,
@@ -132,26 +147,9 @@ def get_news(
     Perform a web search using the Tavily API.
 
     This tool accesses real-time web data, news, articles and should be used when up-to-date information from the internet is required.
+    Results come from the shared NewsStore, so a query is only searched again on a later day.
     """
-    client = TavilyClient(api_key=os.environ.get("TAVILY_API_KEY"))
-    response = client.search(query, topic="news", max_results=max_results)
-    
-    # Convert end_date string to datetime object
-    end_date_dt = datetime.strptime(end_date, '%Y-%m-%d')
-    
-    # Filter results
-    if 'results' in response:
-        filtered_results = []
-        for result in response['results']:
-            if 'published_date' in result:
-                # Parse the published_date
-                pub_date = datetime.strptime(result['published_date'], '%a, %d %b %Y %H:%M:%S %Z')
-                if pub_date.date() <= end_date_dt.date():
-                    filtered_results.append(result)
-        
-        response['results'] = filtered_results
-    
-    return response
+    return get_news_store().news(query, end_date, max_results)
 
 def calculate_confidence_level(signals):
     """Calculate confidence level based on the difference between SMAs."""
@@ -1,20 +1,25 @@
-from utils import get_default_period_init, get_default_period_end
+from src.utils import get_default_period_init, get_default_period_end
 import pandas as pd
 import requests
 import os
 from dotenv import load_dotenv
 import json
+from src.instrumentation import record_response
 
 load_dotenv()
 
-base_url = "https://api.dadosdemercado.com.br/v1"
+base_url = os.getenv("DADOS_DE_MERCADO_URL", "https://api.dadosdemercado.com.br/v1")
 bearer_token = os.getenv("BEARER_TOKEN")
 
+# Shared session so repeated calls reuse pooled keep-alive connections
+session = requests.Session()
+session.hooks["response"].append(record_response)
+
 def list_cia():
     '''Retorna lista de empresas listadas na B3 com campos: nome, nome comercial e código CVM'''
     url = f"{base_url}/companies"
     headers = {"Authorization": f"Bearer {bearer_token}"}
-    response = requests.get(url, headers=headers)
+    response = session.get(url, headers=headers)
     if response.status_code == 200:
         companies = response.json()
         return [{
@@ -42,7 +47,7 @@ def get_balance_sheet(cvm_code, statement_type="con", reference_date=None):
     if reference_date:
         params["reference_date"] = reference_date
     
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -58,7 +63,7 @@ def get_income_statements(cvm_code, statement_type="con", period_type="year"):
     url = f"{base_url}/companies/{cvm_code}/incomes"
     headers = {"Authorization": f"Bearer {bearer_token}"}
     params = {"statement_type": statement_type, "period_type": period_type}
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -74,7 +79,7 @@ def get_cash_flows(cvm_code, statement_type="con", period_type="year"):
     url = f"{base_url}/companies/{cvm_code}/cash_flows"
     headers = {"Authorization": f"Bearer {bearer_token}"}
     params = {"statement_type": statement_type, "period_type": period_type}
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -90,7 +95,7 @@ def get_financial_ratios(cvm_code, statement_type="con", period_type="ttm"):
     url = f"{base_url}/companies/{cvm_code}/ratios"
     headers = {"Authorization": f"Bearer {bearer_token}"}
     params = {"statement_type": statement_type, "period_type": period_type}
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -112,7 +117,7 @@ def get_market_ratios(cvm_code, statement_type="con", period_init=None, period_e
     if period_end:
         params["period_end"] = period_end
     
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -133,22 +138,28 @@ def get_quotes(ticker, period_init=None, period_end=None):
     if period_end:
         params["period_end"] = period_end
     
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     if response.status_code == 200:
-        data = response.json()
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-        return df[['open', 'close', 'adj_close', 'min', 'max', 'volume']]
+        return quotes_to_df(response.json())
     else:
         raise Exception(f"Failed to get quotes: {response.status_code} {response.text}")
 
+def quotes_to_df(data):
+    '''Converte a resposta de cotações em um DataFrame indexado por data.'''
+    columns = ['open', 'close', 'adj_close', 'min', 'max', 'volume']
+    if not data:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='date'))
+    df = pd.DataFrame(data)
+    df['date'] = pd.to_datetime(df['date'])
+    df.set_index('date', inplace=True)
+    return df[columns]
+
 def list_tickers():
     '''Retorna a lista de ativos disponíveis.'''
     url = f"{base_url}/tickers"
     headers = {"Authorization": f"Bearer {bearer_token}"}
     params = {"ticker_type": "stock"}
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -158,7 +169,7 @@ def list_funds():
     '''Retorna a lista de fundos de investimento.'''
     url = f"{base_url}/funds"
     headers = {"Authorization": f"Bearer {bearer_token}"}
-    response = requests.get(url, headers=headers)
+    response = session.get(url, headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -0,0 +1,108 @@
+import os
+import threading
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import pandas as pd
+from dateutil.easter import easter
+
+# Tickers that trade on every B3 session; their quotes tell which days the exchange was open
+REFERENCE_TICKERS = ("IBOV", "BOVA11", "PETR4", "VALE3")
+
+def _last_weekday(year: int) -> date:
+    """Last Monday-to-Friday day of the year; B3 closes on it rather than on a weekend 31 Dec"""
+    year_end = date(year, 12, 31)
+    return year_end - timedelta(days=max(0, year_end.weekday() - 4))
+
+@lru_cache(maxsize=None)
+def b3_holidays(year: int) -> List[date]:
+    """Full-day B3 closures for a year, from the exchange's standing holiday rules"""
+    easter_sunday = easter(year)
+    holidays = [
+        date(year, 1, 1),                          # Confraternização Universal
+        easter_sunday - timedelta(days=48),        # Carnaval (Monday)
+        easter_sunday - timedelta(days=47),        # Carnaval (Tuesday)
+        easter_sunday - timedelta(days=2),         # Sexta-feira Santa
+        date(year, 4, 21),                         # Tiradentes
+        date(year, 5, 1),                          # Dia do Trabalho
+        easter_sunday + timedelta(days=60),        # Corpus Christi
+        date(year, 9, 7),                          # Independência
+        date(year, 10, 12),                        # Nossa Senhora Aparecida
+        date(year, 11, 2),                         # Finados
+        date(year, 11, 15),                        # Proclamação da República
+        date(year, 12, 24),                        # Véspera de Natal
+        date(year, 12, 25),                        # Natal
+        _last_weekday(year),                       # Último dia útil do ano
+    ]
+    if year < 2022:
+        # São Paulo city and state holidays, on which B3 stopped closing in 2022
+        holidays += [date(year, 1, 25), date(year, 7, 9)]
+    if year >= 2024:
+        holidays.append(date(year, 11, 20))        # Dia da Consciência Negra
+    return sorted(holidays)
+
+class TradingCalendar:
+    """B3 trading sessions, learned from reference-ticker quotes with the holiday rules as fallback.
+
+    Days the quote store has observed are authoritative; any other day follows the weekday and
+    holiday rules. Observations are persisted to `path` when one is given.
+    """
+
+    def __init__(self, path: Optional[str] = None, reference_tickers: Iterable[str] = REFERENCE_TICKERS):
+        self.path = path
+        self.reference_tickers = set(reference_tickers)
+        self._observed = pd.Series(dtype=bool, index=pd.DatetimeIndex([]))
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._observed = pd.read_pickle(path)
+
+    def observe(self, start, end, dates: pd.DatetimeIndex) -> None:
+        """Record that within [start, end] the exchange traded exactly on `dates`"""
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+        if days.empty:
+            return
+        observed = pd.Series(days.isin(pd.DatetimeIndex(dates).normalize()), index=days)
+        with self._lock:
+            self._observed = observed.combine_first(self._observed).astype(bool)
+            if self.path:
+                pd.to_pickle(self._observed, self.path)
+
+    def observe_quotes(self, ticker: str, start, end, quotes: pd.DataFrame) -> None:
+        """Learn sessions from a fetched quote frame if `ticker` trades every session"""
+        # An empty frame is more likely a failed or partial response than a closed exchange
+        if ticker in self.reference_tickers and not quotes.empty:
+            self.observe(start, end, quotes.index)
+
+    def sessions(self, start, end) -> pd.DatetimeIndex:
+        """Trading sessions in [start, end]"""
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        if start > end:
+            return pd.DatetimeIndex([])
+        holidays = [day for year in range(start.year, end.year + 1) for day in b3_holidays(year)]
+        sessions = pd.bdate_range(start, end, freq="C", holidays=holidays)
+        with self._lock:
+            observed = self._observed.loc[start:end]
+        if observed.empty:
+            return sessions
+        sessions = sessions.difference(observed.index[~observed.to_numpy()])
+        return sessions.union(observed.index[observed.to_numpy()])
+
+    def is_session(self, day) -> bool:
+        return len(self.sessions(day, day)) == 1
+
+    def has_sessions(self, start, end) -> bool:
+        return len(self.sessions(start, end)) > 0
+
+    def previous_session(self, day) -> pd.Timestamp:
+        """Latest session on or before `day`"""
+        day = pd.Timestamp(day).normalize()
+        return self.sessions(day - timedelta(days=14), day)[-1]
+
+    def next_session(self, day) -> pd.Timestamp:
+        """Earliest session on or after `day`"""
+        day = pd.Timestamp(day).normalize()
+        return self.sessions(day, day + timedelta(days=14))[0]
+
+# Rules-only calendar for defaults that must not depend on any cached quotes
+b3_calendar = TradingCalendar()
@@ -1,11 +1,14 @@
 from datetime import datetime, timedelta
 
+from src.trading_calendar import b3_calendar
+
 def get_default_period_end():
+    """Latest B3 session on or before today (skips weekends and exchange holidays)"""
     today = datetime.today()
-    if today.weekday() >= 5:  # If today is Saturday (5) or Sunday (6)
-        offset = today.weekday() - 4  # Move back to Friday
-        return today - timedelta(days=offset)
-    return today
+    session = b3_calendar.previous_session(today)
+    if session.date() == today.date():
+        return today
+    return session.to_pydatetime()
 
 def get_default_period_init(period_end):
     return period_end - timedelta(days=365)
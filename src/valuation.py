@@ -0,0 +1,125 @@
+"""Daily valuation ratios derived locally from cached quotes and point-in-time statements.
+
+The market-ratio endpoint is only needed for sparse anchor snapshots: each snapshot fixes the
+share count (market cap / close), net debt (EV - market cap) and dividends per share
+(yield * close) in force until the next one. Every day's market cap, EV, P/E, P/B, EV/EBITDA
+and dividend yield then follows from that day's close, the latest published equity and the
+trailing-twelve-month net income and EBITDA, as the API's ratios do, computed as
+(dates, tickers) arrays for the whole universe at once.
+"""
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_providers.fundamentals_store import FundamentalsStore
+from src.data_providers.quote_store import QuoteStore
+
+VALUATION_RATIOS = ("market_cap", "enterprise_value", "p_e", "p_b", "ev_ebitda", "dividend_yield")
+# Statement fields the ratios are built from, as returned by FundamentalsStore.as_of_join
+INPUT_FIELDS = ("market_cap", "enterprise_value", "dividend_yield", "net_income", "total_equity", "ebitda")
+# Earnings taken over the trailing twelve months, so quarterly filings do not shrink them
+TRAILING_FIELDS = ("net_income", "ebitda")
+RECONCILED_RATIOS = ("market_cap", "p_e", "p_b", "ev_ebitda", "dividend_yield")
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+def valuation_ratios(
+    close: pd.DataFrame,
+    inputs: Dict[str, pd.DataFrame],
+    anchor_close: pd.DataFrame,
+) -> Dict[str, pd.DataFrame]:
+    """Ratio panels from a close panel and aligned (dates, tickers) panels of INPUT_FIELDS.
+
+    `anchor_close` holds, for each day, the close on the date of the market-ratio snapshot
+    then in force.
+    """
+    c = close.to_numpy(dtype=float)
+    anchor = anchor_close.to_numpy(dtype=float)
+    field = {name: inputs[name].to_numpy(dtype=float) for name in INPUT_FIELDS}
+
+    shares = _divide(field["market_cap"], anchor)
+    market_cap = c * shares
+    net_debt = field["enterprise_value"] - field["market_cap"]
+    enterprise_value = market_cap + net_debt
+    ratios = {
+        "market_cap": market_cap,
+        "enterprise_value": enterprise_value,
+        "p_e": _divide(market_cap, field["net_income"]),
+        "p_b": _divide(market_cap, field["total_equity"]),
+        "ev_ebitda": _divide(enterprise_value, field["ebitda"]),
+        "dividend_yield": _divide(field["dividend_yield"] * anchor, c),
+    }
+    return {name: pd.DataFrame(values, index=close.index, columns=close.columns) for name, values in ratios.items()}
+
+def _anchor_close(close: pd.Series, anchor_dates: pd.Series) -> np.ndarray:
+    """Close on (or before) each day's anchor date"""
+    known = close.dropna()
+    position = known.index.searchsorted(pd.DatetimeIndex(anchor_dates), side="right") - 1
+    values = known.to_numpy(dtype=float)[np.clip(position, 0, None)] if len(known) else np.full(len(position), np.nan)
+    return np.where((position >= 0) & anchor_dates.notna().to_numpy(), values, np.nan)
+
+def universe_valuations(
+    companies: Mapping[str, str],
+    start_date: str,
+    end_date: str,
+    quote_store: Optional[QuoteStore] = None,
+    fundamentals_store: Optional[FundamentalsStore] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Daily VALUATION_RATIOS for every ticker in `companies` (ticker -> cvm_code).
+
+    Returns one (dates, tickers) panel per ratio over the union of the tickers' sessions.
+    """
+    quote_store = quote_store or QuoteStore()
+    fundamentals_store = fundamentals_store or FundamentalsStore()
+    tickers = list(companies)
+    close = quote_store.panel(tickers, start_date, end_date, column="close")
+    inputs = {name: pd.DataFrame(index=close.index, columns=tickers, dtype=float) for name in INPUT_FIELDS}
+    anchor_close = pd.DataFrame(index=close.index, columns=tickers, dtype=float)
+
+    # Statements need the history before start_date too, so join over the whole price index
+    for ticker in tickers:
+        joined = fundamentals_store.as_of_join(companies[ticker], close.index)
+        trailing = fundamentals_store.trailing_join(companies[ticker], close.index, TRAILING_FIELDS)
+        for name in INPUT_FIELDS:
+            inputs[name][ticker] = (trailing if name in TRAILING_FIELDS else joined)[name].to_numpy()
+        anchors = joined["market_ratios_period"]
+        history = close[ticker]
+        if anchors.notna().any() and anchors.min() < close.index[0]:
+            # The first snapshot in force predates the window; its close comes from the store
+            history = quote_store.get(ticker, anchors.min().strftime("%Y-%m-%d"), end_date)["close"]
+        anchor_close[ticker] = _anchor_close(history, anchors)
+    return valuation_ratios(close, inputs, anchor_close)
+
+def reconcile(
+    local: Dict[str, pd.DataFrame],
+    companies: Mapping[str, str],
+    fundamentals_store: FundamentalsStore,
+    tolerance: float = 0.05,
+) -> pd.DataFrame:
+    """Compare local ratios with the API's market ratios on every date the API reported them.
+
+    Market cap matches on anchor dates by construction; P/E, P/B and EV/EBITDA test whether
+    the statement values the store picked are the ones the API used.
+    """
+    rows = []
+    index = next(iter(local.values())).index
+    for ticker, cvm_code in companies.items():
+        joined = fundamentals_store.as_of_join(cvm_code, index, statements=["market_ratios"])
+        reported = joined[joined["market_ratios_period"] == joined.index]
+        for name in RECONCILED_RATIOS:
+            api = reported[name]
+            mine = local[name].loc[reported.index, ticker]
+            valid = api.notna() & mine.notna() & (api != 0)
+            error = ((mine[valid] - api[valid]) / api[valid].abs()).abs()
+            rows.append({
+                "ticker": ticker,
+                "ratio": name,
+                "observations": int(valid.sum()),
+                "median_error": error.median() if len(error) else np.nan,
+                "max_error": error.max() if len(error) else np.nan,
+                "within_tolerance": bool((error <= tolerance).all()) if len(error) else False,
+            })
+    return pd.DataFrame(rows)
@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.agents import calculate_bollinger_bands, calculate_macd, calculate_obv, calculate_rsi
+
+# Order size meaning "as much as the constraints allow" (all cash on buys, all shares on sells)
+ALL = float(np.iinfo(np.int64).max)
+
+@dataclass
+class VectorizedBacktestResult:
+    close: np.ndarray
+    executed: np.ndarray
+    shares: np.ndarray
+    cash: np.ndarray
+    equity: np.ndarray
+    initial_capital: float
+    index: Optional[pd.Index] = None
+
+    @property
+    def total_return(self) -> float:
+        return self.equity[-1] / self.initial_capital - 1
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "close": self.close,
+                "executed": self.executed,
+                "shares": self.shares,
+                "cash": self.cash,
+                "Portfolio Value": self.equity,
+            },
+            index=self.index,
+        )
+
+def orders_from_signals(signals: np.ndarray, quantity: float = ALL) -> np.ndarray:
+    """Map +1/-1/0 signals to signed orders of `quantity` shares (buy, sell, hold)"""
+    signals = np.sign(np.asarray(signals, dtype=float))
+    return signals * quantity
+
+def orders_from_targets(target_shares: np.ndarray) -> np.ndarray:
+    """Signed orders that move the holdings to the target share count on each bar"""
+    target_shares = np.asarray(target_shares, dtype=float)
+    return np.diff(target_shares, prepend=0.0)
+
+def sma_crossover_signals(close: np.ndarray, short: int = 5, long: int = 20) -> np.ndarray:
+    """+1 where the short SMA crosses above the long SMA, -1 where it crosses below"""
+    close = pd.Series(np.asarray(close, dtype=float))
+    above = (close.rolling(short).mean() > close.rolling(long).mean()).to_numpy()
+    valid = close.rolling(long).mean().notna().to_numpy()
+    signals = np.zeros(len(close))
+    crossed = np.zeros(len(close), dtype=bool)
+    crossed[1:] = (above[1:] != above[:-1]) & valid[1:] & valid[:-1]
+    signals[crossed] = np.where(above[crossed], 1.0, -1.0)
+    return signals
+
+def quant_signals(prices_df: pd.DataFrame) -> np.ndarray:
+    """quant_agent's overall MACD/RSI/Bollinger/OBV vote for every bar, as +1/-1/0.
+
+    Bar t gets the signal quant_agent would produce on prices_df.iloc[:t + 1].
+    """
+    close = prices_df['close']
+    macd_line, signal_line = calculate_macd(prices_df)
+    rsi = calculate_rsi(prices_df)
+    upper_band, lower_band = calculate_bollinger_bands(prices_df)
+    obv = calculate_obv(prices_df)
+    obv_slope = obv.diff().rolling(5, min_periods=1).mean()
+
+    macd_prev, signal_prev = macd_line.shift(1), signal_line.shift(1)
+    votes = np.stack([
+        np.where((macd_prev < signal_prev) & (macd_line > signal_line), 1,
+                 np.where((macd_prev > signal_prev) & (macd_line < signal_line), -1, 0)),
+        np.where(rsi < 30, 1, np.where(rsi > 70, -1, 0)),
+        np.where(close < lower_band, 1, np.where(close > upper_band, -1, 0)),
+        np.where(obv_slope > 0, 1, np.where(obv_slope < 0, -1, 0)),
+    ])
+    bullish = (votes == 1).sum(axis=0)
+    bearish = (votes == -1).sum(axis=0)
+    return np.sign(bullish - bearish).astype(float)
+
+def _fill_sequentially(close: np.ndarray, orders: np.ndarray, initial_capital: float) -> np.ndarray:
+    """Walk only the bars that carry an order, for arbitrary quantities that hit the constraints"""
+    executed = np.zeros_like(orders)
+    cash_t, shares_t = initial_capital, 0.0
+    for i in np.flatnonzero(orders):
+        quantity, price = orders[i], close[i]
+        if quantity > 0:
+            fill = quantity if quantity * price <= cash_t else cash_t // price
+        else:
+            fill = -min(-quantity, shares_t)
+        cash_t -= fill * price
+        shares_t += fill
+        executed[i] = fill
+    return executed
+
+def _fill_all_in(close: np.ndarray, orders: np.ndarray, initial_capital: float) -> np.ndarray:
+    """Executed quantities of all-in buys and all-out sells, stepping once per holding segment.
+
+    The position (long or flat) is forward-filled from the orders, so each segment runs from
+    an entry buy to the next sell, which closes it at that bar's price. A repeated buy while
+    long spends only the cash left over after the earlier buys, which is below every earlier
+    buy price in the segment (or equal to it after float rounding), so it can add shares only
+    at a new or repeated low of the segment; those lows are found in one vectorized pass. What remains sequential is the whole-share cash
+    carried from one segment into the next.
+    """
+    bars = np.flatnonzero(orders)
+    price = close[bars]
+    buy = orders[bars] > 0
+    was_long = np.r_[False, buy[:-1]]
+    entries = np.flatnonzero(buy & ~was_long)
+    exits = np.flatnonzero(~buy & was_long)
+    segment = np.cumsum(buy & ~was_long) - 1
+
+    repeats = buy & was_long
+    if repeats.any():
+        # Running minimum buy price per segment, on integer price ranks so the reset offset is exact
+        _, rank = np.unique(price, return_inverse=True)
+        offset = len(price) + 1
+        key = np.where(buy, rank - segment * offset, np.iinfo(np.int64).max)
+        lowest = np.minimum.accumulate(key) + segment * offset
+        lows = np.flatnonzero(repeats & (rank <= np.r_[offset, lowest[:-1]]))
+    else:
+        lows = np.array([], dtype=int)
+    bounds = np.searchsorted(segment[lows], np.arange(len(entries) + 1)).tolist()
+
+    fills = [0.0] * len(bars)
+    prices, lows, exits = price.tolist(), lows.tolist(), exits.tolist()
+    cash = initial_capital
+    for k, entry in enumerate(entries.tolist()):
+        held = cash // prices[entry]
+        fills[entry] = held
+        cash -= held * prices[entry]
+        for low in lows[bounds[k]:bounds[k + 1]]:
+            added = cash // prices[low]
+            fills[low] = added
+            cash -= added * prices[low]
+            held += added
+        if k < len(exits):
+            fills[exits[k]] = -held
+            cash += held * prices[exits[k]]
+
+    executed = np.zeros_like(orders)
+    executed[bars] = fills
+    return executed
+
+def _fill_orders(close: np.ndarray, orders: np.ndarray, initial_capital: float) -> np.ndarray:
+    """Executed signed quantities under Backtester.execute_trade constraints"""
+    # Fast path: when no order ever exceeds cash or holdings, every order fills as requested
+    shares = np.cumsum(orders)
+    cash = initial_capital - np.cumsum(orders * close)
+    if (shares >= 0).all() and (cash >= 0).all():
+        return orders.copy()
+
+    # Signal-driven all-in/all-out orders, the common case, fill segment by segment
+    if (np.abs(orders[orders != 0]) == ALL).all() and (close[orders != 0] > 0).all():
+        return _fill_all_in(close, orders, initial_capital)
+    return _fill_sequentially(close, orders, initial_capital)
+
+def run_vectorized_backtest(
+    prices: Union[pd.Series, np.ndarray],
+    orders: np.ndarray,
+    initial_capital: float
+) -> VectorizedBacktestResult:
+    """Backtest signed share orders on a close price series with vectorized fills.
+
+    Applies the same rules as Backtester.execute_trade: no leverage, integer shares,
+    buys capped at the affordable quantity and sells capped at current holdings.
+    """
+    index = prices.index if isinstance(prices, pd.Series) else None
+    close = np.asarray(prices, dtype=float)
+    orders = np.trunc(np.asarray(orders, dtype=float))
+    if close.shape != orders.shape:
+        raise ValueError(f"prices and orders must have the same shape, got {close.shape} and {orders.shape}")
+
+    executed = _fill_orders(close, orders, initial_capital)
+    shares = np.cumsum(executed)
+    cash = initial_capital - np.cumsum(executed * close)
+    equity = cash + shares * close
+
+    return VectorizedBacktestResult(
+        close=close,
+        executed=executed,
+        shares=shares,
+        cash=cash,
+        equity=equity,
+        initial_capital=initial_capital,
+        index=index,
+    )
@@ -0,0 +1,71 @@
+"""Running sums over the last `window` rows of a (days, assets) return stream.
+
+WindowedSums owns the ring buffer shared by RollingRisk and RollingCorrelation: it adds each
+new row to the subclass's sums, subtracts the row leaving the window and rebuilds the sums
+from the buffered rows once per window to stop rounding drift. Subclasses decide which sums
+to keep and how a missing (NaN) return enters them:
+
+- RollingRisk counts NaN as a 0% return (a stale price), so every row covers every asset and
+  the covariance stays positive semi-definite for VaR.
+- RollingCorrelation skips NaN pairwise, like DataFrame.corr.
+
+On a panel without NaN both give the same 1/n covariance; with gaps, RollingRisk matches
+RollingCorrelation fed the zero-filled panel.
+"""
+import numpy as np
+
+class WindowedSums:
+    """Ring buffer of the last `window` return rows plus the running sums a subclass keeps"""
+
+    def __init__(self, n_assets: int, window: int, buffered: bool = True):
+        self.window = window
+        self._rows = np.full((window if buffered else 0, n_assets), np.nan)
+        self._count = 0
+        self._position = 0
+        self._since_rebuild = 0
+        self._reset_sums(n_assets)
+
+    def _reset_sums(self, n: int) -> None:
+        raise NotImplementedError
+
+    def _add(self, row: np.ndarray, sign: float) -> None:
+        raise NotImplementedError
+
+    def _add_rows(self, rows: np.ndarray) -> None:
+        """Add many rows at once; subclasses override with a matrix product"""
+        for row in rows:
+            self._add(row, 1.0)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def update(self, returns: np.ndarray) -> None:
+        """Add one row of returns, dropping the oldest once the window is full"""
+        row = np.asarray(returns, dtype=float)
+        if self._count == self.window:
+            self._add(self._rows[self._position], -1.0)
+        else:
+            self._count += 1
+        self._rows[self._position] = row
+        self._position = (self._position + 1) % self.window
+        self._add(row, 1.0)
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+
+    def warm_up(self, returns: np.ndarray) -> "WindowedSums":
+        for row in np.asarray(returns, dtype=float)[-self.window:]:
+            self.update(row)
+        return self
+
+    def _rebuild(self) -> None:
+        self._reset_sums(self._rows.shape[1])
+        self._add_rows(self.returns())
+        self._since_rebuild = 0
+
+    def returns(self) -> np.ndarray:
+        """Buffered rows, oldest first"""
+        if self._count < self.window:
+            return self._rows[:self._count]
+        return np.roll(self._rows, -self._position, axis=0)